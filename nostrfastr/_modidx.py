@@ -5,20 +5,43 @@ d = { 'settings': { 'branch': 'main',
                 'doc_host': 'https://armstrys.github.io',
                 'git_url': 'https://github.com/armstrys/nostrfastr',
                 'lib_path': 'nostrfastr'},
-  'syms': { 'nostrfastr.client': { 'nostrfastr.client.Client': ('client.html#client', 'nostrfastr/client.py'),
+  'syms': { 'nostrfastr.backfill': { 'nostrfastr.backfill.Backfill': ('backfill.html#backfill', 'nostrfastr/backfill.py'),
+                                     'nostrfastr.backfill.Backfill.__init__': ('backfill.html#backfill.__init__', 'nostrfastr/backfill.py'),
+                                     'nostrfastr.backfill.Backfill.__repr__': ('backfill.html#backfill.__repr__', 'nostrfastr/backfill.py'),
+                                     'nostrfastr.backfill.Backfill._backfill_relay': ( 'backfill.html#backfill._backfill_relay',
+                                                                                       'nostrfastr/backfill.py'),
+                                     'nostrfastr.backfill.Backfill._fetch': ('backfill.html#backfill._fetch', 'nostrfastr/backfill.py'),
+                                     'nostrfastr.backfill.Backfill.is_done': ('backfill.html#backfill.is_done', 'nostrfastr/backfill.py'),
+                                     'nostrfastr.backfill.Backfill.progress': ('backfill.html#backfill.progress', 'nostrfastr/backfill.py'),
+                                     'nostrfastr.backfill.Backfill.run': ('backfill.html#backfill.run', 'nostrfastr/backfill.py')},
+            'nostrfastr.client': { 'nostrfastr.client.Client': ('client.html#client', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.__enter__': ('client.html#client.__enter__', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.__exit__': ('client.html#client.__exit__', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.__init__': ('client.html#client.__init__', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client._close_stream': ('client.html#client._close_stream', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client._eose_handler': ('client.html#client._eose_handler', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client._event_handler': ('client.html#client._event_handler', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client._notice_handler': ( 'client.html#client._notice_handler',
                                                                                  'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client._on_seen': ('client.html#client._on_seen', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client._open_stream': ('client.html#client._open_stream', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client._request_private_key_hex': ( 'client.html#client._request_private_key_hex',
                                                                                           'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client._sign_event': ('client.html#client._sign_event', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client._stored_stream': ('client.html#client._stored_stream', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client._stream_done': ('client.html#client._stream_done', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.apply_retention': ( 'client.html#client.apply_retention',
+                                                                                 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.astream': ('client.html#client.astream', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.check_event_pubkey': ( 'client.html#client.check_event_pubkey',
                                                                                     'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.close_subscription': ( 'client.html#client.close_subscription',
+                                                                                    'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.compact': ('client.html#client.compact', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.connect': ('client.html#client.connect', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.db_conn': ('client.html#client.db_conn', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.decrypt_messages': ( 'client.html#client.decrypt_messages',
+                                                                                  'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.disconnect': ('client.html#client.disconnect', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.event_channel': ('client.html#client.event_channel', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.event_channel_hide_message': ( 'client.html#client.event_channel_hide_message',
@@ -38,6 +61,9 @@ d = { 'settings': { 'branch': 'main',
                                                                                          'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.event_text_note': ( 'client.html#client.event_text_note',
                                                                                  'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.events_dataframe': ( 'client.html#client.events_dataframe',
+                                                                                  'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.export_events': ('client.html#client.export_events', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.filter_events_authors': ( 'client.html#client.filter_events_authors',
                                                                                        'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.filter_events_by_id': ( 'client.html#client.filter_events_by_id',
@@ -56,35 +82,263 @@ d = { 'settings': { 'branch': 'main',
                                    'nostrfastr.client.Client.load_existing_event_ids': ( 'client.html#client.load_existing_event_ids',
                                                                                          'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.publish_event': ('client.html#client.publish_event', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.publish_events': ('client.html#client.publish_events', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.publish_subscription': ( 'client.html#client.publish_subscription',
                                                                                       'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.query': ('client.html#client.query', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.query_local': ('client.html#client.query_local', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.relay_counts': ('client.html#client.relay_counts', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.relay_scores_path': ( 'client.html#client.relay_scores_path',
+                                                                                   'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.search': ('client.html#client.search', 'nostrfastr/client.py'),
                                    'nostrfastr.client.Client.set_account': ('client.html#client.set_account', 'nostrfastr/client.py'),
-                                   'nostrfastr.client.Client.set_relays': ('client.html#client.set_relays', 'nostrfastr/client.py')},
-            'nostrfastr.nostr': { 'nostrfastr.nostr.Connection': ('nostr_core.html#connection', 'nostrfastr/nostr.py'),
+                                   'nostrfastr.client.Client.set_relays': ('client.html#client.set_relays', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.sign_events': ('client.html#client.sign_events', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.stream': ('client.html#client.stream', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.subscribe': ('client.html#client.subscribe', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.unsubscribe': ('client.html#client.unsubscribe', 'nostrfastr/client.py'),
+                                   'nostrfastr.client.Client.update_relay_scores': ( 'client.html#client.update_relay_scores',
+                                                                                     'nostrfastr/client.py'),
+                                   'nostrfastr.client._event_id': ('client.html#_event_id', 'nostrfastr/client.py')},
+            'nostrfastr.nostr': { 'nostrfastr.nostr.AsyncRelay': ('nostr_core.html#asyncrelay', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.__init__': ('nostr_core.html#asyncrelay.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.__repr__': ('nostr_core.html#asyncrelay.__repr__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay._connect_once': ( 'nostr_core.html#asyncrelay._connect_once',
+                                                                                 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay._on_error': ('nostr_core.html#asyncrelay._on_error', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay._on_message': ( 'nostr_core.html#asyncrelay._on_message',
+                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay._on_sent': ('nostr_core.html#asyncrelay._on_sent', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay._run': ('nostr_core.html#asyncrelay._run', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.add_subscription': ( 'nostr_core.html#asyncrelay.add_subscription',
+                                                                                    'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.close': ('nostr_core.html#asyncrelay.close', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.close_subscription': ( 'nostr_core.html#asyncrelay.close_subscription',
+                                                                                      'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.connect': ('nostr_core.html#asyncrelay.connect', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.is_connected': ( 'nostr_core.html#asyncrelay.is_connected',
+                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.is_connecting': ( 'nostr_core.html#asyncrelay.is_connecting',
+                                                                                 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.is_reconnecting': ( 'nostr_core.html#asyncrelay.is_reconnecting',
+                                                                                   'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.open_connections': ( 'nostr_core.html#asyncrelay.open_connections',
+                                                                                    'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.publish': ('nostr_core.html#asyncrelay.publish', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.to_json_object': ( 'nostr_core.html#asyncrelay.to_json_object',
+                                                                                  'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelay.update_subscription': ( 'nostr_core.html#asyncrelay.update_subscription',
+                                                                                       'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelayManager': ('nostr_core.html#asyncrelaymanager', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelayManager.__init__': ( 'nostr_core.html#asyncrelaymanager.__init__',
+                                                                                   'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelayManager._close': ( 'nostr_core.html#asyncrelaymanager._close',
+                                                                                 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelayManager._run_coroutine': ( 'nostr_core.html#asyncrelaymanager._run_coroutine',
+                                                                                         'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelayManager._start_loop': ( 'nostr_core.html#asyncrelaymanager._start_loop',
+                                                                                      'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelayManager.add_relay': ( 'nostr_core.html#asyncrelaymanager.add_relay',
+                                                                                    'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelayManager.close_connections': ( 'nostr_core.html#asyncrelaymanager.close_connections',
+                                                                                            'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.AsyncRelayManager.open_connections': ( 'nostr_core.html#asyncrelaymanager.open_connections',
+                                                                                           'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Backoff': ('nostr_core.html#backoff', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Backoff.__init__': ('nostr_core.html#backoff.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Backoff.delay': ('nostr_core.html#backoff.delay', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BloomDedup': ('nostr_core.html#bloomdedup', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BloomDedup.__contains__': ( 'nostr_core.html#bloomdedup.__contains__',
+                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BloomDedup.__init__': ('nostr_core.html#bloomdedup.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BloomDedup.__len__': ('nostr_core.html#bloomdedup.__len__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BloomDedup._check': ('nostr_core.html#bloomdedup._check', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BloomDedup._positions': ( 'nostr_core.html#bloomdedup._positions',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BloomDedup.add': ('nostr_core.html#bloomdedup.add', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BloomDedup.clear': ('nostr_core.html#bloomdedup.clear', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BloomDedup.nbytes': ('nostr_core.html#bloomdedup.nbytes', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BloomDedup.update': ('nostr_core.html#bloomdedup.update', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BoundedQueue': ('nostr_core.html#boundedqueue', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BoundedQueue.__init__': ( 'nostr_core.html#boundedqueue.__init__',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BoundedQueue.put': ('nostr_core.html#boundedqueue.put', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.BoundedQueue.stats': ('nostr_core.html#boundedqueue.stats', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Connection': ('nostr_core.html#connection', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Connection.__enter__': ('nostr_core.html#connection.__enter__', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Connection.__exit__': ('nostr_core.html#connection.__exit__', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Connection.__init__': ('nostr_core.html#connection.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventRecord': ('nostr_core.html#eventrecord', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventRecord.__init__': ('nostr_core.html#eventrecord.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventRecord.__repr__': ('nostr_core.html#eventrecord.__repr__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventRecord.event': ('nostr_core.html#eventrecord.event', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventRecord.event_id': ('nostr_core.html#eventrecord.event_id', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventRecord.from_event_message': ( 'nostr_core.html#eventrecord.from_event_message',
+                                                                                       'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventRecord.from_json': ( 'nostr_core.html#eventrecord.from_json',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventRecord.to_json_object': ( 'nostr_core.html#eventrecord.to_json_object',
+                                                                                   'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventSigner': ('nostr_core.html#eventsigner', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventSigner.__init__': ('nostr_core.html#eventsigner.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventSigner.close': ('nostr_core.html#eventsigner.close', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventSigner.executor': ('nostr_core.html#eventsigner.executor', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventSigner.sign': ('nostr_core.html#eventsigner.sign', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventVerifier': ('nostr_core.html#eventverifier', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventVerifier.__init__': ( 'nostr_core.html#eventverifier.__init__',
+                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventVerifier._run': ('nostr_core.html#eventverifier._run', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventVerifier._verify_each': ( 'nostr_core.html#eventverifier._verify_each',
+                                                                                   'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventVerifier.executor': ( 'nostr_core.html#eventverifier.executor',
+                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventVerifier.start': ('nostr_core.html#eventverifier.start', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventVerifier.stats': ('nostr_core.html#eventverifier.stats', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventVerifier.submit': ('nostr_core.html#eventverifier.submit', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventVerifier.verify': ('nostr_core.html#eventverifier.verify', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.EventVerifier.wait': ('nostr_core.html#eventverifier.wait', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.FilterJson': ('nostr_core.html#filterjson', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.FilterJson.__init__': ('nostr_core.html#filterjson.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.FilterJson.__repr__': ('nostr_core.html#filterjson.__repr__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.FilterJson.matches': ('nostr_core.html#filterjson.matches', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.FilterJson.to_json_object': ( 'nostr_core.html#filterjson.to_json_object',
+                                                                                  'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Histogram': ('nostr_core.html#histogram', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Histogram.__init__': ('nostr_core.html#histogram.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Histogram.observe': ('nostr_core.html#histogram.observe', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Histogram.quantile': ('nostr_core.html#histogram.quantile', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Histogram.snapshot': ('nostr_core.html#histogram.snapshot', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LRUDedup': ('nostr_core.html#lrudedup', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LRUDedup.__contains__': ( 'nostr_core.html#lrudedup.__contains__',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LRUDedup.__init__': ('nostr_core.html#lrudedup.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LRUDedup.__len__': ('nostr_core.html#lrudedup.__len__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LRUDedup.add': ('nostr_core.html#lrudedup.add', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LRUDedup.clear': ('nostr_core.html#lrudedup.clear', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LRUDedup.update': ('nostr_core.html#lrudedup.update', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LazyEventMessage': ('nostr_core.html#lazyeventmessage', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LazyEventMessage.__init__': ( 'nostr_core.html#lazyeventmessage.__init__',
+                                                                                  'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LazyEventMessage._decoded': ( 'nostr_core.html#lazyeventmessage._decoded',
+                                                                                  'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.LazyEventMessage.event': ( 'nostr_core.html#lazyeventmessage.event',
+                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MergedFilter': ('nostr_core.html#mergedfilter', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MergedFilter.__init__': ( 'nostr_core.html#mergedfilter.__init__',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MergedFilter.__repr__': ( 'nostr_core.html#mergedfilter.__repr__',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MergedFilter.merge': ('nostr_core.html#mergedfilter.merge', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MergedFilter.to_json_object': ( 'nostr_core.html#mergedfilter.to_json_object',
+                                                                                    'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.MessagePool': ('nostr_core.html#messagepool', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.MessagePool.__init__': ('nostr_core.html#messagepool.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool._accept': ('nostr_core.html#messagepool._accept', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool._claim': ('nostr_core.html#messagepool._claim', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool._event_queue': ( 'nostr_core.html#messagepool._event_queue',
+                                                                                 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool._is_new': ('nostr_core.html#messagepool._is_new', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool._matches': ('nostr_core.html#messagepool._matches', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.MessagePool._process_message': ( 'nostr_core.html#messagepool._process_message',
                                                                                      'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool._put_event': ( 'nostr_core.html#messagepool._put_event',
+                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool._queue_event': ( 'nostr_core.html#messagepool._queue_event',
+                                                                                 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool._seen': ('nostr_core.html#messagepool._seen', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool.add_message': ( 'nostr_core.html#messagepool.add_message',
+                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool.add_subscription_queue': ( 'nostr_core.html#messagepool.add_subscription_queue',
+                                                                                           'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool.get_event': ( 'nostr_core.html#messagepool.get_event',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool.get_events': ( 'nostr_core.html#messagepool.get_events',
+                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool.has_events': ( 'nostr_core.html#messagepool.has_events',
+                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool.queue_stats': ( 'nostr_core.html#messagepool.queue_stats',
+                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.MessagePool.remove_subscription_queue': ( 'nostr_core.html#messagepool.remove_subscription_queue',
+                                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics': ('nostr_core.html#metrics', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics.__init__': ('nostr_core.html#metrics.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics.close_subscription': ( 'nostr_core.html#metrics.close_subscription',
+                                                                                   'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics.observe_eose': ('nostr_core.html#metrics.observe_eose', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics.observe_error': ( 'nostr_core.html#metrics.observe_error',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics.observe_event': ( 'nostr_core.html#metrics.observe_event',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics.observe_frame': ( 'nostr_core.html#metrics.observe_frame',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics.observe_handler': ( 'nostr_core.html#metrics.observe_handler',
+                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics.observe_notice': ( 'nostr_core.html#metrics.observe_notice',
+                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics.observe_request': ( 'nostr_core.html#metrics.observe_request',
+                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Metrics.snapshot': ('nostr_core.html#metrics.snapshot', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.OkMessage': ('nostr_core.html#okmessage', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.OkMessage.__init__': ('nostr_core.html#okmessage.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.OkMessage.__repr__': ('nostr_core.html#okmessage.__repr__', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.PrivateKey': ('nostr_core.html#privatekey', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.PrivateKey.__init__': ('nostr_core.html#privatekey.__init__', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.PrivateKey.__repr__': ('nostr_core.html#privatekey.__repr__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.PrivateKey.compute_shared_secret': ( 'nostr_core.html#privatekey.compute_shared_secret',
+                                                                                         'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.PrivateKey.decrypt_message': ( 'nostr_core.html#privatekey.decrypt_message',
+                                                                                   'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.PrivateKey.decrypt_messages': ( 'nostr_core.html#privatekey.decrypt_messages',
+                                                                                    'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.PrivateKey.from_hex': ('nostr_core.html#privatekey.from_hex', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.PublicKey': ('nostr_core.html#publickey', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.PublicKey.__init__': ('nostr_core.html#publickey.__init__', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.PublicKey.__repr__': ('nostr_core.html#publickey.__repr__', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.PublicKey.from_hex': ('nostr_core.html#publickey.from_hex', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.PublicKey.from_npub': ('nostr_core.html#publickey.from_npub', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.PublishFuture': ('nostr_core.html#publishfuture', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.PublishFuture.__init__': ( 'nostr_core.html#publishfuture.__init__',
+                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.PublishFuture._ack': ('nostr_core.html#publishfuture._ack', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.PublishFuture.accepted': ( 'nostr_core.html#publishfuture.accepted',
+                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.PublishFuture.is_complete': ( 'nostr_core.html#publishfuture.is_complete',
+                                                                                  'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher': ('nostr_core.html#publisher', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher.__init__': ('nostr_core.html#publisher.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher._ack': ('nostr_core.html#publisher._ack', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher._fill_windows': ( 'nostr_core.html#publisher._fill_windows',
+                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher._resolve': ('nostr_core.html#publisher._resolve', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher._run_expiry': ( 'nostr_core.html#publisher._run_expiry',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher._send': ('nostr_core.html#publisher._send', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher._start_expiry': ( 'nostr_core.html#publisher._start_expiry',
+                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher.expire': ('nostr_core.html#publisher.expire', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher.in_flight_count': ( 'nostr_core.html#publisher.in_flight_count',
+                                                                                  'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher.on_ok': ('nostr_core.html#publisher.on_ok', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Publisher.publish': ('nostr_core.html#publisher.publish', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.QueuePolicy': ('nostr_core.html#queuepolicy', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Relay': ('nostr_core.html#relay', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Relay.__init__': ('nostr_core.html#relay.__init__', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Relay.__repr__': ('nostr_core.html#relay.__repr__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Relay._on_error': ('nostr_core.html#relay._on_error', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Relay._on_message': ('nostr_core.html#relay._on_message', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Relay._on_open': ('nostr_core.html#relay._on_open', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Relay._run': ('nostr_core.html#relay._run', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Relay.add_subscription': ( 'nostr_core.html#relay.add_subscription',
+                                                                               'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Relay.close': ('nostr_core.html#relay.close', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Relay.close_connections': ( 'nostr_core.html#relay.close_connections',
                                                                                 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Relay.connect': ('nostr_core.html#relay.connect', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Relay.connection': ('nostr_core.html#relay.connection', 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Relay.is_connected': ('nostr_core.html#relay.is_connected', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Relay.is_connecting': ('nostr_core.html#relay.is_connecting', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.Relay.is_reconnecting': ( 'nostr_core.html#relay.is_reconnecting',
+                                                                              'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.Relay.open_connections': ( 'nostr_core.html#relay.open_connections',
                                                                                'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.RelayManager': ('nostr_core.html#relaymanager', 'nostrfastr/nostr.py'),
@@ -92,20 +346,119 @@ d = { 'settings': { 'branch': 'main',
                                                                               'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.RelayManager.__iter__': ( 'nostr_core.html#relaymanager.__iter__',
                                                                               'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayManager._wait_for_connections': ( 'nostr_core.html#relaymanager._wait_for_connections',
+                                                                                           'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.RelayManager.add_relay': ( 'nostr_core.html#relaymanager.add_relay',
                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayManager.add_subscription': ( 'nostr_core.html#relaymanager.add_subscription',
+                                                                                      'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.RelayManager.close_connections': ( 'nostr_core.html#relaymanager.close_connections',
                                                                                        'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayManager.close_subscription': ( 'nostr_core.html#relaymanager.close_subscription',
+                                                                                        'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayManager.connect_latencies': ( 'nostr_core.html#relaymanager.connect_latencies',
+                                                                                       'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.RelayManager.connection': ( 'nostr_core.html#relaymanager.connection',
                                                                                 'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.RelayManager.connection_statuses': ( 'nostr_core.html#relaymanager.connection_statuses',
                                                                                          'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayManager.has_eose': ( 'nostr_core.html#relaymanager.has_eose',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayManager.metrics_prometheus': ( 'nostr_core.html#relaymanager.metrics_prometheus',
+                                                                                        'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayManager.metrics_snapshot': ( 'nostr_core.html#relaymanager.metrics_snapshot',
+                                                                                      'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.RelayManager.open_connections': ( 'nostr_core.html#relaymanager.open_connections',
                                                                                       'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayManager.publish_event': ( 'nostr_core.html#relaymanager.publish_event',
+                                                                                   'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayManager.publish_message': ( 'nostr_core.html#relaymanager.publish_message',
+                                                                                     'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.RelayManager.remove_closed_relays': ( 'nostr_core.html#relaymanager.remove_closed_relays',
                                                                                           'nostrfastr/nostr.py'),
                                   'nostrfastr.nostr.RelayManager.remove_relay': ( 'nostr_core.html#relaymanager.remove_relay',
-                                                                                  'nostrfastr/nostr.py')},
+                                                                                  'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayManager.wait_for_eose': ( 'nostr_core.html#relaymanager.wait_for_eose',
+                                                                                   'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayMetrics': ('nostr_core.html#relaymetrics', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayMetrics.__init__': ( 'nostr_core.html#relaymetrics.__init__',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayMetrics.snapshot': ( 'nostr_core.html#relaymetrics.snapshot',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayScores': ('nostr_core.html#relayscores', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayScores.__init__': ('nostr_core.html#relayscores.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayScores._relay': ('nostr_core.html#relayscores._relay', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayScores.load': ('nostr_core.html#relayscores.load', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayScores.save': ('nostr_core.html#relayscores.save', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayScores.score': ('nostr_core.html#relayscores.score', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayScores.select': ('nostr_core.html#relayscores.select', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayScores.to_json_object': ( 'nostr_core.html#relayscores.to_json_object',
+                                                                                   'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.RelayScores.update': ('nostr_core.html#relayscores.update', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SQLiteDedup': ('nostr_core.html#sqlitededup', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SQLiteDedup.__contains__': ( 'nostr_core.html#sqlitededup.__contains__',
+                                                                                 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SQLiteDedup.__init__': ('nostr_core.html#sqlitededup.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SQLiteDedup.__len__': ('nostr_core.html#sqlitededup.__len__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SQLiteDedup._con': ('nostr_core.html#sqlitededup._con', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SQLiteDedup.add': ('nostr_core.html#sqlitededup.add', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SQLiteDedup.clear': ('nostr_core.html#sqlitededup.clear', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SQLiteDedup.contains': ('nostr_core.html#sqlitededup.contains', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SQLiteDedup.update': ('nostr_core.html#sqlitededup.update', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.StoreDedup': ('nostr_core.html#storededup', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.StoreDedup.__contains__': ( 'nostr_core.html#storededup.__contains__',
+                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.StoreDedup.__init__': ('nostr_core.html#storededup.__init__', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.StoreDedup.add': ('nostr_core.html#storededup.add', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.StoreDedup.clear': ('nostr_core.html#storededup.clear', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.StoreDedup.contains': ('nostr_core.html#storededup.contains', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.StoreDedup.update': ('nostr_core.html#storededup.update', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer': ( 'nostr_core.html#subscriptionmultiplexer',
+                                                                                'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer.__init__': ( 'nostr_core.html#subscriptionmultiplexer.__init__',
+                                                                                         'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer._place': ( 'nostr_core.html#subscriptionmultiplexer._place',
+                                                                                       'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer._route': ( 'nostr_core.html#subscriptionmultiplexer._route',
+                                                                                       'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer._send': ( 'nostr_core.html#subscriptionmultiplexer._send',
+                                                                                      'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer.dispatch': ( 'nostr_core.html#subscriptionmultiplexer.dispatch',
+                                                                                         'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer.has_eose': ( 'nostr_core.html#subscriptionmultiplexer.has_eose',
+                                                                                         'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer.request_ids': ( 'nostr_core.html#subscriptionmultiplexer.request_ids',
+                                                                                            'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer.routes': ( 'nostr_core.html#subscriptionmultiplexer.routes',
+                                                                                       'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer.subscribe': ( 'nostr_core.html#subscriptionmultiplexer.subscribe',
+                                                                                          'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer.unsubscribe': ( 'nostr_core.html#subscriptionmultiplexer.unsubscribe',
+                                                                                            'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.SubscriptionMultiplexer.wait_for_eose': ( 'nostr_core.html#subscriptionmultiplexer.wait_for_eose',
+                                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._decrypt_with_secret': ('nostr_core.html#_decrypt_with_secret', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._event_json': ('nostr_core.html#_event_json', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._event_tuple': ('nostr_core.html#_event_tuple', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._is_valid_frame': ('nostr_core.html#_is_valid_frame', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._is_wanted_frame': ('nostr_core.html#_is_wanted_frame', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._merge_key': ('nostr_core.html#_merge_key', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._pack_tag': ('nostr_core.html#_pack_tag', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._peek_event_frame': ('nostr_core.html#_peek_event_frame', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._prefix_match': ('nostr_core.html#_prefix_match', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._prometheus_histogram': ( 'nostr_core.html#_prometheus_histogram',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._prometheus_labels': ('nostr_core.html#_prometheus_labels', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._resubscribe_requests': ( 'nostr_core.html#_resubscribe_requests',
+                                                                              'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._sign_payload': ('nostr_core.html#_sign_payload', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._ssl_context': ('nostr_core.html#_ssl_context', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._track_subscriptions': ('nostr_core.html#_track_subscriptions', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._try_decrypt': ('nostr_core.html#_try_decrypt', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._unpack_tag': ('nostr_core.html#_unpack_tag', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr._verify_event': ('nostr_core.html#_verify_event', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.match_filter': ('nostr_core.html#match_filter', 'nostrfastr/nostr.py'),
+                                  'nostrfastr.nostr.prometheus_text': ('nostr_core.html#prometheus_text', 'nostrfastr/nostr.py')},
             'nostrfastr.notifyr': { 'nostrfastr.notifyr.convert_to_hex': ('notifyr.html#convert_to_hex', 'nostrfastr/notifyr.py'),
                                     'nostrfastr.notifyr.delete_private_key': ('notifyr.html#delete_private_key', 'nostrfastr/notifyr.py'),
                                     'nostrfastr.notifyr.get_notifyr_privkey': ('notifyr.html#get_notifyr_privkey', 'nostrfastr/notifyr.py'),
@@ -113,6 +466,161 @@ d = { 'settings': { 'branch': 'main',
                                     'nostrfastr.notifyr.notifyr': ('notifyr.html#notifyr', 'nostrfastr/notifyr.py'),
                                     'nostrfastr.notifyr.send_nostr_message': ('notifyr.html#send_nostr_message', 'nostrfastr/notifyr.py'),
                                     'nostrfastr.notifyr.set_private_key': ('notifyr.html#set_private_key', 'nostrfastr/notifyr.py')},
+            'nostrfastr.storage': { 'nostrfastr.storage.EventStore': ('storage.html#eventstore', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.__init__': ('storage.html#eventstore.__init__', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore._apply_rules': ( 'storage.html#eventstore._apply_rules',
+                                                                                    'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore._copy_legacy_events': ( 'storage.html#eventstore._copy_legacy_events',
+                                                                                           'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore._has_table': ( 'storage.html#eventstore._has_table',
+                                                                                  'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore._is_forged': ( 'storage.html#eventstore._is_forged',
+                                                                                  'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore._obsolete': ( 'storage.html#eventstore._obsolete',
+                                                                                 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore._read_chunks': ( 'storage.html#eventstore._read_chunks',
+                                                                                    'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore._record_deletion': ( 'storage.html#eventstore._record_deletion',
+                                                                                        'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore._remove': ('storage.html#eventstore._remove', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore._write': ('storage.html#eventstore._write', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore._write_seen': ( 'storage.html#eventstore._write_seen',
+                                                                                   'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.add': ('storage.html#eventstore.add', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.add_coverage': ( 'storage.html#eventstore.add_coverage',
+                                                                                    'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.add_many': ('storage.html#eventstore.add_many', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.add_seen': ('storage.html#eventstore.add_seen', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.backfill_checkpoints': ( 'storage.html#eventstore.backfill_checkpoints',
+                                                                                            'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.close': ('storage.html#eventstore.close', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.compact': ('storage.html#eventstore.compact', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.coverage': ('storage.html#eventstore.coverage', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.enable_search': ( 'storage.html#eventstore.enable_search',
+                                                                                     'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.export_dataset': ( 'storage.html#eventstore.export_dataset',
+                                                                                      'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.flush': ('storage.html#eventstore.flush', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.has_search': ( 'storage.html#eventstore.has_search',
+                                                                                  'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.iter_events': ( 'storage.html#eventstore.iter_events',
+                                                                                   'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.migrate': ('storage.html#eventstore.migrate', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.pending': ('storage.html#eventstore.pending', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.query': ('storage.html#eventstore.query', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.recent_ids': ( 'storage.html#eventstore.recent_ids',
+                                                                                  'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.relay_counts': ( 'storage.html#eventstore.relay_counts',
+                                                                                    'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.save_backfill_checkpoint': ( 'storage.html#eventstore.save_backfill_checkpoint',
+                                                                                                'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.schema_version': ( 'storage.html#eventstore.schema_version',
+                                                                                      'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.search': ('storage.html#eventstore.search', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.seen_on': ('storage.html#eventstore.seen_on', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.size': ('storage.html#eventstore.size', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.EventStore.uncovered': ( 'storage.html#eventstore.uncovered',
+                                                                                 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore': ( 'storage.html#partitionedeventstore',
+                                                                                  'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.__init__': ( 'storage.html#partitionedeventstore.__init__',
+                                                                                           'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore._apply_deletions': ( 'storage.html#partitionedeventstore._apply_deletions',
+                                                                                                   'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore._locate': ( 'storage.html#partitionedeventstore._locate',
+                                                                                          'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore._partition': ( 'storage.html#partitionedeventstore._partition',
+                                                                                             'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore._read_chunks': ( 'storage.html#partitionedeventstore._read_chunks',
+                                                                                               'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore._reader': ( 'storage.html#partitionedeventstore._reader',
+                                                                                          'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore._remove_deleted': ( 'storage.html#partitionedeventstore._remove_deleted',
+                                                                                                  'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore._route': ( 'storage.html#partitionedeventstore._route',
+                                                                                         'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore._stores': ( 'storage.html#partitionedeventstore._stores',
+                                                                                          'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.add': ( 'storage.html#partitionedeventstore.add',
+                                                                                      'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.add_coverage': ( 'storage.html#partitionedeventstore.add_coverage',
+                                                                                               'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.add_many': ( 'storage.html#partitionedeventstore.add_many',
+                                                                                           'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.add_seen': ( 'storage.html#partitionedeventstore.add_seen',
+                                                                                           'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.apply_retention': ( 'storage.html#partitionedeventstore.apply_retention',
+                                                                                                  'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.backfill_checkpoints': ( 'storage.html#partitionedeventstore.backfill_checkpoints',
+                                                                                                       'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.close': ( 'storage.html#partitionedeventstore.close',
+                                                                                        'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.compact': ( 'storage.html#partitionedeventstore.compact',
+                                                                                          'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.connection': ( 'storage.html#partitionedeventstore.connection',
+                                                                                             'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.coverage': ( 'storage.html#partitionedeventstore.coverage',
+                                                                                           'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.deleted': ( 'storage.html#partitionedeventstore.deleted',
+                                                                                          'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.enable_search': ( 'storage.html#partitionedeventstore.enable_search',
+                                                                                                'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.flush': ( 'storage.html#partitionedeventstore.flush',
+                                                                                        'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.has_event': ( 'storage.html#partitionedeventstore.has_event',
+                                                                                            'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.has_search': ( 'storage.html#partitionedeventstore.has_search',
+                                                                                             'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.pending': ( 'storage.html#partitionedeventstore.pending',
+                                                                                          'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.query': ( 'storage.html#partitionedeventstore.query',
+                                                                                        'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.recent_ids': ( 'storage.html#partitionedeventstore.recent_ids',
+                                                                                             'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.relay_counts': ( 'storage.html#partitionedeventstore.relay_counts',
+                                                                                               'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.repartition': ( 'storage.html#partitionedeventstore.repartition',
+                                                                                              'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.replaced': ( 'storage.html#partitionedeventstore.replaced',
+                                                                                           'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.save_backfill_checkpoint': ( 'storage.html#partitionedeventstore.save_backfill_checkpoint',
+                                                                                                           'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.schema_version': ( 'storage.html#partitionedeventstore.schema_version',
+                                                                                                 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.search': ( 'storage.html#partitionedeventstore.search',
+                                                                                         'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.seen_on': ( 'storage.html#partitionedeventstore.seen_on',
+                                                                                          'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.size': ( 'storage.html#partitionedeventstore.size',
+                                                                                       'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.PartitionedEventStore.uncovered': ( 'storage.html#partitionedeventstore.uncovered',
+                                                                                            'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.RetentionRule': ('storage.html#retentionrule', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.RetentionRule.__init__': ( 'storage.html#retentionrule.__init__',
+                                                                                   'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.RetentionRule.__repr__': ( 'storage.html#retentionrule.__repr__',
+                                                                                   'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.RetentionRule.expired': ( 'storage.html#retentionrule.expired',
+                                                                                  'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.RetentionRule.matches': ( 'storage.html#retentionrule.matches',
+                                                                                  'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._chunks': ('storage.html#_chunks', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._deletion_targets': ('storage.html#_deletion_targets', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._filter_conditions': ('storage.html#_filter_conditions', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._is_regular': ('storage.html#_is_regular', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._legacy_row': ('storage.html#_legacy_row', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._legacy_tags': ('storage.html#_legacy_tags', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._match_query': ('storage.html#_match_query', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._period_bounds': ('storage.html#_period_bounds', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._period_key': ('storage.html#_period_key', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._prefix_condition': ('storage.html#_prefix_condition', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._replaceable_key': ('storage.html#_replaceable_key', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._replaces': ('storage.html#_replaces', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._tag_rows': ('storage.html#_tag_rows', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._time_range': ('storage.html#_time_range', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage._union_filters': ('storage.html#_union_filters', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.compile_filter': ('storage.html#compile_filter', 'nostrfastr/storage.py'),
+                                    'nostrfastr.storage.coverage_key': ('storage.html#coverage_key', 'nostrfastr/storage.py')},
             'nostrfastr.vanity': { 'nostrfastr.vanity._average_char_by_time': ('vanity.html#_average_char_by_time', 'nostrfastr/vanity.py'),
                                    'nostrfastr.vanity._average_time_by_char': ('vanity.html#_average_time_by_char', 'nostrfastr/vanity.py'),
                                    'nostrfastr.vanity._expected_chars_by_time': ( 'vanity.html#_expected_chars_by_time',
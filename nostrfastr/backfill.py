@@ -0,0 +1,218 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/06_backfill.ipynb.
+
+# %% auto 0
+__all__ = ['Backfill']
+
+# %% ../nbs/06_backfill.ipynb 6
+import json
+import time
+import uuid
+import warnings
+import threading
+from typing import Callable, Union
+from nostr.filter import Filter, Filters
+from nostr.message_type import ClientMessageType
+from .client import Client
+from .nostr import FilterJson
+from .storage import coverage_key
+
+# %% ../nbs/06_backfill.ipynb 7
+class Backfill:
+    def __init__(self, client: Client, event_filter: Union[Filter, dict], since: int = 0,
+                 until: int = None, window: int = 86_400, limit: int = 500, min_window: int = 1,
+                 timeout: float = 10, max_retries: int = 3, name: str = None):
+        """fetch every event matching a filter from `since` to `until` from each
+        relay the client is connected to
+
+        Args:
+            client (Client): the client to fetch with. It has to be connected when
+                `run` is called.
+            event_filter (Filter | dict): events to fetch. Its `since`, `until` and
+                `limit` are replaced for each window.
+            since (int, optional): oldest unix time to fetch. Defaults to 0.
+            until (int, optional): newest unix time to fetch. Defaults to None, which is
+                the time the job was first created.
+            window (int, optional): seconds in the first window. Defaults to a day.
+            limit (int, optional): most events to request for a window. This should be no
+                more than the relays send for a request. Defaults to 500.
+            min_window (int, optional): windows aren't split below this many seconds.
+                Defaults to 1.
+            timeout (float, optional): seconds to wait for a relay to send a window.
+                Defaults to 10.
+            max_retries (int, optional): stop asking a relay once this many windows in a
+                row time out. Defaults to 3.
+            name (str, optional): name the checkpoints of the job are kept under. Defaults
+                to None, in which case it is made from the filter, `since` and `until`.
+        """
+        self.client = client
+        self.store = client.store
+        if isinstance(event_filter, Filter):
+            event_filter = event_filter.to_json_object()
+        self.filter_json = {key: value for key, value in event_filter.items()
+                            if key not in ('since', 'until', 'limit')}
+        self.window = window
+        self.limit = limit
+        self.min_window = min_window
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.name = name if name is not None else json.dumps([coverage_key(self.filter_json), since, until])
+        checkpoints = self.store.backfill_checkpoints(self.name)
+        if checkpoints:
+            since, until, _ = next(iter(checkpoints.values()))
+        self.since = since
+        self.until = int(time.time()) if until is None else until
+        self.cursors = {url: cursor for url, (_, _, cursor) in checkpoints.items()}
+        self.errors = {}
+        self.truncated = []
+        self.windows = 0
+        self.splits = 0
+        self.received = 0
+        self.stored = 0
+        self.started_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def __repr__(self):
+        return f'Backfill({self.name})'
+
+    def _fetch(self, url: str, since: int, until: int) -> tuple:
+        """request one window from one relay and buffer its new events in the store
+
+        Returns:
+            tuple: the number of events the relay sent and whether it sent all of them
+                before the timeout
+        """
+        relay_manager = self.client.relay_manager
+        message_pool = relay_manager.message_pool
+        subscription_id = f'backfill-{uuid.uuid4()}'
+        # NIP-01 includes events at `until` but some relays leave them out, so ask for a second more
+        filter_json = dict(self.filter_json, since=since, until=until + 1, limit=self.limit)
+        message_pool.add_subscription_queue(subscription_id)
+        relay_manager.add_subscription(subscription_id, Filters([FilterJson(filter_json)]), urls=[url])
+        relay_manager.publish_message(json.dumps([ClientMessageType.REQUEST, subscription_id, filter_json]),
+                                      urls=[url])
+        complete = relay_manager.wait_for_eose(subscription_id, urls=[url], timeout=self.timeout)
+        relay = relay_manager.relays.get(url)
+        complete = complete and relay is not None and relay.is_connected
+        if message_pool.verifier is not None:
+            message_pool.verifier.wait()
+        event_msgs = message_pool.get_events(subscription_id)
+        for event_msg in event_msgs:
+            self.client.insert_event_to_database(event_msg)
+        # duplicates of events we already hold are counted too, they still fill the limit.
+        # Read before closing, which folds the subscription's counts into the relay's totals
+        received = sum(message_pool.metrics.relays[url].subscriptions.get(subscription_id, ()))
+        relay_manager.close_subscription(subscription_id)
+        with self._lock:
+            self.received += received
+            self.stored += len(event_msgs)
+        return received, complete
+
+    def _backfill_relay(self, url: str):
+        with self._lock:
+            cursor = self.cursors.setdefault(url, self.until)
+        window, failures = self.window, 0
+        while cursor >= self.since and not self._stop.is_set():
+            start = max(self.since, cursor - window + 1)
+            received, complete = self._fetch(url, start, cursor)
+            if not complete:
+                failures += 1
+                relay = self.client.relay_manager.relays.get(url)
+                if failures > self.max_retries or relay is None or not relay.is_connected:
+                    with self._lock:
+                        self.errors[url] = f'gave up on {start} to {cursor} after {failures} tries'
+                    return
+                window = max(self.min_window, window // 2)
+                continue
+            failures = 0
+            if received >= self.limit and cursor - start + 1 > self.min_window:
+                window = max(self.min_window, (cursor - start + 1) // 2)
+                with self._lock:
+                    self.splits += 1
+                continue
+            if received >= self.limit:
+                warnings.warn(f'{url}: sent {received} events from {start} to {cursor} '
+                              f'with a {self.min_window} second window, some may be missing')
+                with self._lock:
+                    self.truncated.append((url, start, cursor))
+            cursor = start - 1
+            self.store.save_backfill_checkpoint(self.name, url, self.since, self.until, cursor)
+            with self._lock:
+                self.cursors[url] = cursor
+                self.windows += 1
+            if received < self.limit // 2:
+                window *= 2
+
+    def progress(self) -> dict:
+        """how far back each relay has got and the throughput so far
+
+        Returns:
+            dict: the `cursor` and `fraction_done` of each relay, the number of
+                `windows` finished, windows `split` for hitting the limit, events
+                `received` from relays and new events `stored`, `events_per_sec` and
+                relays that gave up with the reason as `errors`
+        """
+        elapsed = time.perf_counter() - self.started_at if self.started_at is not None else 0
+        span = self.until - self.since + 1
+        with self._lock:
+            relays = {url: {'cursor': cursor, 'fraction_done': min(1, (self.until - cursor) / span)}
+                      for url, cursor in self.cursors.items()}
+            return {
+                'relays': relays,
+                'fraction_done': (sum(relay['fraction_done'] for relay in relays.values()) / len(relays)
+                                  if relays else 0),
+                'windows': self.windows,
+                'splits': self.splits,
+                'received': self.received,
+                'stored': self.stored,
+                'seconds': elapsed,
+                'events_per_sec': self.received / elapsed if elapsed else None,
+                'errors': dict(self.errors)
+            }
+
+    def run(self, on_progress: Callable = None, interval: float = 5) -> dict:
+        """backfill from every connected relay at the same time and block until
+        each relay is done or has given up. Once every relay is done the store
+        records the filter as held from `since` to `until`, see `EventStore.add_coverage`.
+
+        Args:
+            on_progress (Callable, optional): called with `progress()` every `interval`
+                seconds and once more at the end. Defaults to None.
+            interval (float, optional): seconds between progress reports. Defaults to 5.
+
+        Returns:
+            dict: the final `progress()`
+        """
+        urls = [url for url, is_connected in self.client.relay_manager.connection_statuses.items()
+                if is_connected]
+        if not urls:
+            warnings.warn('no connected relays to backfill from')
+        self.started_at = time.perf_counter()
+        self._stop.clear()
+        threads = [threading.Thread(target=self._backfill_relay, args=(url,), daemon=True)
+                   for url in urls]
+        for thread in threads:
+            thread.start()
+        next_report = self.started_at + interval
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(.05)
+                if on_progress is not None and time.perf_counter() >= next_report:
+                    on_progress(self.progress())
+                    next_report += interval
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.store.flush()
+        if urls and self.is_done(urls) and not self.errors and not self.truncated:
+            self.store.add_coverage(self.filter_json, since=self.since, until=self.until)
+        progress = self.progress()
+        if on_progress is not None:
+            on_progress(progress)
+        return progress
+
+    def is_done(self, urls: list = None) -> bool:
+        """True once every relay, or each of `urls`, has been backfilled back to `since`"""
+        urls = list(self.cursors) if urls is None else urls
+        return all(self.cursors.get(url, self.until) < self.since for url in urls)
@@ -11,7 +11,6 @@ import os
 import pprint
 import sqlite3
 import appdirs
-import pandas as pd
 from pathlib import Path
 from nostr.message_type import ClientMessageType
 from nostr.message_pool import EventMessage,\
@@ -19,7 +18,9 @@ from nostr.message_pool import EventMessage,\
 from nostr.filter import Filter, Filters
 from nostr.event import Event, EventKind
 from .nostr import PrivateKey, PublicKey,\
-    RelayManager, MessagePool
+    RelayManager, AsyncRelayManager, MessagePool, EventVerifier, SQLiteDedup, StoreDedup, EventRecord, QueuePolicy, RelayScores,\
+    PublishFuture, FilterJson, SubscriptionMultiplexer, EventSigner
+from .storage import EventStore, PartitionedEventStore, RetentionRule, EVENT_COLUMNS
 
 from fastcore.utils import patch
 
@@ -27,7 +28,12 @@ from fastcore.utils import patch
 class Client:
     def __init__(self, public_key_hex: str = None, private_key_hex: str = None,
                  db_name: str = 'nostr-data', relay_urls: list = None, ssl_options: dict = {},
-                 first_response_only: bool = True):
+                 first_response_only: bool = True, use_asyncio: bool = False,
+                 dedup=None, verifier: EventVerifier = None, compact: bool = False,
+                 queue_size: int = 0, queue_policy: str = QueuePolicy.BLOCK,
+                 reconnect: bool = True, publish_window: int = 64, ack_timeout: float = 10,
+                 search: bool = False, archive: bool = False, partition: str = None,
+                 retention: list = None, verify: bool = True):
         """A basic framework for common operations that a nostr client will
         need to execute.
 
@@ -39,9 +45,47 @@ class Client:
                 Defaults to None, in which case a default list will be used.
             ssl_options (dict, optional): ssl options for websocket connection
                 Defaults to empty dict
-            allow_duplicates (bool, optional): whether or not to allow duplicate
-                event ids into the queue from multiple relays. This isn't fully
-                working yet. Defaults to False.
+            first_response_only (bool, optional): only keep track of the first relay
+                each event came from. Pass False to record every relay each event is
+                seen on, see `EventStore.relay_counts`. Each event is stored once
+                either way. Defaults to True.
+            use_asyncio (bool, optional): run every relay websocket on a single
+                asyncio event loop with `AsyncRelayManager` instead of one thread
+                per relay. Defaults to False.
+            dedup (optional): record of events already received, see `MessagePool`.
+                Defaults to None, in which case a `SQLiteDedup` checks the event
+                database, so startup doesn't load every stored id.
+            verifier (EventVerifier, optional): verify ids and signatures of incoming
+                events in batches before they are queued. Defaults to None, in which
+                case each new event is verified as it arrives.
+            compact (bool, optional): queue incoming events as compact `EventRecord`s
+                to keep memory down while a large backlog is buffered. Defaults to False.
+            queue_size (int, optional): most messages the message pool queues will hold
+                before `queue_policy` applies. Defaults to 0, which is unbounded.
+            queue_policy (str, optional): block the relay reader, drop the oldest or
+                drop the newest message when a queue is full, see `QueuePolicy`.
+                Defaults to `QueuePolicy.BLOCK`.
+            reconnect (bool, optional): reconnect to relays whose connection drops,
+                with exponential backoff, and replay subscriptions from the newest
+                event received from each relay. Defaults to True.
+            publish_window (int, optional): most published events each relay has
+                waiting on an `OK` before further events are held back. Defaults to 64.
+            ack_timeout (float, optional): seconds to wait for a relay to reply `OK`
+                to a published event. Defaults to 10.
+            search (bool, optional): keep a full text index of the content of stored
+                events for `search`. Defaults to False.
+            archive (bool, optional): keep replaced and deleted events in the
+                `archived_events` table instead of dropping them, see `EventStore`.
+                Defaults to False.
+            partition (str, optional): keep events in a database per 'day', 'month' or
+                'year' instead of a single file, see `PartitionedEventStore`. Defaults
+                to None.
+            retention (list, optional): `RetentionRule`s for a partitioned store, see
+                `apply_retention`. Defaults to None, which keeps every event.
+            verify (bool, optional): check ids and signatures of incoming events when
+                there is no `verifier`, and of deletions and replaceable events before
+                the store applies them. Only turn this off for relays you trust.
+                Defaults to True.
         """
         self.ssl_options = ssl_options
         self.first_response_only = first_response_only
@@ -52,7 +96,6 @@ class Client:
                 'wss://nostr-2.zebedee.cloud',
                 'wss://relay.damus.io',
                 'wss://brb.io',
-                'wss://nostr-2.zebedee.cloud',
                 'wss://rsslay.fiatjaf.com',
                 'wss://nostr-relay.wlvs.space',
                 'wss://nostr.orangepill.dev',
@@ -60,23 +103,25 @@ class Client:
             ]
         else:
             pass
-        self.relay_manager = RelayManager(first_response_only=self.first_response_only)
-        self.events_table_name = 'events'
-        self.events_table_indexes = ['id', 'url']
-        self.events_table_types = {
-            'id': 'char',
-            'pubkey': 'char',
-            'created_at': 'int',
-            'kind': 'int',
-            'tags': 'char',
-            'content': 'char',
-            'sig': 'char',
-            'subscription_id': 'char',
-            'url': 'char'
-        }
         self.db_location = Path(appdirs.user_data_dir('python-nostr'))
         self.db_name = db_name
-        self.init_db()
+        self.init_db(search=search, archive=archive, partition=partition, retention=retention, verify=verify)
+        if dedup is None:
+            dedup = SQLiteDedup(self.store.path) if partition is None else StoreDedup(self.store)
+        relay_manager_class = AsyncRelayManager if use_asyncio else RelayManager
+        self.relay_manager = relay_manager_class(first_response_only=self.first_response_only,
+                                                 dedup=dedup, verifier=verifier,
+                                                 compact=compact, queue_size=queue_size,
+                                                 queue_policy=queue_policy, reconnect=reconnect,
+                                                 publish_window=publish_window,
+                                                 ack_timeout=ack_timeout, verify=verify)
+        if not self.first_response_only:
+            self.relay_manager.message_pool.on_seen = self._on_seen
+        self.multiplexer = SubscriptionMultiplexer(self.relay_manager)
+        # windows asked for with `cache_first`, recorded once their events are written
+        self._pending_coverage: dict[str, tuple] = {}
+        self.signer = EventSigner()
+        self.relay_scores = RelayScores.load(self.relay_scores_path)
         self.set_relays(relay_urls=relay_urls)
         self.load_existing_event_ids()
 
@@ -121,18 +166,24 @@ class Client:
         return self.private_key
     
     @property
-    def db_conn(self):
-        self.db_location.mkdir(exist_ok=True)
-        return sqlite3.Connection(self.db_location / f'{self.db_name}.sqlite')
-    
-    def init_db(self):
-        table_columns = ', '.join([f'{col} {sql_type}' for col, sql_type
-                                   in self.events_table_types.items()])
-        with self.db_conn as con:
-            con.execute(f'CREATE TABLE IF NOT EXISTS {self.events_table_name} '
-                        f'({table_columns});')
-            for idx in self.events_table_indexes:
-                con.execute(f'CREATE INDEX IF NOT EXISTS {idx}_IDX ON {self.events_table_name}({idx});')
+    def relay_scores_path(self) -> Path:
+        return self.db_location / f'{self.db_name}-relay-scores.json'
+
+    @property
+    def db_conn(self) -> sqlite3.Connection:
+        """the connection to the event database, or the main database of a
+        partitioned store, which stays open for the life of the client
+        """
+        return self.store.connection
+
+    def init_db(self, search: bool = False, archive: bool = False, partition: str = None,
+                retention: list = None, verify: bool = True):
+        path = self.db_location / f'{self.db_name}.sqlite'
+        if partition is None:
+            self.store = EventStore(path, search=search, archive=archive, verify=verify)
+        else:
+            self.store = PartitionedEventStore(path, period=partition, rules=retention,
+                                               search=search, archive=archive, verify=verify)
         
     def set_relays(self, relay_urls: list = None):
         relays_to_add = set(relay_urls) - set(self.relay_manager.relays.keys())
@@ -145,16 +196,22 @@ class Client:
         if was_connected:
             self.relay_manager.open_connections()
 
-    def load_existing_event_ids(self):
-        ids = pd.read_sql(sql='select id, url from events',
-                          con=self.db_conn)
-        if self.first_response_only:
-            ids = ids['id']
-        else:
-            ids = ids['id'] + ':' + ids['url']
-        self.relay_manager.message_pool._unique_objects = set(ids.to_list())
+    def load_existing_event_ids(self, limit: int = 10_000):
+        """warm the message pool dedup with the ids of the newest stored events.
+        Only `limit` ids are read, so startup takes the same time however many
+        events are stored - older events are caught by the `SQLiteDedup` or
+        skipped by the store.
+
+        Args:
+            limit (int, optional): number of recent ids to load. Defaults to 10,000.
+        """
+        event_ids = self.store.recent_ids(limit)
+        self.relay_manager.message_pool.dedup.update(reversed(event_ids))
+
+    def _on_seen(self, event_id: str, url: str):
+        self.store.add_seen(event_id, url)
 
-# %% ../nbs/01_client.ipynb 16
+# %% ../nbs/01_client.ipynb 20
 @patch
 def __enter__(self: Client):
     """context manager to allow processing a connected client
@@ -184,42 +241,108 @@ def __exit__(self: Client, ex_type, ex_value, traceback):
     return False
 
 @patch
-def connect(self: Client) -> None:
-    self.relay_manager.open_connections(self.ssl_options)
+def connect(self: Client, timeout: float = None, quorum: int = None) -> None:
+    """open connections to all relays in parallel
+
+    Args:
+        timeout (float, optional): seconds each relay is given to connect
+            before it is removed. Defaults to None, in which case the relay
+            manager `connect_timeout` is used.
+        quorum (int, optional): return as soon as this many relays are
+            connected. Defaults to None, in which case every relay is waited on.
+    """
+    self.relay_manager.open_connections(self.ssl_options, timeout=timeout, quorum=quorum)
 
 @patch
 def disconnect(self: Client) -> None:
     self.relay_manager.close_connections()
+    self.store.flush()
+    self.update_relay_scores()
+
+@patch
+def update_relay_scores(self: Client) -> None:
+    """fold the relay metrics from this connection into `relay_scores` and
+    save them, so relays are scored across sessions
+    """
+    self.relay_scores.update(self.relay_manager.metrics_snapshot())
+    self.db_location.mkdir(exist_ok=True)
+    self.relay_scores.save(self.relay_scores_path)
 
 
-# %% ../nbs/01_client.ipynb 23
+# %% ../nbs/01_client.ipynb 27
 import uuid
 from typing import Union
 
-# %% ../nbs/01_client.ipynb 24
+# %% ../nbs/01_client.ipynb 28
 @patch
 def publish_subscription(self: Client, filters: Union[Filter, Filters],
-                         subscription_id: str = str(uuid.uuid4())) -> None:
+                         subscription_id: str = None, own_queue: bool = False,
+                         top_k: int = None, explore: float = .1, timeout: float = 1,
+                         cache_first: bool = False, max_age: float = 0) -> str:
     """publishes a request from a subscription id and a set of filters. Filters
     can be defined using the request_by_custom_filter method or from a list of
     preset filters (as of yet to be created):
 
     Args:
         request_filters (Filters): list of filters for a subscription
-        subscription_id (str): subscription id to be sent to relay. defaults
-            to a random guid
+        subscription_id (str, optional): subscription id to be sent to relay. Defaults
+            to None, in which case a new random guid is used for each call
+        own_queue (bool, optional): put events for this subscription on their own
+            queue, which `get_events_pool(subscription_id)` drains without waiting
+            behind other subscriptions. Defaults to False.
+        top_k (int, optional): only send the request to the `top_k` connected relays
+            with the best `relay_scores`. Defaults to None, in which case every relay
+            is sent the request.
+        explore (float, optional): fraction of the `top_k` relays picked at random
+            so relays without a good score yet get a chance to earn one. Defaults to .1.
+        timeout (float, optional): most seconds to wait for the relays to send their
+            stored events (`EOSE`) before returning. Defaults to 1.
+        cache_first (bool, optional): only request the windows of time the local store
+            doesn't already hold every event for. If every relay sends its stored events
+            in time, the windows are recorded as held by the `get_events_pool` call that
+            writes those events. Nothing is sent if the store has it all. Defaults to False.
+        max_age (float, optional): with `cache_first`, consider the store up to date
+            if it was last brought up to date this many seconds ago. Defaults to 0.
+
+    Returns:
+        str: the subscription id
     """
+    subscription_id = str(uuid.uuid4()) if subscription_id is None else subscription_id
     if isinstance(filters, Filter):
         filters = Filters([filters])
+    requested_at = int(time.time())
+    filters_json = filters.to_json_array()
+    if cache_first:
+        windows = [window for filter_json in filters_json
+                   for window in self.store.uncovered(filter_json, now=requested_at, max_age=max_age)]
+        if not windows:
+            return subscription_id
+        filters = Filters([FilterJson(window) for window in windows])
     request = [ClientMessageType.REQUEST, subscription_id]
     request.extend(filters.to_json_array())
     message = json.dumps(request)
+    if own_queue:
+        self.relay_manager.message_pool.add_subscription_queue(subscription_id)
+    urls = None
+    if top_k is not None:
+        connected = [url for url, is_connected
+                     in self.relay_manager.connection_statuses.items() if is_connected]
+        urls = self.relay_scores.select(connected, k=top_k, explore=explore)
     self.relay_manager.add_subscription(
-        subscription_id, filters
+        subscription_id, filters, urls=urls
         )
-    self.relay_manager.publish_message(message)
-    time.sleep(1)
+    self.relay_manager.publish_message(message, urls=urls)
+    asked = [url for url, relay in self.relay_manager.relays.items()
+             if relay.is_connected and subscription_id in relay.subscriptions]
+    has_eose = self.relay_manager.wait_for_eose(subscription_id, urls=urls, timeout=timeout)
+    if cache_first and asked and has_eose:
+        # an event can still be published in the second the request was sent
+        self._pending_coverage[subscription_id] = (
+            subscription_id if own_queue else None,
+            [(filter_json, filter_json.get('since') or 0, min(filter_json.get('until') or requested_at, requested_at - 1))
+             for filter_json in filters_json])
     self.get_notices_from_relay()
+    return subscription_id
 
 @patch
 def _notice_handler(self: Client, notice_msg: NoticeMessage):
@@ -238,55 +361,70 @@ def get_notices_from_relay(self: Client):
     """
     while self.relay_manager.message_pool.has_notices():
         notice_msg = self.relay_manager.message_pool.get_notice()
+        start = time.perf_counter()
         self._notice_handler(notice_msg=notice_msg)
+        self.relay_manager.message_pool.metrics.observe_handler(
+            '_notice_handler', time.perf_counter() - start)
 
 
-# %% ../nbs/01_client.ipynb 28
+# %% ../nbs/01_client.ipynb 32
 @patch
-def _event_handler(self: Client, event_msg: EventMessage) -> pd.DataFrame:
+def _event_handler(self: Client, event_msg: Union[EventMessage, EventRecord]) -> None:
     """a hidden method used to handle event outputs
     from a relay. This can be overwritten to store events
     to a db for example.
 
     Args:
-        event_msg (EventMessage): Event message returned from relay
+        event_msg (EventMessage | EventRecord): Event message returned from relay
     """
     self.insert_event_to_database(event_msg)
 
 @patch
-def get_events_pool(self: Client):
-    """calls the _event_handler method on all events from relays
+def get_events_pool(self: Client, subscription_id: str = None):
+    """calls the _event_handler method on all events from relays. Events
+    are taken from the queue in batches of the store `batch_size` and written
+    to the database in one commit per batch. Once they are written, the windows
+    `publish_subscription(cache_first=True)` asked for on this queue are recorded
+    as held.
+
+    Args:
+        subscription_id (str, optional): only handle events from this subscription's
+            own queue, see `publish_subscription`. Defaults to None, in which case
+            the shared events queue is handled.
     """
     self.events = []
-    while self.relay_manager.message_pool.has_events():
-        event_msg = self.relay_manager.message_pool.get_event()
-        self._event_handler(event_msg=event_msg)
+    message_pool = self.relay_manager.message_pool
+    pending = [pending_id for pending_id, (queue_id, _) in list(self._pending_coverage.items())
+               if queue_id == subscription_id]
+    coverage = [window for pending_id in pending for window in self._pending_coverage.pop(pending_id, (None, []))[1]]
+    if coverage and message_pool.verifier is not None:
+        message_pool.verifier.wait()
+    while True:
+        event_msgs = message_pool.get_events(subscription_id, max_events=self.store.batch_size)
+        if not event_msgs:
+            break
+        for event_msg in event_msgs:
+            start = time.perf_counter()
+            self._event_handler(event_msg=event_msg)
+            message_pool.metrics.observe_handler('_event_handler', time.perf_counter() - start)
+        self.store.flush()
+    for filter_json, since, until in coverage:
+        self.store.add_coverage(filter_json, since=since, until=until)
 
 @patch
-def insert_event_to_database(self: Client, event_msg: EventMessage):
-    table_column_names = ', '.join([col for col in self.events_table_types.keys()])
-    event_json = event_msg.event.to_json_object()
+def insert_event_to_database(self: Client, event_msg: Union[EventMessage, EventRecord]):
+    """buffer an event to be written to the database with the next
+    group commit of the store, see `EventStore`
+    """
+    if isinstance(event_msg, EventRecord):
+        event_json = event_msg.to_json_object()
+    else:
+        event_json = event_msg.event.to_json_object()
     event_json['subscription_id'] = event_msg.subscription_id
     event_json['url'] = event_msg.url
-    for col, sql_type in self.events_table_types.items():
-        if sql_type == 'char':
-            data = str(event_json[col]).replace('\'','\'\'') \
-                                  .replace('\"','\"\"')
-            event_json[col] = f'\"{data}\"'
-        else:
-            event_json[col] = str(event_json[col])
+    self.store.add(event_json)
 
-    table_values = ', '.join(
-        [event_json[col] for col in self.events_table_types.keys()]
-        )
-    sql = f'''
-        INSERT INTO {self.events_table_name} ({table_column_names})
-        VALUES ({table_values});
-        '''
-    with self.db_conn as con:
-        con.execute(sql)
-
-# %% ../nbs/01_client.ipynb 34
+# %% ../nbs/01_client.ipynb 38
 @patch
 def _eose_handler(self: Client, eose_msg: EndOfStoredEventsMessage):
     """a hidden method used to handle notice outputs
@@ -306,18 +444,333 @@ def get_eose_from_relay(self: Client):
     """
     while self.relay_manager.message_pool.has_eose_notices():
         eose_msg = self.relay_manager.message_pool.get_eose_notice()
+        start = time.perf_counter()
         self._eose_handler(eose_msg=eose_msg)
+        self.relay_manager.message_pool.metrics.observe_handler(
+            '_eose_handler', time.perf_counter() - start)
+
+
+# %% ../nbs/01_client.ipynb 40
+@patch
+def query_local(self: Client, filters: Union[Filter, Filters]) -> list:
+    """the stored events that match the filters, newest first, without
+    asking any relay
+
+    Args:
+        filters (Filter | Filters): filters to match
+
+    Returns:
+        list: matching `Event`s
+    """
+    if isinstance(filters, Filter):
+        filters = Filters([filters])
+    return [Event(e['pubkey'], e['content'], e['created_at'], e['kind'], e['tags'], e['id'], e['sig'])
+            for e in self.store.query(filters.to_json_array())]
 
+@patch
+def close_subscription(self: Client, subscription_id: str) -> None:
+    """ask the relays to close a subscription"""
+    self.relay_manager.close_subscription(subscription_id)
+
+@patch
+def query(self: Client, filters: Union[Filter, Filters], max_age: float = 0,
+          timeout: float = 1, top_k: int = None) -> list:
+    """answer filters from the local store after asking the relays for only the
+    part of each filter the store doesn't hold yet. When the client isn't
+    connected the store is used as it is.
+
+    Args:
+        filters (Filter | Filters): filters to match
+        max_age (float, optional): don't ask relays for a filter that was brought up
+            to date this many seconds ago. Defaults to 0.
+        timeout (float, optional): most seconds to wait for the relays. Defaults to 1.
+        top_k (int, optional): only ask the `top_k` best scored relays, see
+            `publish_subscription`. Defaults to None.
 
-# %% ../nbs/01_client.ipynb 36
+    Returns:
+        list: matching `Event`s, newest first
+    """
+    if self.relay_manager._is_connected:
+        subscription_id = str(uuid.uuid4())
+        self.publish_subscription(filters, subscription_id=subscription_id, own_queue=True,
+                                  top_k=top_k, timeout=timeout, cache_first=True, max_age=max_age)
+        self.get_events_pool(subscription_id)
+        self.close_subscription(subscription_id)
+    return self.query_local(filters)
+
+# %% ../nbs/01_client.ipynb 46
 @patch
-def publish_event(self: Client, event: Event) -> None:
-    """publish an event and immediately checks for a notice
-    from the relay in case of an invalid event
+def events_dataframe(self: Client, filters: Union[Filter, Filters] = None, chunksize: int = 10_000):
+    """the stored events that match the filters as pandas dataframes of at
+    most `chunksize` rows, newest first
 
     Args:
-        event (Event): _description_
+        filters (Filter | Filters, optional): filters to match. Defaults to None,
+            which matches every stored event.
+        chunksize (int, optional): most rows in each dataframe. Defaults to 10,000.
+
+    Yields:
+        pandas.DataFrame: the next chunk of events
+    """
+    try:
+        import pandas as pd
+    except ImportError as e:
+        raise ImportError('events_dataframe needs pandas, install it with `pip install pandas`') from e
+    if isinstance(filters, Filter):
+        filters = Filters([filters])
+    filters_json = filters.to_json_array() if filters is not None else None
+    for events in self.store.iter_events(filters_json, chunksize=chunksize):
+        yield pd.DataFrame(events, columns=EVENT_COLUMNS)
+
+@patch
+def export_events(self: Client, directory: Union[str, Path], filters: Union[Filter, Filters] = None,
+                  format: str = 'parquet', chunksize: int = 100_000) -> int:
+    """write the stored events that match the filters to a Parquet or Arrow IPC
+    dataset partitioned by date and kind, see `EventStore.export_dataset`
+
+    Returns:
+        int: number of events exported
     """
+    if isinstance(filters, Filter):
+        filters = Filters([filters])
+    filters_json = filters.to_json_array() if filters is not None else None
+    return self.store.export_dataset(directory, filters=filters_json, format=format, chunksize=chunksize)
+
+# %% ../nbs/01_client.ipynb 50
+@patch
+def search(self: Client, text: str, filters: Union[Filter, Filters] = None, limit: int = 100,
+           raw: bool = False, rank: bool = True) -> list:
+    """the stored events whose content has every word of the text, best match first
+
+    Args:
+        text (str): words to search for
+        filters (Filter | Filters, optional): only return events that match one of
+            these filters. Defaults to None.
+        limit (int, optional): most events to return. Defaults to 100.
+        raw (bool, optional): use the FTS5 query syntax, see `EventStore.search`.
+            Defaults to False.
+        rank (bool, optional): order by bm25 rank instead of the most recently stored
+            first, see `EventStore.search`. Defaults to True.
+
+    Returns:
+        list: matching `Event`s
+    """
+    if isinstance(filters, Filter):
+        filters = Filters([filters])
+    filters_json = filters.to_json_array() if filters is not None else None
+    return [Event(e['pubkey'], e['content'], e['created_at'], e['kind'], e['tags'], e['id'], e['sig'])
+            for e in self.store.search(text, filters=filters_json, limit=limit, raw=raw, rank=rank)]
+
+# %% ../nbs/01_client.ipynb 53
+@patch
+def compact(self: Client, vacuum: bool = True) -> dict:
+    """drop replaced and deleted events that are already stored and shrink the database
+
+    Args:
+        vacuum (bool, optional): rebuild the database file so it shrinks. Defaults to True.
+
+    Returns:
+        dict: number of events replaced and deleted, and the size in bytes before and after
+    """
+    return self.store.compact(vacuum=vacuum)
+
+# %% ../nbs/01_client.ipynb 57
+@patch
+def relay_counts(self: Client, filters: Union[Filter, Filters] = None) -> dict:
+    """the number of stored events seen on each relay, and how many of them
+    were seen on no other relay
+
+    Args:
+        filters (Filter | Filters, optional): only count events that match one of
+            these filters. Defaults to None.
+
+    Returns:
+        dict: {'events': count, 'only_here': count} by relay url
+    """
+    if isinstance(filters, Filter):
+        filters = Filters([filters])
+    return self.store.relay_counts(filters.to_json_array() if filters is not None else None)
+
+# %% ../nbs/01_client.ipynb 61
+@patch
+def apply_retention(self: Client, now: int = None) -> dict:
+    """drop the partitions that are past the age of their retention rule, see
+    `PartitionedEventStore.apply_retention`
+
+    Args:
+        now (int, optional): current unix time. Defaults to None, which uses the clock.
+
+    Returns:
+        dict: number of partitions and bytes dropped
+    """
+    if not isinstance(self.store, PartitionedEventStore):
+        raise RuntimeError('retention needs a partitioned store, create the client with `partition`')
+    return self.store.apply_retention(now=now)
+
+# %% ../nbs/01_client.ipynb 65
+import asyncio
+from queue import Empty
+
+@patch
+def _open_stream(self: Client, filters: Union[Filter, Filters], subscription_id: str,
+                 top_k: int, explore: float) -> str:
+    return self.publish_subscription(filters, subscription_id=subscription_id, own_queue=True,
+                                     top_k=top_k, explore=explore, timeout=0)
+
+@patch
+def _stream_done(self: Client, subscription_id: str, until_eose: bool, deadline: float) -> bool:
+    if deadline is not None and time.perf_counter() >= deadline:
+        return True
+    if not until_eose or not self.relay_manager.has_eose(subscription_id):
+        return False
+    verifier = self.relay_manager.message_pool.verifier
+    if verifier is not None:
+        verifier.wait()
+    return not self.relay_manager.message_pool.has_events(subscription_id)
+
+@patch
+def _stored_stream(self: Client, filters: Union[Filter, Filters], subscription_id: str):
+    """the stored events that match a stream's filters, newest first, as event
+    messages of the stream"""
+    if isinstance(filters, Filter):
+        filters = Filters([filters])
+    compact = self.relay_manager.message_pool.compact
+    self.store.flush()
+    for chunk in self.store.iter_events(filters.to_json_array()):
+        for e in chunk:
+            if compact:
+                yield EventRecord.from_json(e, subscription_id, e['url'] or '')
+            else:
+                event = Event(e['pubkey'], e['content'], e['created_at'], e['kind'], e['tags'], e['id'], e['sig'])
+                yield EventMessage(event, subscription_id, e['url'])
+
+def _event_id(event_msg: Union[EventMessage, EventRecord]) -> str:
+    return getattr(event_msg, 'event_id', None) or event_msg.event.id
+
+@patch
+def _close_stream(self: Client, subscription_id: str, store: bool):
+    self.close_subscription(subscription_id)
+    if store:
+        self.store.flush()
+
+@patch
+def stream(self: Client, filters: Union[Filter, Filters], timeout: float = 10,
+           until_eose: bool = True, subscription_id: str = None, store: bool = True,
+           top_k: int = None, explore: float = .1, stored: bool = True):
+    """publish a subscription and yield its events as they arrive
+
+    The message pool drops the events the database already holds as duplicates,
+    so the matching stored events are yielded first, then the ones that arrive.
+
+    Args:
+        filters (Filter | Filters): filters for the subscription
+        timeout (float, optional): most seconds to stream for. Defaults to 10.
+            Pass None to stream until the caller stops.
+        until_eose (bool, optional): stop once every relay has sent all of its stored
+            events. Defaults to True.
+        subscription_id (str, optional): subscription id. Defaults to None, in which
+            case a random id is used.
+        store (bool, optional): write each event to the database as it is yielded.
+            Defaults to True.
+        top_k (int, optional): only ask the `top_k` best scored relays, see
+            `publish_subscription`. Defaults to None.
+        explore (float, optional): see `publish_subscription`. Defaults to .1.
+        stored (bool, optional): yield the matching events already in the database
+            first. Defaults to True.
+
+    Yields:
+        EventMessage | EventRecord: each event from the subscription
+    """
+    subscription_id = self._open_stream(filters, subscription_id, top_k, explore)
+    queue = self.relay_manager.message_pool._event_queue(subscription_id)
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    stored_ids = set()
+    try:
+        for event_msg in (self._stored_stream(filters, subscription_id) if stored else ()):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            stored_ids.add(_event_id(event_msg))
+            yield event_msg
+        while not self._stream_done(subscription_id, until_eose, deadline):
+            try:
+                event_msg = queue.get(timeout=.01)
+            except Empty:
+                continue
+            if stored_ids and _event_id(event_msg) in stored_ids:
+                continue
+            if store:
+                self.insert_event_to_database(event_msg)
+            yield event_msg
+    finally:
+        self._close_stream(subscription_id, store)
+
+@patch
+async def astream(self: Client, filters: Union[Filter, Filters], timeout: float = 10,
+                  until_eose: bool = True, subscription_id: str = None, store: bool = True,
+                  top_k: int = None, explore: float = .1, stored: bool = True):
+    """`stream` as an async iterator that waits on the event loop instead of
+    blocking it
+
+    Yields:
+        EventMessage | EventRecord: each event from the subscription
+    """
+    subscription_id = self._open_stream(filters, subscription_id, top_k, explore)
+    queue = self.relay_manager.message_pool._event_queue(subscription_id)
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    stored_ids = set()
+    try:
+        for event_msg in (self._stored_stream(filters, subscription_id) if stored else ()):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            stored_ids.add(_event_id(event_msg))
+            yield event_msg
+        while not self._stream_done(subscription_id, until_eose, deadline):
+            try:
+                event_msg = queue.get_nowait()
+            except Empty:
+                await asyncio.sleep(.01)
+                continue
+            if stored_ids and _event_id(event_msg) in stored_ids:
+                continue
+            if store:
+                self.insert_event_to_database(event_msg)
+            yield event_msg
+    finally:
+        self._close_stream(subscription_id, store)
+
+# %% ../nbs/01_client.ipynb 70
+@patch
+def subscribe(self: Client, filters: Union[Filter, Filters], subscription_id: str = None,
+              timeout: float = 1) -> str:
+    """subscribe through shared requests and route the matching events to the
+    subscription's own queue
+
+    Args:
+        filters (Filter | Filters): filters for the subscription
+        subscription_id (str, optional): subscription id. Defaults to None, in which
+            case a new random id is used.
+        timeout (float, optional): most seconds to wait for the relays to send their
+            stored events. Defaults to 1.
+
+    Returns:
+        str: the subscription id
+    """
+    if isinstance(filters, Filter):
+        filters = Filters([filters])
+    subscription_id = str(uuid.uuid4()) if subscription_id is None else subscription_id
+    self.relay_manager.message_pool.add_subscription_queue(subscription_id)
+    self.multiplexer.subscribe(filters, subscription_id=subscription_id)
+    self.multiplexer.wait_for_eose(subscription_id, timeout=timeout)
+    return subscription_id
+
+@patch
+def unsubscribe(self: Client, subscription_id: str) -> None:
+    """stop a subscription made with `subscribe`"""
+    self.multiplexer.unsubscribe(subscription_id)
+
+# %% ../nbs/01_client.ipynb 74
+@patch
+def _sign_event(self: Client, event: Event) -> Event:
     if self.private_key is None:
         self.private_key = self._request_private_key_hex()
     if not isinstance(event.created_at, int):
@@ -325,10 +778,87 @@ def publish_event(self: Client, event: Event) -> None:
     self.check_event_pubkey(event)
     event.sign(self.private_key.hex())
     assert event.verify()
-    message = json.dumps([ClientMessageType.EVENT, event.to_json_object()])
-    self.relay_manager.publish_message(message)
-    time.sleep(1)
+    return event
+
+@patch
+def publish_event(self: Client, event: Event, min_acks: int = 1, wait: bool = False,
+                  timeout: float = None) -> PublishFuture:
+    """sign and publish an event without waiting on the relays. Relays reply `OK`
+    to say whether they accepted it (NIP-20), which the returned future collects.
+    Relays without NIP-20 never reply, so waiting on them takes the client `ack_timeout`.
+
+    Args:
+        event (Event): the event to publish
+        min_acks (int, optional): number of relays that have to accept the event.
+            Defaults to 1. Pass None to wait for every relay.
+        wait (bool, optional): block until `min_acks` relays accepted the event, every
+            relay replied or the relays timed out, and warn if none of them accepted
+            it. Defaults to False.
+        timeout (float, optional): most seconds to wait. Defaults to None, in which
+            case relays that don't reply time out after the client `ack_timeout`.
+
+    Returns:
+        PublishFuture: resolves to the `OkMessage` from each relay by url
+    """
+    self._sign_event(event)
+    future = self.relay_manager.publish_event(event, min_acks=min_acks)
+    if wait:
+        acks = future.result(timeout)
+        if acks and not future.accepted:
+            warnings.warn(f'no relay accepted event {event.id}:\n\t' +
+                          '\n\t'.join(f'{url}: {ok.message}' for url, ok in acks.items()))
+    self.get_notices_from_relay()
+    return future
+
+@patch
+def sign_events(self: Client, events: list, verify: bool = False) -> list:
+    """compute the ids and signatures of many events in parallel with the
+    client `signer`, see `EventSigner`
+
+    Args:
+        events (list): events to sign, all with the client public key
+        verify (bool, optional): check each signature after signing. Defaults to False.
+
+    Returns:
+        list: the signed events
+    """
+    if self.private_key is None:
+        self.private_key = self._request_private_key_hex()
+    return list(self.signer.sign(self.private_key, events, verify=verify))
+
+@patch
+def publish_events(self: Client, events: list, min_acks: int = 1,
+                   timeout: float = None, sign: bool = True, verify: bool = False) -> dict:
+    """sign and publish many events at once. Each event is sent as soon as the
+    client `signer` has signed it, without waiting on the others, up to the client
+    `publish_window` per relay, and the replies are collected at the end.
+
+    Args:
+        events (list): events to publish
+        min_acks (int, optional): number of relays that have to accept each event.
+            Defaults to 1. Pass None to wait for every relay.
+        timeout (float, optional): most seconds to wait for all of the events.
+            Defaults to None.
+        sign (bool, optional): sign the events first. Pass False to send events that
+            are already signed, such as events from other accounts being rebroadcast.
+            Defaults to True.
+        verify (bool, optional): check each signature after signing. Defaults to False.
+
+    Returns:
+        dict: the `OkMessage` from each relay by url, by event id
+    """
+    if sign:
+        if self.private_key is None:
+            self.private_key = self._request_private_key_hex()
+        events = self.signer.sign(self.private_key, events, verify=verify)
+    futures = [self.relay_manager.publish_event(event, min_acks=min_acks) for event in events]
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    results = {}
+    for future in futures:
+        remaining = None if deadline is None else max(0, deadline - time.perf_counter())
+        results[future.event_id] = future.result(remaining)
     self.get_notices_from_relay()
+    return results
 
 @patch
 def check_event_pubkey(self: Client, event: Event):
@@ -341,7 +871,7 @@ def check_event_pubkey(self: Client, event: Event):
     else:
         pass
 
-# %% ../nbs/01_client.ipynb 42
+# %% ../nbs/01_client.ipynb 82
 @patch
 def filter_events_by_id(self: Client, ids: Union[str,list]) -> Filter:
     """build a filter from event ids
@@ -507,3 +1037,32 @@ def event_encrypted_message(self: Client, recipient_hex: str, message: str) -> E
                   created_at=int(time.time()))
     return event
 
+
+# %% ../nbs/01_client.ipynb 86
+@patch
+def decrypt_messages(self: Client, events: list, parallel: bool = False) -> dict:
+    """decrypt many encrypted direct messages sent to or by the client account
+
+    Args:
+        events (list): `Event`s. Events that aren't encrypted direct messages are skipped.
+        parallel (bool, optional): decrypt on the pool of the client `signer`, which is
+            started once and kept for the life of the client. Defaults to False, which
+            decrypts in this thread.
+
+    Returns:
+        dict: each message by event id, or None where it could not be decrypted
+    """
+    if self.private_key is None:
+        self.private_key = self._request_private_key_hex()
+    own_public_key = self.private_key.public_key.hex()
+    messages, event_ids = [], []
+    for event in events:
+        if event.kind != EventKind.ENCRYPTED_DIRECT_MESSAGE:
+            continue
+        counterparty = event.public_key
+        if counterparty == own_public_key:
+            counterparty = next((tag[1] for tag in event.tags if len(tag) >= 2 and tag[0] == 'p'), '')
+        messages.append((event.content, counterparty))
+        event_ids.append(event.id)
+    executor = self.signer.executor if parallel and messages else None
+    return dict(zip(event_ids, self.private_key.decrypt_messages(messages, executor=executor)))
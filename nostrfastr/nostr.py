@@ -1,25 +1,109 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/00_nostr_core.ipynb.
 
 # %% auto 0
-__all__ = ['PrivateKey', 'PublicKey', 'MessagePool', 'Connection', 'Relay', 'RelayManager']
+__all__ = ['PrivateKey', 'PublicKey', 'LRUDedup', 'BloomDedup', 'SQLiteDedup', 'StoreDedup', 'LazyEventMessage', 'EventRecord',
+           'EventVerifier', 'EventSigner', 'QueuePolicy', 'BoundedQueue', 'Histogram', 'RelayMetrics', 'Metrics',
+           'prometheus_text', 'OkMessage', 'PublishFuture', 'Publisher', 'MessagePool', 'FilterJson', 'match_filter',
+           'Backoff', 'Connection', 'Relay', 'RelayManager', 'RelayScores', 'MergedFilter', 'SubscriptionMultiplexer',
+           'AsyncRelay', 'AsyncRelayManager']
 
 # %% ../nbs/00_nostr_core.ipynb 7
 from nostr import key
 from nostr import bech32
 import secp256k1
+import base64
+from collections import OrderedDict
+from threading import Lock
+from typing import Union
+from concurrent.futures import Executor
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from fastcore.utils import patch
 
 # %% ../nbs/00_nostr_core.ipynb 8
+def _decrypt_with_secret(shared_secret: bytes, encoded_message: str) -> str:
+    """decrypt NIP-04 content with an already computed shared secret"""
+    encoded_content, encoded_iv = encoded_message.split('?iv=')
+    cipher = Cipher(algorithms.AES(shared_secret), modes.CBC(base64.b64decode(encoded_iv)))
+    decryptor = cipher.decryptor()
+    padded = decryptor.update(base64.b64decode(encoded_content)) + decryptor.finalize()
+    unpadder = padding.PKCS7(128).unpadder()
+    return (unpadder.update(padded) + unpadder.finalize()).decode()
+
+
+def _try_decrypt(shared_secret: bytes, encoded_message: str) -> Union[str, None]:
+    """`_decrypt_with_secret`, or None if the message can't be decrypted. A plain
+    function so it can be sent to a process pool.
+    """
+    if shared_secret is None:
+        return None
+    try:
+        return _decrypt_with_secret(shared_secret, encoded_message)
+    except ValueError:
+        return None
+
+
 class PrivateKey(key.PrivateKey):
     """a class to manage private keys inherited from
     python-nostr.key.PrivateKey, with a from_hex() class method added
     """
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, shared_secret_cache_size: int = 1_024, **kwargs):
         """create a private key from raw bytes
+
+        Args:
+            shared_secret_cache_size (int, optional): number of counterparties to keep
+                the ECDH shared secret for, dropping the least recently used. Defaults
+                to 1,024.
         """
         super().__init__(*args, **kwargs)
         sk = secp256k1.PrivateKey(self.raw_secret)
         self.public_key = PublicKey(sk.pubkey.serialize()[1:])
+        self.shared_secret_cache_size = shared_secret_cache_size
+        self._shared_secrets: OrderedDict = OrderedDict()
+        self._shared_secrets_lock = Lock()
+
+    def compute_shared_secret(self, public_key_hex: str) -> bytes:
+        """the ECDH shared secret with a counterparty. It is the same for every
+        message between the two keys, so it is computed once and cached.
+        """
+        with self._shared_secrets_lock:
+            shared_secret = self._shared_secrets.get(public_key_hex)
+            if shared_secret is not None:
+                self._shared_secrets.move_to_end(public_key_hex)
+                return shared_secret
+        shared_secret = super().compute_shared_secret(public_key_hex)
+        with self._shared_secrets_lock:
+            self._shared_secrets[public_key_hex] = shared_secret
+            if len(self._shared_secrets) > self.shared_secret_cache_size:
+                self._shared_secrets.popitem(last=False)
+        return shared_secret
+
+    def decrypt_message(self, encoded_message: str, public_key_hex: str) -> str:
+        return _decrypt_with_secret(self.compute_shared_secret(public_key_hex), encoded_message)
+
+    def decrypt_messages(self, messages: list, executor: Executor = None) -> list:
+        """decrypt many NIP-04 messages, computing the shared secret once per
+        counterparty
+
+        Args:
+            messages (list): (encoded message, counterparty public key hex) pairs
+            executor (Executor, optional): pool to decrypt on. Defaults to None, which
+                decrypts in this thread.
+
+        Returns:
+            list: each message, or None where it could not be decrypted
+        """
+        secrets = []
+        for _, public_key_hex in messages:
+            try:
+                secrets.append(self.compute_shared_secret(public_key_hex))
+            except Exception:
+                secrets.append(None)
+        encoded = [encoded_message for encoded_message, _ in messages]
+        if executor is None:
+            return list(map(_try_decrypt, secrets, encoded))
+        return list(executor.map(_try_decrypt, secrets, encoded,
+                                 chunksize=max(1, min(256, len(encoded) // 16))))
 
     def __repr__(self):
         pubkey = self.public_key.bech32()
@@ -48,14 +132,14 @@ class PublicKey(key.PublicKey):
     def from_hex(cls, hex: str) -> 'PrivateKey':
         return cls(bytes.fromhex(hex))
 
-# %% ../nbs/00_nostr_core.ipynb 43
+# %% ../nbs/00_nostr_core.ipynb 47
 import json
 import time
 import warnings
 import threading
 from threading import Lock
 from typing import Union
-from queue import Queue
+from queue import Queue, Empty
 from nostr import message_pool
 from nostr import relay, relay_manager
 from nostr.relay import RelayPolicy
@@ -63,34 +147,1461 @@ from nostr.message_pool import EventMessage, NoticeMessage, EndOfStoredEventsMes
 from nostr.message_type import RelayMessageType
 from nostr.event import Event
 
-# %% ../nbs/00_nostr_core.ipynb 45
+# %% ../nbs/00_nostr_core.ipynb 49
+import math
+import sqlite3
+from pathlib import Path
+from collections import OrderedDict
+
+# %% ../nbs/00_nostr_core.ipynb 50
+class LRUDedup:
+    def __init__(self, max_size: int = 100_000):
+        """an exact record of the `max_size` most recently seen keys
+
+        Args:
+            max_size (int, optional): number of keys to remember. Defaults to 100,000.
+        """
+        self.max_size = max_size
+        self._keys: OrderedDict = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str) -> None:
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+
+    def update(self, keys) -> None:
+        for key in keys:
+            self.add(key)
+
+    def clear(self) -> None:
+        self._keys.clear()
+
+
+class BloomDedup:
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = .001):
+        """a probabilistic record of seen keys with a fixed memory budget.
+
+        Keys are added to the current generation of the filter. Once it holds
+        `capacity` keys it becomes the previous generation and a new one is
+        started, so memory stays at two filters no matter how many keys are
+        added and the false positive rate never drifts above `error_rate`.
+
+        Args:
+            capacity (int, optional): keys per generation. Defaults to 10,000,000.
+            error_rate (float, optional): false positive rate. Defaults to .001.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self._current = bytearray(self.n_bits // 8 + 1)
+        self._previous = None
+        self._count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._current) * (1 if self._previous is None else 2)
+
+    def _positions(self, key: str) -> list:
+        # python caches the hash of a str on the object so this is nearly free.
+        # hashes are salted per process, which is fine for an in memory filter
+        h1 = hash(key)
+        h2 = hash((h1, key)) | 1
+        n_bits = self.n_bits
+        return [(h1 + i * h2) % n_bits for i in range(self.n_hashes)]
+
+    @staticmethod
+    def _check(bits: bytearray, positions: list) -> bool:
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def __contains__(self, key: str) -> bool:
+        positions = self._positions(key)
+        if self._check(self._current, positions):
+            return True
+        return self._previous is not None and self._check(self._previous, positions)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, key: str) -> None:
+        if self._count and self._count % self.capacity == 0:
+            self._previous = self._current
+            self._current = bytearray(len(self._previous))
+        for p in self._positions(key):
+            self._current[p >> 3] |= 1 << (p & 7)
+        self._count += 1
+
+    def update(self, keys) -> None:
+        for key in keys:
+            self.add(key)
+
+    def clear(self) -> None:
+        self._current = bytearray(len(self._current))
+        self._previous = None
+        self._count = 0
+
+
+class SQLiteDedup:
+    def __init__(self, db_path: Union[str, Path], table: str = 'events',
+                 recent: int = 10_000):
+        """an exact record of seen event ids backed by the indexed `id` column
+        of a sqlite table, so memory doesn't grow with history.
+
+        A `LRUDedup` of `recent` keys sits in front of the database to catch
+        events that are queued but not stored yet. Each thread looks ids up on a
+        connection of its own, so `contains` is safe to call from any thread and the
+        `MessagePool` checks it without holding its own lock.
+
+        Args:
+            db_path (str | Path): path to the sqlite database
+            table (str, optional): table that events are stored in. Defaults to 'events'.
+            recent (int, optional): size of the in memory window. Defaults to 10,000.
+        """
+        self.db_path = db_path
+        self.table = table
+        self.recent = LRUDedup(max_size=recent)
+        self._readers = threading.local()
+        self._lock = Lock()
+
+    @property
+    def _con(self) -> sqlite3.Connection:
+        """the calling thread's own connection to the database"""
+        con = getattr(self._readers, 'con', None)
+        if con is None:
+            con = self._readers.con = sqlite3.connect(self.db_path, check_same_thread=False)
+        return con
+
+    def __contains__(self, key: str) -> bool:
+        return self.contains(key)
+
+    def contains(self, key: str, created_at: int = None) -> bool:
+        """True if the event was seen recently or is stored. `created_at` isn't
+        needed with a single table and is only taken for the `MessagePool`."""
+        with self._lock:
+            if key in self.recent:
+                return True
+        return self._con.execute(f'SELECT 1 FROM {self.table} WHERE id = ? LIMIT 1',
+                                 (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._con.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            self.recent.add(key)
+
+    def update(self, keys) -> None:
+        with self._lock:
+            self.recent.update(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.recent.clear()
+
+
+class StoreDedup:
+    def __init__(self, store, recent: int = 10_000):
+        """an exact record of seen event ids checked with the `has_event` of an
+        event store, for stores that span several databases like a
+        `PartitionedEventStore`.
+
+        A `LRUDedup` of `recent` keys sits in front of the store to catch
+        events that are queued but not stored yet. `contains` is safe to call from
+        any thread, so the `MessagePool` checks it without holding its own lock.
+
+        Args:
+            store: the event store
+            recent (int, optional): size of the in memory window. Defaults to 10,000.
+        """
+        self.store = store
+        self.recent = LRUDedup(max_size=recent)
+        self._lock = Lock()
+
+    def __contains__(self, key: str) -> bool:
+        return self.contains(key)
+
+    def contains(self, key: str, created_at: int = None) -> bool:
+        """True if the event was seen recently or is stored. Given the event's
+        `created_at` the store only looks in the partitions of its period."""
+        with self._lock:
+            if key in self.recent:
+                return True
+        return self.store.has_event(key, created_at)
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            self.recent.add(key)
+
+    def update(self, keys) -> None:
+        with self._lock:
+            self.recent.update(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.recent.clear()
+
+# %% ../nbs/00_nostr_core.ipynb 51
+import re
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+_EVENT_FRAME = re.compile(r'\s*\[\s*"EVENT"\s*,\s*"([^"\\]*)"\s*,\s*\{')
+_EVENT_ID = re.compile(r'"id"\s*:\s*"([0-9a-f]{64})"')
+_EVENT_CREATED_AT = re.compile(r'"created_at"\s*:\s*(\d+)')
+
+
+def _is_valid_frame(message: str) -> bool:
+    message = message.strip()
+    return bool(message) and message[0] == '[' and message[-1] == ']'
+
+
+def _peek_event_frame(message: str) -> Union[tuple, None]:
+    """pull the subscription id and event id out of a raw `EVENT` frame
+    without decoding it. Quotes inside json strings are always escaped, so
+    an unescaped `"id":` can only be the key of the event object.
+
+    Returns:
+        tuple | None: (subscription_id, event_id), or None if the frame is not
+            an `EVENT` frame in the expected shape and needs a full parse
+    """
+    frame = _EVENT_FRAME.match(message)
+    if frame is None:
+        return None
+    event_id = _EVENT_ID.search(message, frame.end())
+    if event_id is None:
+        return None
+    return frame.group(1), event_id.group(1)
+
+
+class LazyEventMessage(EventMessage):
+    def __init__(self, message: str, subscription_id: str, url: str, event_id: str,
+                 event_json: dict = None):
+        """an `EventMessage` that keeps the raw frame from the relay and only
+        decodes it into an `Event` the first time `event` is accessed. If the frame
+        was already decoded, to check the event's signature or filters, pass its
+        `event_json` to keep instead so it isn't decoded twice.
+        """
+        self.message = message if event_json is None else None
+        self.subscription_id = subscription_id
+        self.url = url
+        self.event_id = event_id
+        self._json = event_json
+        self._event = None
+
+    def _decoded(self) -> dict:
+        return self._json if self._json is not None else _json_loads(self.message)[2]
+
+    @property
+    def event(self) -> Event:
+        if self._event is None:
+            e = self._decoded()
+            self._event = Event(e['pubkey'], e['content'], e['created_at'], e['kind'], e['tags'], e['id'], e['sig'])
+            self.message = self._json = None
+        return self._event
+
+
+def _is_wanted_frame(message: str, subscriptions: dict) -> bool:
+    """a cheap stand in for `Relay._is_valid_message` that checks the frame
+    and subscription id without decoding the frame, leaving the full parse,
+    the signature check and the filter match of new events to the `MessagePool`
+    """
+    if not _is_valid_frame(message):
+        return False
+    peeked = _peek_event_frame(message)
+    return peeked is None or peeked[0] in subscriptions
+
+# %% ../nbs/00_nostr_core.ipynb 52
+import sys
+
+_HEX_64 = re.compile(r'[0-9a-f]{64}')
+
+
+def _pack_tag(tag: list) -> tuple:
+    return tuple(bytes.fromhex(value) if isinstance(value, str) and _HEX_64.fullmatch(value)
+                 else value for value in tag)
+
+
+def _unpack_tag(tag: tuple) -> list:
+    return [value.hex() if isinstance(value, bytes) else value for value in tag]
+
+
+class EventRecord:
+    __slots__ = ('id', 'pubkey', 'sig', 'created_at', 'kind', 'tags', 'content',
+                 'subscription_id', 'url')
+
+    def __init__(self, id: bytes, pubkey: bytes, sig: bytes, created_at: int, kind: int,
+                 tags: tuple, content: str, subscription_id: str, url: str):
+        """a compact stand in for an `EventMessage` used when many events are
+        buffered at once. Ids, public keys and signatures are kept as raw bytes
+        rather than hex strings, tags as tuples with any hex ids or keys in them
+        packed to bytes as well, and the subscription id and relay url are
+        interned so every record from a subscription shares them.
+
+        It has the same `event`, `subscription_id` and `url` attributes as an
+        `EventMessage`, but `event` builds a new `Event` on every access, so
+        read what you need with `to_json_object` where you can.
+        """
+        self.id = id
+        self.pubkey = pubkey
+        self.sig = sig
+        self.created_at = created_at
+        self.kind = kind
+        self.tags = tags
+        self.content = content
+        self.subscription_id = sys.intern(subscription_id)
+        self.url = sys.intern(url)
+
+    @classmethod
+    def from_json(cls, e: dict, subscription_id: str, url: str) -> 'EventRecord':
+        return cls(bytes.fromhex(e['id']), bytes.fromhex(e['pubkey']), bytes.fromhex(e['sig']),
+                   e['created_at'], e['kind'], tuple(_pack_tag(tag) for tag in e['tags']),
+                   e['content'], subscription_id, url)
+
+    @classmethod
+    def from_event_message(cls, event_msg: EventMessage) -> 'EventRecord':
+        event = event_msg.event
+        return cls(bytes.fromhex(event.id), bytes.fromhex(event.public_key),
+                   bytes.fromhex(event.signature), event.created_at, event.kind,
+                   tuple(_pack_tag(tag) for tag in event.tags), event.content,
+                   event_msg.subscription_id, event_msg.url)
+
+    def __repr__(self):
+        return f'EventRecord(id={self.event_id}, url={self.url})'
+
+    @property
+    def event_id(self) -> str:
+        return self.id.hex()
+
+    @property
+    def event(self) -> Event:
+        return Event(self.pubkey.hex(), self.content, self.created_at, self.kind,
+                     [_unpack_tag(tag) for tag in self.tags], self.id.hex(), self.sig.hex())
+
+    def to_json_object(self) -> dict:
+        return {
+            'id': self.id.hex(),
+            'pubkey': self.pubkey.hex(),
+            'created_at': self.created_at,
+            'kind': self.kind,
+            'tags': [_unpack_tag(tag) for tag in self.tags],
+            'content': self.content,
+            'sig': self.sig.hex()
+        }
+
+# %% ../nbs/00_nostr_core.ipynb 53
+from concurrent.futures import BrokenExecutor, Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+# %% ../nbs/00_nostr_core.ipynb 54
+def _verify_event(event_tuple: tuple) -> bool:
+    """check that an event id is the hash of its content and that the
+    signature is valid for the id. Takes a plain tuple so it can be sent
+    to a process pool.
+    """
+    event_id, public_key, created_at, kind, tags, content, signature = event_tuple
+    try:
+        if Event.compute_id(public_key, created_at, kind, tags, content) != event_id:
+            return False
+        pub_key = secp256k1.PublicKey(bytes.fromhex('02' + public_key), True)
+        return pub_key.schnorr_verify(bytes.fromhex(event_id), bytes.fromhex(signature),
+                                      None, raw=True)
+    except Exception:
+        return False
+
+
+def _event_tuple(event: Event) -> tuple:
+    return (event.id, event.public_key, event.created_at, event.kind,
+            event.tags, event.content, event.signature)
+
+
+class EventVerifier:
+    def __init__(self, workers: int = None, processes: bool = False,
+                 batch_size: int = 256, cache_size: int = 100_000):
+        """verifies event ids and signatures in batches on a pool of workers.
+
+        `secp256k1` releases the GIL while it checks a signature, so the default
+        thread pool verifies on several cores. Use `processes=True` to verify in a
+        process pool instead. Valid results are cached by id and signature so an
+        event seen on several relays only has its signature checked once - the
+        cheap id hash is still checked on every copy so a tampered copy of a
+        cached event is still rejected.
+
+        Args:
+            workers (int, optional): number of workers. Defaults to None, which
+                lets the executor pick based on the number of cores.
+            processes (bool, optional): use a process pool instead of a thread pool.
+                Defaults to False.
+            batch_size (int, optional): most events to verify in one batch. Defaults to 256.
+            cache_size (int, optional): number of valid events to remember. Defaults to 100,000.
+        """
+        self.workers = workers
+        self.processes = processes
+        self.batch_size = batch_size
+        self.cache = LRUDedup(max_size=cache_size)
+        self.verified = 0
+        self.rejected = 0
+        self.cached = 0
+        self._executor: Executor = None
+        self._inbox: Queue = Queue()
+        self._thread = None
+        self._on_verified = None
+        self._lock = Lock()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            executor_class = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+            self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    @property
+    def stats(self) -> dict:
+        return {'verified': self.verified, 'rejected': self.rejected, 'cached': self.cached}
+
+    def verify(self, events: list) -> list:
+        """verify a batch of events
+
+        Args:
+            events (list): `Event` objects to verify
+
+        Returns:
+            list: a bool for each event, True if the event is valid
+        """
+        results = [None] * len(events)
+        to_check, copies = {}, []
+        cached = 0
+        for i, event in enumerate(events):
+            key = f'{event.id}:{event.signature}'
+            if key in self.cache:
+                copies.append((i, None))
+            elif key in to_check:
+                copies.append((i, to_check[key]))
+            else:
+                to_check[key] = i
+        to_check = list(to_check.values())
+        payloads = [_event_tuple(events[i]) for i in to_check]
+        chunksize = max(1, len(payloads) // (4 * (self.workers or 4)))
+        for i, valid in zip(to_check, self.executor.map(_verify_event, payloads, chunksize=chunksize)):
+            results[i] = valid
+            if valid:
+                self.cache.add(f'{events[i].id}:{events[i].signature}')
+        for i, original in copies:
+            event = events[i]
+            if original is None or results[original]:
+                results[i] = Event.compute_id(event.public_key, event.created_at, event.kind,
+                                              event.tags, event.content) == event.id
+                cached += results[i]
+            else:
+                # the first copy in the batch was tampered with, so this one needs a full check
+                results[i] = _verify_event(_event_tuple(event))
+                to_check.append(i)
+                if results[i]:
+                    self.cache.add(f'{event.id}:{event.signature}')
+        with self._lock:
+            self.verified += sum(results[i] for i in to_check)
+            self.cached += cached
+            self.rejected += results.count(False)
+        return results
+
+    def _verify_each(self, events: list) -> list:
+        """verify events one at a time in this thread, for a batch `verify` failed
+        on. Events that can't be checked at all are rejected."""
+        results = []
+        for event in events:
+            try:
+                results.append(_verify_event(_event_tuple(event)))
+            except Exception:
+                results.append(False)
+        with self._lock:
+            self.verified += results.count(True)
+            self.rejected += results.count(False)
+        return results
+
+    def start(self, on_verified):
+        """start verifying submitted event messages in the background
+
+        Args:
+            on_verified (callable): called with each event message that verifies
+        """
+        self._on_verified = on_verified
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='nostr-event-verifier',
+                                            daemon=True)
+            self._thread.start()
+
+    def submit(self, event_msg: EventMessage):
+        self._inbox.put(event_msg)
+
+    def wait(self):
+        """block until every submitted event message has been verified"""
+        self._inbox.join()
+
+    def _run(self):
+        while True:
+            batch = [self._inbox.get()]
+            while len(batch) < self.batch_size and not self._inbox.empty():
+                batch.append(self._inbox.get_nowait())
+            try:
+                decoded = []
+                for event_msg in batch:
+                    try:
+                        decoded.append((event_msg, event_msg.event))
+                    except Exception:
+                        with self._lock:
+                            self.rejected += 1
+                events = [event for _, event in decoded]
+                try:
+                    results = self.verify(events)
+                except Exception as e:
+                    # a malformed event or a broken pool mustn't stop the thread, or
+                    # every later event is never delivered and `wait` blocks forever
+                    if isinstance(e, BrokenExecutor):
+                        self._executor = None
+                    results = self._verify_each(events)
+                for (event_msg, _), valid in zip(decoded, results):
+                    if valid:
+                        try:
+                            self._on_verified(event_msg)
+                        except Exception as e:
+                            warnings.warn(f'could not deliver a verified event: {e!r}')
+            finally:
+                for _ in batch:
+                    self._inbox.task_done()
+
+# %% ../nbs/00_nostr_core.ipynb 55
+import functools
+
+_SIGNING_KEYS = {}
+
+
+def _sign_payload(secret: bytes, verify: bool, payload: tuple) -> tuple:
+    """compute the id of an event and sign it. Takes the secret and a plain tuple
+    so it can be sent to a process pool, and keeps one `secp256k1` key per process
+    since creating its context costs more than signing.
+    """
+    public_key, created_at, kind, tags, content = payload
+    signing_key = _SIGNING_KEYS.get(secret)
+    if signing_key is None:
+        signing_key = _SIGNING_KEYS[secret] = secp256k1.PrivateKey(secret)
+    event_id = Event.compute_id(public_key, created_at, kind, tags, content)
+    signature = signing_key.schnorr_sign(bytes.fromhex(event_id), None, raw=True)
+    if verify and not signing_key.pubkey.schnorr_verify(bytes.fromhex(event_id), signature, None, raw=True):
+        raise ValueError(f'signature for {event_id} did not verify')
+    return event_id, signature.hex()
+
+
+class EventSigner:
+    def __init__(self, workers: int = None, processes: bool = True):
+        """computes event ids and signatures on a pool of workers, for signing
+        many events at once.
+
+        Args:
+            workers (int, optional): number of workers. Defaults to None, which
+                lets the executor pick based on the number of cores.
+            processes (bool, optional): sign in a process pool. Defaults to True.
+                Pass False for a thread pool.
+        """
+        self.workers = workers
+        self.processes = processes
+        self.signed = 0
+        self._executor: Executor = None
+        self._lock = Lock()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            executor_class = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+            self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    def sign(self, private_key: PrivateKey, events: list, verify: bool = False):
+        """set the id and signature of each event. Events are yielded in order as
+        they are signed, so they can be sent while the rest are still being signed.
+
+        Args:
+            private_key (PrivateKey): key to sign with. Every event must have its
+                public key.
+            events (list): `Event` objects to sign
+            verify (bool, optional): check each signature after signing. Defaults to False.
+
+        Yields:
+            Event: each event once it is signed
+        """
+        payloads = []
+        for event in events:
+            if event.public_key != private_key.public_key.hex():
+                raise ValueError(f'event public key {event.public_key} does not match the private key')
+            event.created_at = int(event.created_at)
+            payloads.append((event.public_key, event.created_at, event.kind, event.tags, event.content))
+        chunksize = max(1, min(256, len(payloads) // (4 * (self.workers or 4))))
+        signed = self.executor.map(functools.partial(_sign_payload, private_key.raw_secret, verify),
+                                   payloads, chunksize=chunksize)
+        for event, (event_id, signature) in zip(events, signed):
+            event.id, event.signature = event_id, signature
+            with self._lock:
+                self.signed += 1
+            yield event
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+# %% ../nbs/00_nostr_core.ipynb 56
+class QueuePolicy:
+    BLOCK = 'block'
+    DROP_OLDEST = 'drop_oldest'
+    DROP_NEWEST = 'drop_newest'
+
+
+class BoundedQueue(Queue):
+    def __init__(self, maxsize: int = 0, policy: str = QueuePolicy.BLOCK):
+        """a `Queue` with an explicit policy for when it is full
+
+         - `QueuePolicy.BLOCK` - `put` waits for room, which holds up the relay
+           reader that is putting and pushes back on the relay. With an
+           `AsyncRelayManager` this holds up every relay on the event loop.
+         - `QueuePolicy.DROP_OLDEST` - the oldest item is dropped to make room
+         - `QueuePolicy.DROP_NEWEST` - the new item is dropped
+
+        Args:
+            maxsize (int, optional): most items to hold. Defaults to 0, which is unbounded.
+            policy (str, optional): what to do when full. Defaults to `QueuePolicy.BLOCK`.
+        """
+        if policy not in (QueuePolicy.BLOCK, QueuePolicy.DROP_OLDEST, QueuePolicy.DROP_NEWEST):
+            raise ValueError(f'unknown queue policy: {policy}')
+        super().__init__(maxsize=maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self.blocked = 0
+
+    @property
+    def stats(self) -> dict:
+        return {'size': self.qsize(), 'maxsize': self.maxsize, 'policy': self.policy,
+                'dropped': self.dropped, 'blocked': self.blocked}
+
+    def put(self, item, block: bool = True, timeout: float = None):
+        if self.policy == QueuePolicy.BLOCK:
+            if self.full():
+                self.blocked += 1
+            return super().put(item, block, timeout)
+        with self.not_full:
+            if 0 < self.maxsize <= self._qsize():
+                self.dropped += 1
+                if self.policy == QueuePolicy.DROP_NEWEST:
+                    return
+                self._get()
+                self.unfinished_tasks -= 1
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+# %% ../nbs/00_nostr_core.ipynb 57
+from bisect import bisect_left
+from collections import defaultdict
+
+class Histogram:
+    buckets = (.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5,
+               1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, buckets: tuple = None):
+        """a fixed bucket histogram of durations in seconds, in the style
+        of a Prometheus histogram
+
+        Args:
+            buckets (tuple, optional): upper bounds of the buckets. Defaults to
+                None, in which case `Histogram.buckets` are used.
+        """
+        if buckets is not None:
+            self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Union[float, None]:
+        """the upper bound of the bucket holding the `q` quantile"""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+    def snapshot(self) -> dict:
+        cumulative, seen = {}, 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            seen += count
+            cumulative[bound] = seen
+        return {'count': self.count, 'sum': self.sum,
+                'mean': self.sum / self.count if self.count else None,
+                'p50': self.quantile(.5), 'p90': self.quantile(.9), 'p99': self.quantile(.99),
+                'buckets': cumulative}
+
+
+class RelayMetrics:
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.notices = 0
+        self.errors = 0
+        self.subscriptions: dict[str, list] = {}
+        # new and duplicate events of subscriptions that have been closed
+        self.closed = [0, 0]
+        self.first_frame_at = None
+        self.parse_seconds = Histogram()
+        self.first_event_seconds = Histogram()
+        self.eose_seconds = Histogram()
+
+    def snapshot(self, now: float) -> dict:
+        elapsed = now - self.first_frame_at if self.first_frame_at is not None else 0
+        counts = [self.closed, *self.subscriptions.values()]
+        events = sum(new for new, _ in counts)
+        duplicates = sum(duplicate for _, duplicate in counts)
+        received = events + duplicates
+        return {
+            'frames': self.frames,
+            'bytes': self.bytes,
+            'events': events,
+            'duplicates': duplicates,
+            'duplicate_pct': 100 * duplicates / received if received else None,
+            'notices': self.notices,
+            'errors': self.errors,
+            'frames_per_sec': self.frames / elapsed if elapsed else None,
+            'bytes_per_sec': self.bytes / elapsed if elapsed else None,
+            'parse_seconds': self.parse_seconds.snapshot(),
+            'first_event_seconds': self.first_event_seconds.snapshot(),
+            'eose_seconds': self.eose_seconds.snapshot()
+        }
+
+
+class Metrics:
+    def __init__(self):
+        """counters and histograms for a `MessagePool` and the relays feeding it.
+
+        Counters are kept per relay and only updated from the relay's own reader,
+        so recording a frame doesn't take a lock. Subscription totals are summed
+        across relays when a snapshot is taken. Only open subscriptions are kept,
+        the counts of closed ones are added to the relay totals.
+        """
+        self.relays: dict[str, RelayMetrics] = defaultdict(RelayMetrics)
+        self.handlers: dict[str, Histogram] = defaultdict(Histogram)
+        self._requested_at: dict[str, float] = {}
+
+    def observe_frame(self, url: str, size: int, parse_seconds: float) -> None:
+        relay = self.relays[url]
+        if relay.first_frame_at is None:
+            relay.first_frame_at = time.perf_counter() - parse_seconds
+        relay.frames += 1
+        relay.bytes += size
+        relay.parse_seconds.observe(parse_seconds)
+
+    def observe_request(self, subscription_id: str) -> None:
+        self._requested_at[subscription_id] = time.perf_counter()
+
+    def observe_event(self, url: str, subscription_id: str, is_new: bool) -> None:
+        relay = self.relays[url]
+        counts = relay.subscriptions.get(subscription_id)
+        if counts is None:
+            counts = relay.subscriptions[subscription_id] = [0, 0]
+            requested_at = self._requested_at.get(subscription_id)
+            if requested_at is not None:
+                relay.first_event_seconds.observe(time.perf_counter() - requested_at)
+        counts[not is_new] += 1
+
+    def close_subscription(self, subscription_id: str) -> None:
+        """stop tracking a subscription, keeping its events in the relay totals"""
+        self._requested_at.pop(subscription_id, None)
+        for relay in list(self.relays.values()):
+            counts = relay.subscriptions.pop(subscription_id, None)
+            if counts is not None:
+                relay.closed[0] += counts[0]
+                relay.closed[1] += counts[1]
+
+    def observe_eose(self, url: str, subscription_id: str) -> None:
+        requested_at = self._requested_at.get(subscription_id)
+        if requested_at is not None:
+            self.relays[url].eose_seconds.observe(time.perf_counter() - requested_at)
+
+    def observe_notice(self, url: str) -> None:
+        self.relays[url].notices += 1
+
+    def observe_error(self, url: str) -> None:
+        self.relays[url].errors += 1
+
+    def observe_handler(self, name: str, seconds: float) -> None:
+        self.handlers[name].observe(seconds)
+
+    def snapshot(self) -> dict:
+        now = time.perf_counter()
+        subscriptions = defaultdict(lambda: {'events': 0, 'duplicates': 0})
+        for relay in list(self.relays.values()):
+            for subscription_id, (events, duplicates) in list(relay.subscriptions.items()):
+                subscriptions[subscription_id]['events'] += events
+                subscriptions[subscription_id]['duplicates'] += duplicates
+        return {
+            'relays': {url: relay.snapshot(now) for url, relay in list(self.relays.items())},
+            'subscriptions': dict(subscriptions),
+            'handlers': {name: histogram.snapshot() for name, histogram
+                         in list(self.handlers.items())}
+        }
+
+
+def _prometheus_labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _prometheus_histogram(lines: list, name: str, histogram: dict, **labels) -> None:
+    for bound, count in histogram['buckets'].items():
+        le = '+Inf' if bound == math.inf else repr(bound)
+        lines.append(f'{name}_bucket{_prometheus_labels(**labels, le=le)} {count}')
+    lines.append(f'{name}_sum{_prometheus_labels(**labels)} {histogram["sum"]}')
+    lines.append(f'{name}_count{_prometheus_labels(**labels)} {histogram["count"]}')
+
+
+def prometheus_text(snapshot: dict) -> str:
+    """format a metrics snapshot from `RelayManager.metrics_snapshot`
+    in the Prometheus text exposition format
+    """
+    lines = []
+    counters = {'frames': 'received frames', 'bytes': 'received bytes',
+                'events': 'new events', 'duplicates': 'duplicate events',
+                'notices': 'notices', 'errors': 'connection errors', 'reconnects': 'reconnects'}
+    for counter, description in counters.items():
+        lines += [f'# HELP nostr_relay_{counter}_total {description} by relay',
+                  f'# TYPE nostr_relay_{counter}_total counter']
+        for url, relay in snapshot['relays'].items():
+            if counter in relay:
+                lines.append(f'nostr_relay_{counter}_total{_prometheus_labels(relay=url)} {relay[counter]}')
+    lines += ['# HELP nostr_relay_connected whether the relay is connected',
+              '# TYPE nostr_relay_connected gauge']
+    for url, relay in snapshot['relays'].items():
+        if 'connected' in relay:
+            lines.append(f'nostr_relay_connected{_prometheus_labels(relay=url)} {int(relay["connected"])}')
+    histograms = {'parse_seconds': 'seconds to process a frame',
+                  'first_event_seconds': 'seconds from request to first event',
+                  'eose_seconds': 'seconds from request to end of stored events'}
+    for histogram, description in histograms.items():
+        lines += [f'# HELP nostr_relay_{histogram} {description} by relay',
+                  f'# TYPE nostr_relay_{histogram} histogram']
+        for url, relay in snapshot['relays'].items():
+            if histogram in relay:
+                _prometheus_histogram(lines, f'nostr_relay_{histogram}', relay[histogram], relay=url)
+    for counter in ('events', 'duplicates'):
+        lines += [f'# HELP nostr_subscription_{counter}_total {counters[counter]} by subscription',
+                  f'# TYPE nostr_subscription_{counter}_total counter']
+        for subscription_id, counts in snapshot['subscriptions'].items():
+            lines.append(f'nostr_subscription_{counter}_total'
+                         f'{_prometheus_labels(subscription=subscription_id)} {counts[counter]}')
+    lines += ['# HELP nostr_handler_seconds seconds spent in a handler',
+              '# TYPE nostr_handler_seconds histogram']
+    for name, histogram in snapshot['handlers'].items():
+        _prometheus_histogram(lines, 'nostr_handler_seconds', histogram, handler=name)
+    queues = snapshot.get('queues', {})
+    named_queues = {name: stats for name, stats in queues.items() if name != 'subscriptions'}
+    named_queues.update({f'subscription:{subscription_id}': stats for subscription_id, stats
+                         in queues.get('subscriptions', {}).items()})
+    lines += ['# HELP nostr_queue_depth messages waiting in a queue', '# TYPE nostr_queue_depth gauge']
+    lines += [f'nostr_queue_depth{_prometheus_labels(queue=name)} {stats["size"]}'
+              for name, stats in named_queues.items()]
+    lines += ['# HELP nostr_queue_dropped_total messages dropped by a full queue',
+              '# TYPE nostr_queue_dropped_total counter']
+    lines += [f'nostr_queue_dropped_total{_prometheus_labels(queue=name)} {stats["dropped"]}'
+              for name, stats in named_queues.items()]
+    return '\n'.join(lines) + '\n'
+
+# %% ../nbs/00_nostr_core.ipynb 58
+from collections import deque
+from concurrent.futures import Future
+
+class OkMessage:
+    def __init__(self, event_id: str, accepted: bool, message: str, url: str):
+        """a NIP-20 `["OK", event_id, accepted, message]` reply from a relay
+        to an event we published
+        """
+        self.event_id = event_id
+        self.accepted = accepted
+        self.message = message
+        self.url = url
+
+    def __repr__(self):
+        return f'OkMessage({self.url!r}, accepted={self.accepted}, message={self.message!r})'
+
+
+class PublishFuture(Future):
+    def __init__(self, event_id: str, urls: list, min_acks: int = None):
+        """a future for an event published to several relays. It resolves to a
+        dict of the `OkMessage` from each relay that replied once `min_acks`
+        relays accepted the event, or once every relay has replied (or timed
+        out), or once so many relays rejected it that `min_acks` can't be reached.
+
+        Args:
+            event_id (str): id of the published event
+            urls (list): relays the event was sent to
+            min_acks (int, optional): number of relays that have to accept the
+                event. Defaults to None, which waits for every relay.
+        """
+        super().__init__()
+        self.event_id = event_id
+        self.urls = urls
+        self.min_acks = len(urls) if min_acks is None else min(min_acks, len(urls))
+        self.acks: dict[str, OkMessage] = {}
+        self._resolved = False
+
+    @property
+    def accepted(self) -> list:
+        """urls of the relays that accepted the event so far"""
+        return [url for url, ok in self.acks.items() if ok.accepted]
+
+    @property
+    def is_complete(self) -> bool:
+        """True once every relay has replied or timed out"""
+        return len(self.acks) == len(self.urls)
+
+    def _ack(self, ok: OkMessage) -> bool:
+        """record a reply and return True the first time the future
+        has enough replies to resolve
+        """
+        self.acks[ok.url] = ok
+        if self._resolved:
+            return False
+        accepted = len(self.accepted)
+        rejected = len(self.acks) - accepted
+        self._resolved = (accepted >= self.min_acks or self.is_complete
+                          or rejected > len(self.urls) - self.min_acks)
+        return self._resolved
+
+
+class Publisher:
+    def __init__(self, relay_manager: 'RelayManager', window: int = 64,
+                 ack_timeout: float = 10):
+        """publishes events without blocking and tracks the NIP-20 `OK` replies
+        from each relay.
+
+        Each relay has at most `window` events waiting on an `OK` at a time. Further
+        events are held back and sent as replies come in, so a slow relay is not
+        flooded and doesn't hold up the faster ones. A relay that doesn't reply
+        within `ack_timeout` seconds is recorded as rejecting the event, which also
+        frees its slot, so relays that don't support NIP-20 still drain.
+
+        Args:
+            relay_manager (RelayManager): manager whose relays events are sent to
+            window (int, optional): most events each relay has waiting on an `OK`.
+                Defaults to 64.
+            ack_timeout (float, optional): seconds to wait for an `OK` from a relay.
+                Defaults to 10.
+        """
+        self.relay_manager = relay_manager
+        self.window = window
+        self.ack_timeout = ack_timeout
+        self.futures: dict[str, PublishFuture] = {}
+        self.in_flight: dict[str, dict[str, float]] = defaultdict(dict)
+        self.pending: dict[str, deque] = defaultdict(deque)
+        self.lock = Lock()
+        self._expiry_thread = None
+
+    def publish(self, event_id: str, message: str, min_acks: int = None,
+                urls: list = None) -> PublishFuture:
+        """send an `EVENT` message to every relay we can write to without
+        waiting for the replies
+
+        Args:
+            event_id (str): id of the event in the message
+            message (str): the `EVENT` message
+            min_acks (int, optional): number of relays that have to accept the event
+                before the future resolves. Defaults to None, which waits for every relay.
+            urls (list, optional): only send to these relays. Defaults to None, in which
+                case every relay is sent the message.
+
+        Returns:
+            PublishFuture: resolves to the `OkMessage` from each relay by url
+        """
+        targets = [url for url, relay in list(self.relay_manager.relays.items())
+                   if relay.policy.should_write and (urls is None or url in urls)]
+        with self.lock:
+            future = self.futures.get(event_id)
+            if future is not None:
+                return future
+            future = PublishFuture(event_id, targets, min_acks)
+            if not targets:
+                future._resolved = True
+            else:
+                self.futures[event_id] = future
+                for url in targets:
+                    self.pending[url].append((event_id, message))
+            sends = self._fill_windows(targets)
+            self._start_expiry()
+        if not targets:
+            future.set_result({})
+        self._send(sends)
+        return future
+
+    def on_ok(self, ok: OkMessage):
+        """record an `OK` reply and send the next events held back for the relay"""
+        with self.lock:
+            if self.in_flight[ok.url].pop(ok.event_id, None) is None:
+                return
+            resolved = self._ack(ok)
+            sends = self._fill_windows([ok.url])
+        self._resolve(resolved)
+        self._send(sends)
+
+    def _ack(self, ok: OkMessage) -> list:
+        future = self.futures.get(ok.event_id)
+        if future is None:
+            return []
+        resolved = [future] if future._ack(ok) else []
+        if future.is_complete:
+            self.futures.pop(ok.event_id)
+        return resolved
+
+    def _resolve(self, futures: list):
+        for future in futures:
+            future.set_result(dict(future.acks))
+
+    def _fill_windows(self, urls: list) -> list:
+        sends = []
+        now = time.perf_counter()
+        for url in urls:
+            in_flight, pending = self.in_flight[url], self.pending[url]
+            while pending and len(in_flight) < self.window:
+                event_id, message = pending.popleft()
+                in_flight[event_id] = now
+                sends.append((url, event_id, message))
+        return sends
+
+    def _send(self, sends: list):
+        for url, event_id, message in sends:
+            relay = self.relay_manager.relays.get(url)
+            try:
+                relay.publish(message)
+            except Exception as e:
+                self.on_ok(OkMessage(event_id, False, f'error: {e}', url))
+
+    def expire(self):
+        """record relays that haven't replied within `ack_timeout` as
+        rejecting the event
+        """
+        deadline = time.perf_counter() - self.ack_timeout
+        resolved, sends = [], []
+        with self.lock:
+            for url, in_flight in self.in_flight.items():
+                expired = [event_id for event_id, sent_at in in_flight.items() if sent_at < deadline]
+                for event_id in expired:
+                    in_flight.pop(event_id)
+                    resolved += self._ack(OkMessage(event_id, False, 'timeout: no OK from relay', url))
+                if expired:
+                    sends += self._fill_windows([url])
+        self._resolve(resolved)
+        self._send(sends)
+
+    @property
+    def in_flight_count(self) -> int:
+        """number of events still waiting to be sent or waiting on an `OK`"""
+        return sum(map(len, self.in_flight.values())) + sum(map(len, self.pending.values()))
+
+    def _start_expiry(self):
+        if self._expiry_thread is None or not self._expiry_thread.is_alive():
+            self._expiry_thread = threading.Thread(target=self._run_expiry,
+                                                   name='nostr-publish-expiry', daemon=True)
+            self._expiry_thread.start()
+
+    def _run_expiry(self):
+        while True:
+            time.sleep(min(1, self.ack_timeout / 4))
+            self.expire()
+            with self.lock:
+                if not self.futures and not self.in_flight_count:
+                    self._expiry_thread = None
+                    return
+
+# %% ../nbs/00_nostr_core.ipynb 59
 class MessagePool(relay_manager.MessagePool):
-    def __init__(self, first_response_only: bool = True):
+    def __init__(self, first_response_only: bool = True, dedup=None,
+                 verifier: 'EventVerifier' = None, compact: bool = False,
+                 queue_size: int = 0, queue_policy: str = QueuePolicy.BLOCK,
+                 verify: bool = True):
+        """a queue of messages from all relays
+
+        Args:
+            first_response_only (bool, optional): only keep track of the first copy of
+                an event. Otherwise copies from other relays are passed to `on_seen`
+                with the relay url, so where each event was seen can be recorded
+                without queueing the event again. Either way each event is only
+                queued once. Defaults to True.
+            dedup (optional): record of the events already queued. Anything with
+                `__contains__`, `add` and `update` works, like `LRUDedup`,
+                `BloomDedup`, `SQLiteDedup` or a `set`. Defaults to None, in which
+                case a `LRUDedup` is used.
+            verifier (EventVerifier, optional): verify the id and signature of new
+                events in batches before they reach `events`. Defaults to None, in
+                which case new events are verified as they arrive.
+            compact (bool, optional): decode new events straight into an `EventRecord`,
+                which takes far less memory while events are buffered. Defaults to
+                False, in which case events are queued as a `LazyEventMessage`.
+            queue_size (int, optional): most messages each of `events`, `notices` and
+                `eose_notices` will hold. Defaults to 0, which is unbounded.
+            queue_policy (str, optional): what to do with a message when its queue is
+                full, see `BoundedQueue`. Defaults to `QueuePolicy.BLOCK`.
+            verify (bool, optional): check the id and signature of new events when
+                there is no `verifier`. Defaults to True. Only turn this off for relays
+                you trust, since forged events are then queued as they are.
+        """
         self.first_response_only = first_response_only
-        self.events: Queue[EventMessage] = Queue()
-        self.notices: Queue[NoticeMessage] = Queue()
-        self.eose_notices: Queue[EndOfStoredEventsMessage] = Queue()
-        self._unique_objects: set = set()
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self.events: BoundedQueue[EventMessage] = BoundedQueue(queue_size, queue_policy)
+        self.notices: BoundedQueue[NoticeMessage] = BoundedQueue(queue_size, queue_policy)
+        self.eose_notices: BoundedQueue[EndOfStoredEventsMessage] = BoundedQueue(queue_size, queue_policy)
+        self.subscription_events: dict[str, BoundedQueue] = {}
+        self.dedup = dedup if dedup is not None else LRUDedup()
         self.lock: Lock = Lock()
+        self.metrics = Metrics()
+        self.compact = compact
+        self.publisher: Publisher = None
+        self.multiplexer: 'SubscriptionMultiplexer' = None
+        self.on_seen = None
+        self.verify = verify
+        self.rejected = 0
+        self.unmatched = 0
+        self.verifier = verifier
+        if self.verifier is not None:
+            self.verifier.start(on_verified=self._accept)
+
+    def add_subscription_queue(self, subscription_id: str, queue_size: int = None,
+                               queue_policy: str = None) -> BoundedQueue:
+        """route events for a subscription to their own queue so they can be read
+        without waiting behind events from busier subscriptions
+
+        Args:
+            subscription_id (str): subscription to route
+            queue_size (int, optional): most events to hold. Defaults to None, in
+                which case the pool `queue_size` is used.
+            queue_policy (str, optional): what to do when the queue is full. Defaults
+                to None, in which case the pool `queue_policy` is used.
+
+        Returns:
+            BoundedQueue: the queue events for the subscription are put on
+        """
+        queue = BoundedQueue(self.queue_size if queue_size is None else queue_size,
+                             self.queue_policy if queue_policy is None else queue_policy)
+        with self.lock:
+            self.subscription_events[subscription_id] = queue
+        return queue
+
+    def remove_subscription_queue(self, subscription_id: str) -> None:
+        """stop routing a subscription to its own queue. Events still in the
+        queue are moved to `events`.
+        """
+        with self.lock:
+            queue = self.subscription_events.pop(subscription_id)
+        while not queue.empty():
+            self.events.put(queue.get_nowait())
+
+    def _event_queue(self, subscription_id: str = None) -> BoundedQueue:
+        if subscription_id is None:
+            return self.events
+        return self.subscription_events.get(subscription_id, self.events)
+
+    def get_event(self, subscription_id: str = None):
+        return self._event_queue(subscription_id).get()
+
+    def has_events(self, subscription_id: str = None) -> bool:
+        return self._event_queue(subscription_id).qsize() > 0
+
+    def get_events(self, subscription_id: str = None, max_events: int = None) -> list:
+        """take every event that is waiting, up to `max_events`, without blocking
+
+        Args:
+            subscription_id (str, optional): take events from this subscription's own
+                queue. Defaults to None, in which case the shared `events` queue is used.
+            max_events (int, optional): most events to take. Defaults to None, which
+                takes every waiting event.
+
+        Returns:
+            list: the events in the order they were queued
+        """
+        queue = self._event_queue(subscription_id)
+        events = []
+        while max_events is None or len(events) < max_events:
+            try:
+                events.append(queue.get_nowait())
+            except Empty:
+                break
+        return events
+
+    @property
+    def queue_stats(self) -> dict:
+        return {
+            'events': self.events.stats,
+            'notices': self.notices.stats,
+            'eose_notices': self.eose_notices.stats,
+            'subscriptions': {subscription_id: queue.stats for subscription_id, queue
+                              in self.subscription_events.items()}
+        }
+
+    def add_message(self, message: str, url: str, subscriptions: dict = None):
+        """decode a message from a relay and queue it
+
+        Args:
+            message (str): the raw frame
+            url (str): the relay it came from
+            subscriptions (dict, optional): the relay's subscriptions by id. New
+                events that match none of their subscription's filters are dropped.
+                Defaults to None, which skips the check.
+        """
+        self._process_message(message, url, subscriptions)
+
+    def _seen(self, event_id: str, url: str):
+        if not self.first_response_only and self.on_seen is not None:
+            self.on_seen(event_id, url)
+
+    def _is_new(self, event_id: str, url: str, created_at: int = None) -> bool:
+        contains = getattr(self.dedup, 'contains', None)
+        if contains is not None:
+            # a dedup that locks for itself, like `StoreDedup`, may go to disk, so it is
+            # checked outside the pool's lock and can narrow the lookup by `created_at`
+            is_new = not contains(event_id, created_at)
+        else:
+            with self.lock:
+                is_new = event_id not in self.dedup
+        if not is_new:
+            self._seen(event_id, url)
+        return is_new
+
+    def _claim(self, event_id: str) -> bool:
+        # stored events were ruled out by `_is_new`, so a dedup backed by a database
+        # only needs its window of recent ids checked against the other copies
+        claimed = getattr(self.dedup, 'recent', self.dedup)
+        with self.lock:
+            is_new = event_id not in claimed
+            if is_new:
+                self.dedup.add(event_id)
+        return is_new
+
+    def _accept(self, event_msg: EventMessage):
+        # ids only go into dedup once the event has been checked, so a forged copy
+        # can't shut out the real one
+        event_id = getattr(event_msg, 'event_id', None) or event_msg.event.id
+        if self._claim(event_id):
+            self._put_event(event_msg)
+        else:
+            self._seen(event_id, event_msg.url)
+
+    def _put_event(self, event_msg: EventMessage):
+        multiplexer = self.multiplexer
+        if multiplexer is not None and multiplexer.routes(event_msg.subscription_id):
+            multiplexer.dispatch(event_msg)
+        else:
+            self._event_queue(event_msg.subscription_id).put(event_msg)
 
-    def _process_message(self, message: str, url: str):
-        message_json = json.loads(message)
+    def _queue_event(self, event_msg: EventMessage, e: dict = None):
+        if self.verifier is not None:
+            self.verifier.submit(event_msg)
+        elif self.verify and not _verify_event((e['id'], e['pubkey'], e['created_at'], e['kind'],
+                                                e['tags'], e['content'], e['sig'])):
+            self.rejected += 1
+        else:
+            self._accept(event_msg)
+
+    def _matches(self, e: dict, subscription_id: str, subscriptions: dict) -> bool:
+        subscription = subscriptions.get(subscription_id)
+        if subscription is None:
+            return True
+        try:
+            return any(match_filter(filter_json, e) for filter_json in subscription.filters.to_json_array())
+        except (KeyError, TypeError):
+            return False
+
+    def _process_message(self, message: str, url: str, subscriptions: dict = None):
+        peeked = _peek_event_frame(message)
+        if peeked is not None:
+            subscription_id, event_id = peeked
+            created_at = None
+            if hasattr(self.dedup, 'contains'):
+                found = _EVENT_CREATED_AT.search(message)
+                created_at = int(found.group(1)) if found else None
+            is_new = self._is_new(event_id, url, created_at)
+            self.metrics.observe_event(url, subscription_id, is_new)
+            if not is_new:
+                return
+            e = None
+            if self.compact or subscriptions is not None or (self.verify and self.verifier is None):
+                e = _json_loads(message)[2]
+            if subscriptions is not None and not self._matches(e, subscription_id, subscriptions):
+                self.unmatched += 1
+                return
+            if self.compact:
+                self._queue_event(EventRecord.from_json(e, subscription_id, url), e)
+            else:
+                self._queue_event(LazyEventMessage(message, subscription_id, url, event_id, e), e)
+            return
+        message_json = _json_loads(message)
         message_type = message_json[0]
         if message_type == RelayMessageType.EVENT:
             subscription_id = message_json[1]
             e = message_json[2]
-            event = Event(e['pubkey'], e['content'], e['created_at'], e['kind'], e['tags'], e['id'], e['sig'])
-            with self.lock:
-                if self.first_response_only:
-                    object_id = event.id
-                else:
-                    object_id = f'{event.id}:{url}'
-                if object_id not in self._unique_objects:
-                    self.events.put(EventMessage(event, subscription_id, url))
-                    self._unique_objects.add(event.id)
+            is_new = self._is_new(e['id'], url, e.get('created_at'))
+            self.metrics.observe_event(url, subscription_id, is_new)
+            if not is_new:
+                return
+            if subscriptions is not None and not self._matches(e, subscription_id, subscriptions):
+                self.unmatched += 1
+                return
+            if self.compact:
+                self._queue_event(EventRecord.from_json(e, subscription_id, url), e)
+            else:
+                event = Event(e['pubkey'], e['content'], e['created_at'], e['kind'], e['tags'], e['id'], e['sig'])
+                self._queue_event(EventMessage(event, subscription_id, url), e)
+        elif message_type == RelayMessageType.NOTICE:
+            self.metrics.observe_notice(url)
+            self.notices.put(NoticeMessage(message_json[1], url))
+        elif message_type == RelayMessageType.END_OF_STORED_EVENTS:
+            self.metrics.observe_eose(url, message_json[1])
+            self.eose_notices.put(EndOfStoredEventsMessage(message_json[1], url))
+        elif message_type == 'OK' and len(message_json) >= 3:
+            # NIP-20 reply to an event we published. Some relays reject an event they
+            # already have as a duplicate, but the relay still has it
+            message = message_json[3] if len(message_json) > 3 else ''
+            accepted = bool(message_json[2]) or message.startswith('duplicate:')
+            if self.publisher is not None:
+                self.publisher.on_ok(OkMessage(message_json[1], accepted, message, url))
+
+# %% ../nbs/00_nostr_core.ipynb 60
+import random
+from nostr.message_type import ClientMessageType
+from nostr.filter import Filters
+
+class FilterJson:
+    def __init__(self, filter_json: dict):
+        """a filter kept in the json form sent to relays. It can go in a
+        `Filters` anywhere a `Filter` can, for filters built from json
+        rather than from keyword arguments
+        """
+        self.filter_json = filter_json
+
+    def __repr__(self):
+        return f'FilterJson({self.filter_json!r})'
+
+    def to_json_object(self) -> dict:
+        return dict(self.filter_json)
+
+    def matches(self, event_json: dict) -> bool:
+        return match_filter(self.filter_json, event_json)
+
+
+def _prefix_match(value: str, prefixes: list) -> bool:
+    return any(value.startswith(prefix) for prefix in prefixes)
+
+
+def match_filter(filter_json: dict, event_json: dict) -> bool:
+    """True if an event matches a filter the way a relay checks it, see
+    [NIP-01](https://github.com/nostr-protocol/nips/blob/master/01.md). `limit`
+    only applies to stored events, so it is ignored.
+
+    Args:
+        filter_json (dict): the filter as sent to relays
+        event_json (dict): the event as nostr json
+    """
+    if 'ids' in filter_json and not _prefix_match(event_json['id'], filter_json['ids']):
+        return False
+    if 'authors' in filter_json and not _prefix_match(event_json['pubkey'], filter_json['authors']):
+        return False
+    if 'kinds' in filter_json and event_json['kind'] not in filter_json['kinds']:
+        return False
+    if filter_json.get('since') is not None and event_json['created_at'] < filter_json['since']:
+        return False
+    if filter_json.get('until') is not None and event_json['created_at'] > filter_json['until']:
+        return False
+    for key, values in filter_json.items():
+        if key.startswith('#'):
+            name, values = key[1:], set(map(str, values))
+            if not any(len(tag) >= 2 and tag[0] == name and str(tag[1]) in values
+                       for tag in event_json['tags']):
+                return False
+    return True
+
+
+_EOSE_FRAME = re.compile(r'\s*\[\s*"EOSE"\s*,\s*"([^"\\]*)"')
+_CREATED_AT = re.compile(r'"created_at"\s*:\s*(\d+)')
+
+
+class Backoff:
+    def __init__(self, initial: float = 1, maximum: float = 60, factor: float = 2,
+                 jitter: float = .5):
+        """exponential backoff with jitter for the delay between reconnect
+        attempts, so relays that drop together don't all retry together
+
+        Args:
+            initial (float, optional): seconds before the first attempt. Defaults to 1.
+            maximum (float, optional): most seconds between attempts. Defaults to 60.
+            factor (float, optional): growth of the delay per attempt. Defaults to 2.
+            jitter (float, optional): fraction of the delay that is randomized. Defaults to .5.
+        """
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
 
+    def delay(self, attempt: int) -> float:
+        delay = min(self.maximum, self.initial * self.factor ** attempt)
+        return delay * (1 - self.jitter * random.random())
 
-# %% ../nbs/00_nostr_core.ipynb 46
+
+def _track_subscriptions(message: str, newest: dict, stored: set) -> None:
+    """note the newest `created_at` seen for each subscription and which
+    subscriptions have sent all of their stored events
+    """
+    frame = _EVENT_FRAME.match(message)
+    if frame is not None:
+        created_at = _CREATED_AT.search(message, frame.end())
+        if created_at is not None:
+            subscription_id, created_at = frame.group(1), int(created_at.group(1))
+            if created_at > newest.get(subscription_id, -1):
+                newest[subscription_id] = created_at
+        return
+    eose = _EOSE_FRAME.match(message)
+    if eose is not None:
+        stored.add(eose.group(1))
+
+
+def _resubscribe_requests(subscriptions: dict, newest: dict, stored: set) -> list:
+    """requests to replay subscriptions after a reconnect. Subscriptions that
+    already sent all of their stored events only ask for events since the
+    newest one we have, so a reconnect only costs the gap.
+    """
+    requests = []
+    for subscription_id, subscription in list(subscriptions.items()):
+        filters = subscription.filters.to_json_array()
+        since = newest.get(subscription_id) if subscription_id in stored else None
+        if since is not None:
+            for filter_json in filters:
+                filter_json['since'] = max(filter_json.get('since', since), since)
+        requests.append(json.dumps([ClientMessageType.REQUEST, subscription_id, *filters]))
+    return requests
+
+# %% ../nbs/00_nostr_core.ipynb 61
 class Connection:
     def __init__(self, relay_or_manager: Union[relay.Relay, relay_manager.RelayManager],
                  *args, **kwargs):
@@ -104,8 +1615,22 @@ class Connection:
 
 
 class Relay(relay.Relay):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, backoff: Backoff = None, **kwargs):
+        """a `python-nostr` relay that connects in the background and, when
+        given a `backoff`, reconnects after its connection drops and replays
+        its subscriptions from the newest event it had received
+        """
         super().__init__(*args, **kwargs)
+        self.ready = threading.Event()
+        self.connect_started = None
+        self.connect_latency = None
+        self.backoff = backoff
+        self.reconnects = 0
+        self.newest_created_at: dict[str, int] = {}
+        self.stored_events_sent: set = set()
+        self._closing = threading.Event()
+        self._opened = False
+        self._reconnecting = False
 
     def __repr__(self):
         return json.dumps(self.to_json_object(), indent=2)
@@ -113,17 +1638,89 @@ class Relay(relay.Relay):
     @property
     def is_connected(self) -> bool:
         return False if self.ws.sock is None else self.ws.sock.connected
-    
+
+    @property
+    def is_connecting(self) -> bool:
+        """True while a connection attempt has started but the socket
+        has neither opened nor failed yet
+        """
+        return self.connect_started is not None and not self.ready.is_set()
+
+    @property
+    def is_reconnecting(self) -> bool:
+        """True while the relay is waiting to reconnect or reconnecting
+        after its connection dropped
+        """
+        return self._reconnecting
+
+    def connect(self, ssl_options: dict=None):
+        try:
+            super().connect(ssl_options)
+        finally:
+            self.ready.set()
+
+    def _run(self, ssl_options: dict = None):
+        attempt, has_opened = 0, False
+        while True:
+            self._opened = False
+            self.connect(ssl_options)
+            has_opened = has_opened or self._opened
+            # only connections that opened and then dropped are retried
+            if self.backoff is None or self._closing.is_set() or not has_opened:
+                break
+            attempt = 0 if self._opened else attempt + 1
+            self._reconnecting = True
+            if self._closing.wait(self.backoff.delay(attempt)):
+                break
+            self.reconnects += 1
+        self._reconnecting = False
+
+    def _on_open(self, class_obj):
+        if self.connect_started is not None:
+            self.connect_latency = time.perf_counter() - self.connect_started
+        self.ready.set()
+        if self._reconnecting:
+            with self.lock:
+                requests = _resubscribe_requests(self.subscriptions, self.newest_created_at,
+                                                 self.stored_events_sent)
+            for request in requests:
+                self.ws.send(request)
+        self._opened = True
+        self._reconnecting = False
+        super()._on_open(class_obj)
+
+    def add_subscription(self, id: str, filters: Filters):
+        self.stored_events_sent.discard(id)
+        super().add_subscription(id, filters)
+
+    def _on_message(self, class_obj, message: str):
+        start = time.perf_counter()
+        if _is_wanted_frame(message, self.subscriptions):
+            _track_subscriptions(message, self.newest_created_at, self.stored_events_sent)
+            self.message_pool.add_message(message, self.url, self.subscriptions)
+        self.message_pool.metrics.observe_frame(self.url, len(message), time.perf_counter() - start)
+
+    def _on_error(self, class_obj, error):
+        self.message_pool.metrics.observe_error(self.url)
+        super()._on_error(class_obj, error)
+
     def open_connections(self, ssl_options: dict={}):
+        self.ready.clear()
+        self._closing.clear()
+        self.connect_started = time.perf_counter()
+        self.connect_latency = None
         threading.Thread(
-                target=self.connect,
+                target=self._run,
                 args=(ssl_options,),
                 name=f"{self.url}-thread"
         ).start()
     
     def close(self):
+        self._closing.set()
         if self.ws.sock is not None:
             self.ws.close()
+        else:
+            self.ws.keep_running = False
     
     def close_connections(self):
         self.close()
@@ -132,12 +1729,27 @@ class Relay(relay.Relay):
         return Connection(self, *args, **kwargs)
 
 
-# %% ../nbs/00_nostr_core.ipynb 47
+# %% ../nbs/00_nostr_core.ipynb 62
 class RelayManager(relay_manager.RelayManager):
-    def __init__(self, first_response_only: bool = True,  *args, **kwargs):
+    def __init__(self, first_response_only: bool = True,  *args,
+                 connect_timeout: float = 5, connect_quorum: int = None,
+                 dedup=None, verifier: 'EventVerifier' = None, compact: bool = False,
+                 queue_size: int = 0, queue_policy: str = QueuePolicy.BLOCK,
+                 reconnect: bool = True, backoff: Backoff = None,
+                 publish_window: int = 64, ack_timeout: float = 10, verify: bool = True, **kwargs):
         super().__init__(*args, **kwargs)
         self.relays: dict[str, Relay] = {}
-        self.message_pool = MessagePool(first_response_only=first_response_only)
+        self.message_pool = MessagePool(first_response_only=first_response_only,
+                                        dedup=dedup, verifier=verifier, compact=compact,
+                                        queue_size=queue_size, queue_policy=queue_policy,
+                                        verify=verify)
+        self.connect_timeout = connect_timeout
+        self.connect_quorum = connect_quorum
+        if reconnect and backoff is None:
+            backoff = Backoff()
+        self.backoff = backoff if reconnect else None
+        self.publisher = Publisher(self, window=publish_window, ack_timeout=ack_timeout)
+        self.message_pool.publisher = self.publisher
         self._is_connected = False
 
     def __iter__(self):
@@ -146,17 +1758,41 @@ class RelayManager(relay_manager.RelayManager):
     def connection(self, *args, **kwargs):
         return Connection(self, *args, **kwargs)
     
-    def open_connections(self, ssl_options: dict=None):
-        for relay in self.relays.values():
-            if not relay.is_connected:
-                threading.Thread(
-                    target=relay.connect,
-                    args=(ssl_options,),
-                    name=f"{relay.url}-thread"
-                ).start()
-        time.sleep(2)
+    def _wait_for_connections(self, relays: list, timeout: float, quorum: int = None) -> bool:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if all(relay.ready.is_set() for relay in relays):
+                return True
+            if quorum is not None and sum(self.connection_statuses.values()) >= quorum:
+                return True
+            time.sleep(.01)
+        return False
+
+    def open_connections(self, ssl_options: dict=None, timeout: float=None, quorum: int=None):
+        """connect to all relays in parallel and return as soon as every
+        relay has either opened its socket or failed
+
+        Args:
+            ssl_options (dict, optional): ssl options for the websockets. Defaults to None.
+            timeout (float, optional): seconds each relay is given to connect before
+                it is removed. Defaults to `self.connect_timeout`.
+            quorum (int, optional): return as soon as this many relays are connected
+                and let the rest keep connecting in the background. Defaults to
+                `self.connect_quorum`, which waits for every relay.
+        """
+        timeout = self.connect_timeout if timeout is None else timeout
+        quorum = self.connect_quorum if quorum is None else quorum
+        relays = [relay for relay in self
+                  if not relay.is_connected and not relay.is_reconnecting]
+        for relay in relays:
+            relay.open_connections(ssl_options)
+        if not self._wait_for_connections(relays, timeout=timeout, quorum=quorum):
+            for relay in relays:
+                if relay.is_connecting:
+                    relay.close()
+                    relay.ready.set()
         self.remove_closed_relays()
-        assert all(self.connection_statuses.values())
+        assert all(relay.is_connected or relay.is_connecting for relay in self)
         self._is_connected = True
     
     def close_connections(self):
@@ -168,16 +1804,108 @@ class RelayManager(relay_manager.RelayManager):
 
     def remove_closed_relays(self):
         for url, connected in self.connection_statuses.items():
-            if not connected:
+            relay = self.relays[url]
+            if not connected and not relay.is_connecting and not relay.is_reconnecting:
                 warnings.warn(
                     f'{url} is not connected... removing relay.'
                 )
                 self.remove_relay(url=url)
 
+    def add_subscription(self, id: str, filters: Filters, urls: list = None):
+        """add a subscription to relays
+
+        Args:
+            id (str): subscription id
+            filters (Filters): filters for the subscription
+            urls (list, optional): only add the subscription to these relays.
+                Defaults to None, in which case it is added to every relay.
+        """
+        self.message_pool.metrics.observe_request(id)
+        for url, relay in self.relays.items():
+            if urls is None or url in urls:
+                relay.add_subscription(id, filters)
+
+    def close_subscription(self, id: str):
+        """tell every relay with the subscription to close it and stop
+        routing its events to their own queue
+
+        Args:
+            id (str): subscription id
+        """
+        message = json.dumps([ClientMessageType.CLOSE, id])
+        for relay in list(self.relays.values()):
+            if id in relay.subscriptions:
+                relay.close_subscription(id)
+                if relay.is_connected:
+                    try:
+                        relay.publish(message)
+                    except Exception as e:
+                        warnings.warn(f'{relay.url}: could not close subscription {id}: {e}')
+        if id in self.message_pool.subscription_events:
+            self.message_pool.remove_subscription_queue(id)
+        self.message_pool.metrics.close_subscription(id)
+
+    def publish_message(self, message: str, urls: list = None):
+        """send a message to every relay we can write to
+
+        Args:
+            message (str): the message
+            urls (list, optional): only send to these relays. Defaults to None,
+                in which case every relay is sent the message.
+        """
+        for url, relay in self.relays.items():
+            if relay.policy.should_write and (urls is None or url in urls):
+                relay.publish(message)
+
+    def publish_event(self, event: Event, min_acks: int = None, urls: list = None) -> PublishFuture:
+        """send a signed event to every relay we can write to without waiting
+        for the relays to reply
+
+        Args:
+            event (Event): a signed event
+            min_acks (int, optional): number of relays that have to accept the event
+                before the future resolves. Defaults to None, which waits for every relay.
+            urls (list, optional): only send to these relays. Defaults to None, in which
+                case every relay is sent the event.
+
+        Returns:
+            PublishFuture: resolves to the `OkMessage` from each relay by url
+        """
+        message = json.dumps([ClientMessageType.EVENT, event.to_json_object()])
+        return self.publisher.publish(event.id, message, min_acks=min_acks, urls=urls)
+
+    def wait_for_eose(self, subscription_id: str, urls: list = None, timeout: float = 1) -> bool:
+        """block until every connected relay has sent all of its stored events
+        for a subscription
+
+        Args:
+            subscription_id (str): subscription to wait for
+            urls (list, optional): only wait for these relays. Defaults to None.
+            timeout (float, optional): most seconds to wait. Defaults to 1.
+
+        Returns:
+            bool: True if every relay sent an `EOSE` before the timeout
+        """
+        deadline = time.perf_counter() + timeout
+        while not self.has_eose(subscription_id, urls=urls):
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(.01)
+        return True
+
+    def has_eose(self, subscription_id: str, urls: list = None) -> bool:
+        """True once every connected relay with the subscription has sent
+        all of its stored events for it
+        """
+        return not any(relay.is_connected and subscription_id in relay.subscriptions
+                       and subscription_id not in relay.stored_events_sent
+                       for url, relay in list(self.relays.items())
+                       if urls is None or url in urls)
+
     def add_relay(self, url: str, read: bool=True, write: bool=True, subscriptions=None):
         subscriptions = subscriptions if subscriptions is not None else {}
         policy = RelayPolicy(read, write)
-        relay = Relay(url, policy, self.message_pool, subscriptions)
+        relay = Relay(url, policy, self.message_pool, subscriptions, backoff=self.backoff)
         self.relays[url] = relay
     
     def remove_relay(self, url: str):
@@ -193,3 +1921,608 @@ class RelayManager(relay_manager.RelayManager):
         """
         statuses = [relay.is_connected for relay in self]
         return dict(zip(self.relays.keys(), statuses))
+
+    @property
+    def connect_latencies(self) -> dict:
+        """gets the seconds each relay took to open its socket on the
+        last connection attempt
+
+        Returns:
+            dict: latency in seconds, or None for relays that haven't connected
+        """
+        return {url: relay.connect_latency for url, relay in self.relays.items()}
+
+    def metrics_snapshot(self) -> dict:
+        """a snapshot of the message pool metrics with the connection state
+        of each relay and the depth of each queue added
+
+        Returns:
+            dict: metrics by relay, subscription, handler and queue
+        """
+        snapshot = self.message_pool.metrics.snapshot()
+        for url, relay in list(self.relays.items()):
+            snapshot['relays'].setdefault(url, {}).update({
+                'connected': relay.is_connected,
+                'connect_seconds': relay.connect_latency,
+                'reconnects': relay.reconnects
+            })
+        snapshot['queues'] = self.message_pool.queue_stats
+        return snapshot
+
+    def metrics_prometheus(self) -> str:
+        """the metrics snapshot in the Prometheus text exposition format"""
+        return prometheus_text(self.metrics_snapshot())
+
+# %% ../nbs/00_nostr_core.ipynb 63
+class RelayScores:
+    def __init__(self, decay: float = .9, alpha: float = .3):
+        """tracks how useful each relay has been from `RelayManager.metrics_snapshot`
+        so that requests can be routed to the relays that add the most.
+
+        For each relay it keeps the number of unique events the relay was the
+        first to send, the average latency to the end of stored events (or to
+        connect, for relays that haven't answered a request), the error rate and
+        the fraction of updates it was connected for. Older counts decay so the
+        scores follow relays that get faster or slower.
+
+        Args:
+            decay (float, optional): weight kept by past counts at each update. Defaults to .9.
+            alpha (float, optional): weight of the newest latency in its moving average.
+                Defaults to .3.
+        """
+        self.decay = decay
+        self.alpha = alpha
+        self.relays: dict[str, dict] = {}
+        self._last: dict[str, dict] = {}
+
+    def _relay(self, url: str) -> dict:
+        if url not in self.relays:
+            self.relays[url] = {'unique': 0., 'events': 0., 'errors': 0., 'updates': 0.,
+                                'connected': 0., 'latency': None}
+        return self.relays[url]
+
+    def update(self, snapshot: dict) -> None:
+        """fold a metrics snapshot into the scores. Counters in a snapshot are
+        totals, so only the change since the last update is counted.
+        """
+        for url, metrics in snapshot['relays'].items():
+            last = self._last.get(url, {})
+            delta = {name: metrics.get(name, 0) - last.get(name, 0)
+                     for name in ('events', 'duplicates', 'errors')}
+            eose = metrics.get('eose_seconds', {'count': 0, 'sum': 0})
+            eose_count = eose['count'] - last.get('eose_count', 0)
+            eose_sum = eose['sum'] - last.get('eose_sum', 0)
+            self._last[url] = {**{name: metrics.get(name, 0) for name in delta},
+                               'eose_count': eose['count'], 'eose_sum': eose['sum']}
+
+            relay = self._relay(url)
+            for name in ('unique', 'events', 'errors', 'updates', 'connected'):
+                relay[name] *= self.decay
+            relay['unique'] += delta['events']
+            relay['events'] += delta['events'] + delta['duplicates']
+            relay['errors'] += delta['errors']
+            relay['updates'] += 1
+            relay['connected'] += bool(metrics.get('connected'))
+            latency = eose_sum / eose_count if eose_count else metrics.get('connect_seconds')
+            if latency is not None:
+                relay['latency'] = latency if relay['latency'] is None else \
+                    self.alpha * latency + (1 - self.alpha) * relay['latency']
+
+    def score(self, url: str) -> Union[float, None]:
+        """unique events contributed, scaled down by error rate, downtime and
+        latency. None for relays we know nothing about yet.
+        """
+        relay = self.relays.get(url)
+        if relay is None or not relay['updates']:
+            return None
+        uptime = relay['connected'] / relay['updates']
+        error_rate = relay['errors'] / (relay['errors'] + relay['events'] + 1)
+        latency = relay['latency'] if relay['latency'] is not None else 0
+        return relay['unique'] * uptime * (1 - error_rate) / (1 + latency)
+
+    def select(self, urls: list, k: int, explore: float = .1) -> list:
+        """pick `k` relays from `urls`, mostly the highest scoring ones.
+
+        On average `explore` of the picks are made at random from the other
+        relays, and relays without a score yet are always picked first among
+        those, so new and recovering relays get a chance to earn a score.
+
+        Args:
+            urls (list): relays to choose from
+            k (int): number of relays to pick
+            explore (float, optional): fraction of picks to explore with. Defaults to .1.
+
+        Returns:
+            list: the chosen urls
+        """
+        urls = list(dict.fromkeys(urls))
+        if k >= len(urls):
+            return urls
+        n_explore = int(k * explore) + (random.random() < k * explore % 1)
+        unscored = [url for url in urls if self.score(url) is None]
+        scored = sorted((url for url in urls if self.score(url) is not None),
+                        key=self.score, reverse=True)
+        chosen = scored[:k - n_explore]
+        rest = [url for url in scored if url not in chosen]
+        random.shuffle(unscored)
+        random.shuffle(rest)
+        return chosen + (unscored + rest)[:k - len(chosen)]
+
+    def to_json_object(self) -> dict:
+        return {'decay': self.decay, 'alpha': self.alpha, 'relays': self.relays}
+
+    def save(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(json.dumps(self.to_json_object(), indent=2))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'RelayScores':
+        """load saved scores, or start fresh if there are none at `path`"""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        saved = json.loads(path.read_text())
+        scores = cls(decay=saved['decay'], alpha=saved['alpha'])
+        scores.relays = saved['relays']
+        return scores
+
+# %% ../nbs/00_nostr_core.ipynb 64
+import copy
+import uuid
+
+_MERGE_FIELDS = ('authors', 'ids', '#p', '#e')
+
+
+def _merge_key(filter_json: dict) -> Union[tuple, None]:
+    """the field a filter can be merged on and everything else in the filter.
+    Filters with a `limit` can't be merged since the limit would be shared.
+    """
+    if 'limit' in filter_json:
+        return None
+    field = next((field for field in _MERGE_FIELDS if field in filter_json), None)
+    rest = {key: sorted(value) if isinstance(value, list) else value
+            for key, value in filter_json.items() if key != field}
+    return field, json.dumps(rest, sort_keys=True)
+
+
+def _event_json(event_msg: Union[EventMessage, EventRecord]) -> dict:
+    if isinstance(event_msg, EventRecord):
+        return event_msg.to_json_object()
+    if isinstance(event_msg, LazyEventMessage) and event_msg._event is None:
+        return event_msg._decoded()
+    return event_msg.event.to_json_object()
+
+
+class MergedFilter:
+    def __init__(self, key: Union[tuple, None], filter_json: dict):
+        """one filter sent to relays on behalf of every subscription merged into it.
+        Filters with the same `key` are merged by taking the union of their `field`.
+        """
+        self.key = key
+        self.field = key[0] if key is not None else None
+        self.base = {name: value for name, value in filter_json.items() if name != self.field}
+        self.values = list(filter_json.get(self.field, [])) if self.field is not None else []
+        self.subscribers = set()
+
+    def __repr__(self):
+        return f'MergedFilter({self.to_json_object()!r}, subscribers={len(self.subscribers)})'
+
+    def merge(self, filter_json: dict):
+        # replaced rather than appended to, so a reconnect replaying the filter never sees it mid change
+        self.values = list(dict.fromkeys([*self.values, *filter_json.get(self.field, [])]))
+
+    def to_json_object(self) -> dict:
+        filter_json = dict(self.base)
+        if self.field is not None:
+            filter_json[self.field] = list(self.values)
+        return filter_json
+
+
+class SubscriptionMultiplexer:
+    def __init__(self, relay_manager: RelayManager, max_subscriptions: int = 10,
+                 max_values: int = 256, cache_size: int = 10_000):
+        """shares a few subscriptions on the relays between many subscriptions
+        of our own.
+
+        Each `subscribe` gets a new id. Its filters are merged into filters already
+        sent when they differ only in their `authors`, `ids`, `#p` or `#e`, such as
+        author lists with the same kinds, and the merged filters are packed into at
+        most `max_subscriptions` requests. Events from a shared request are checked
+        against the filters of each subscription in it with `match_filter` and put
+        on the queue of every subscription they match.
+
+        The message pool only queues each event once, so when a subscription joins a
+        request that is already open, the stored events the relays send again are
+        dropped as duplicates. The most recent events routed are kept, and the ones
+        that match a new subscription are put on its queue when it subscribes.
+
+        Args:
+            relay_manager (RelayManager): relays to subscribe on
+            max_subscriptions (int, optional): most subscriptions to hold open on each
+                relay. Defaults to 10.
+            max_values (int, optional): most authors, ids or tags in a merged filter.
+                Defaults to 256.
+            cache_size (int, optional): number of recently routed events to replay to
+                new subscriptions. Defaults to 10,000.
+        """
+        self.relay_manager = relay_manager
+        self.max_subscriptions = max_subscriptions
+        self.max_values = max_values
+        self.subscribers: dict[str, list] = {}
+        self.requests: dict[str, list] = {}
+        self.cache_size = cache_size
+        self.recent: OrderedDict = OrderedDict()
+        self.lock = threading.RLock()
+        relay_manager.message_pool.multiplexer = self
+
+    def _place(self, filter_json: dict) -> tuple:
+        key = _merge_key(filter_json)
+        if key is not None:
+            values = filter_json.get(key[0], []) if key[0] is not None else []
+            for request_id, merged_filters in self.requests.items():
+                for merged in merged_filters:
+                    if merged.key == key and len(set(merged.values).union(values)) <= self.max_values:
+                        merged.merge(filter_json)
+                        return request_id, merged
+        merged = MergedFilter(key, filter_json)
+        if len(self.requests) < self.max_subscriptions:
+            request_id = f'mux-{uuid.uuid4()}'
+            self.requests[request_id] = [merged]
+        else:
+            request_id = min(self.requests, key=lambda request_id: len(self.requests[request_id]))
+            self.requests[request_id].append(merged)
+        return request_id, merged
+
+    def _send(self, request_id: str):
+        filters = Filters(list(self.requests[request_id]))
+        self.relay_manager.add_subscription(request_id, filters)
+        self.relay_manager.publish_message(
+            json.dumps([ClientMessageType.REQUEST, request_id, *filters.to_json_array()]))
+
+    def subscribe(self, filters: Filters, subscription_id: str = None) -> str:
+        """subscribe to filters through the shared requests. Requests that a filter
+        is merged into are sent again with the merged filters, which replaces them
+        on the relays.
+
+        Args:
+            filters (Filters): filters for the subscription
+            subscription_id (str, optional): id for the subscription. Defaults to None,
+                in which case a new random id is used.
+
+        Returns:
+            str: the subscription id events are routed to
+        """
+        subscription_id = str(uuid.uuid4()) if subscription_id is None else subscription_id
+        filters_json = filters.to_json_array()
+        with self.lock:
+            self.subscribers[subscription_id] = filters_json
+            changed = set()
+            for filter_json in filters_json:
+                request_id, merged = self._place(filter_json)
+                merged.subscribers.add(subscription_id)
+                changed.add(request_id)
+            for request_id in changed:
+                self._send(request_id)
+            replay = [event_msg for event_msg in self.recent.values()
+                      if any(match_filter(filter_json, _event_json(event_msg)) for filter_json in filters_json)]
+        for event_msg in replay:
+            self._route(event_msg, subscription_id)
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: str):
+        """stop routing events to a subscription. Requests with no subscriptions
+        left are closed on the relays. Others are left as they are rather than
+        asking the relays to send their stored events again.
+        """
+        with self.lock:
+            self.subscribers.pop(subscription_id, None)
+            for request_id, merged_filters in list(self.requests.items()):
+                for merged in merged_filters:
+                    merged.subscribers.discard(subscription_id)
+                remaining = [merged for merged in merged_filters if merged.subscribers]
+                if not remaining:
+                    del self.requests[request_id]
+                    self.relay_manager.close_subscription(request_id)
+                else:
+                    self.requests[request_id] = remaining
+        message_pool = self.relay_manager.message_pool
+        if subscription_id in message_pool.subscription_events:
+            message_pool.remove_subscription_queue(subscription_id)
+
+    def request_ids(self, subscription_id: str) -> list:
+        """the shared requests a subscription is in"""
+        with self.lock:
+            return [request_id for request_id, merged_filters in self.requests.items()
+                    if any(subscription_id in merged.subscribers for merged in merged_filters)]
+
+    def has_eose(self, subscription_id: str) -> bool:
+        """True once every shared request the subscription is in has sent
+        all of its stored events"""
+        return all(self.relay_manager.has_eose(request_id) for request_id in self.request_ids(subscription_id))
+
+    def wait_for_eose(self, subscription_id: str, timeout: float = 1) -> bool:
+        """block until `has_eose`, see `RelayManager.wait_for_eose`"""
+        deadline = time.perf_counter() + timeout
+        while not self.has_eose(subscription_id):
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(.01)
+        return True
+
+    def routes(self, request_id: str) -> bool:
+        return request_id in self.requests
+
+    def _route(self, event_msg: Union[EventMessage, EventRecord], subscription_id: str):
+        routed = copy.copy(event_msg)
+        routed.subscription_id = subscription_id
+        self.relay_manager.message_pool._event_queue(subscription_id).put(routed)
+
+    def dispatch(self, event_msg: Union[EventMessage, EventRecord]):
+        """put an event from a shared request on the queue of each subscription
+        whose filters it matches"""
+        event_json = _event_json(event_msg)
+        # the event goes in `recent` along with reading the subscribers, so one that
+        # subscribes meanwhile gets it either from here or from its replay, never both
+        with self.lock:
+            subscriber_ids = sorted({subscription_id for merged in self.requests.get(event_msg.subscription_id, ())
+                                     for subscription_id in merged.subscribers})
+            subscribers = [(subscription_id, self.subscribers[subscription_id])
+                           for subscription_id in subscriber_ids]
+            if self.cache_size:
+                self.recent[event_json['id']] = event_msg
+                if len(self.recent) > self.cache_size:
+                    self.recent.popitem(last=False)
+        for subscription_id, filters_json in subscribers:
+            if any(match_filter(filter_json, event_json) for filter_json in filters_json):
+                self._route(event_msg, subscription_id)
+
+# %% ../nbs/00_nostr_core.ipynb 164
+import asyncio
+import ssl
+import websockets
+from nostr.subscription import Subscription
+from nostr.filter import Filters
+
+# %% ../nbs/00_nostr_core.ipynb 165
+_SSL_OPTIONS = {'cert_reqs', 'check_hostname', 'ca_certs', 'ca_cert_path', 'ca_cert_data',
+                'certfile', 'keyfile', 'password', 'ciphers', 'ssl_version'}
+
+
+def _ssl_context(url: str, ssl_options: dict = None) -> Union[ssl.SSLContext, None]:
+    """translate `websocket-client` style `sslopt` options into an `ssl.SSLContext`
+    so that the same `ssl_options` work for both relay manager types
+
+    Raises:
+        ValueError: for options that have no `ssl.SSLContext` equivalent
+    """
+    if not url.startswith('wss'):
+        return None
+    ssl_options = ssl_options if ssl_options is not None else {}
+    unsupported = set(ssl_options) - _SSL_OPTIONS
+    if unsupported:
+        raise ValueError(f'unsupported ssl_options for AsyncRelayManager: {", ".join(sorted(unsupported))}')
+    if 'ssl_version' in ssl_options:
+        context = ssl.SSLContext(ssl_options['ssl_version'])
+        context.load_default_certs()
+    else:
+        context = ssl.create_default_context()
+    if any(key in ssl_options for key in ('ca_certs', 'ca_cert_path', 'ca_cert_data')):
+        context.load_verify_locations(cafile=ssl_options.get('ca_certs'), capath=ssl_options.get('ca_cert_path'),
+                                      cadata=ssl_options.get('ca_cert_data'))
+    if 'certfile' in ssl_options:
+        context.load_cert_chain(ssl_options['certfile'], ssl_options.get('keyfile'), ssl_options.get('password'))
+    if 'ciphers' in ssl_options:
+        context.set_ciphers(ssl_options['ciphers'])
+    cert_reqs = ssl_options.get('cert_reqs', ssl.CERT_REQUIRED)
+    # the hostname can only be checked along with the certificate
+    if cert_reqs == ssl.CERT_NONE:
+        context.check_hostname = False
+        context.verify_mode = cert_reqs
+    else:
+        context.verify_mode = cert_reqs
+        context.check_hostname = ssl_options.get('check_hostname', True)
+    return context
+
+
+class AsyncRelay:
+    def __init__(self, url: str, policy: RelayPolicy, message_pool: MessagePool,
+                 subscriptions: dict = None, loop: asyncio.AbstractEventLoop = None,
+                 backoff: Backoff = None):
+        """a relay whose websocket runs as a task on a shared event loop
+        instead of on its own thread
+
+        Args:
+            url (str): relay url
+            policy (RelayPolicy): read and write policy for the relay
+            message_pool (MessagePool): pool that incoming messages are sent to
+            subscriptions (dict, optional): subscriptions by id. Defaults to None.
+            loop (asyncio.AbstractEventLoop, optional): the event loop that runs
+                the websocket. Defaults to None, in which case it must be set
+                before connecting.
+            backoff (Backoff, optional): reconnect with this backoff after the
+                connection drops. Defaults to None, which doesn't reconnect.
+        """
+        self.url = url
+        self.policy = policy
+        self.message_pool = message_pool
+        self.subscriptions = subscriptions if subscriptions is not None else {}
+        self.loop = loop
+        self.lock = Lock()
+        self.ws = None
+        self.ready = threading.Event()
+        self.connect_started = None
+        self.connect_latency = None
+        self.backoff = backoff
+        self.reconnects = 0
+        self.newest_created_at: dict[str, int] = {}
+        self.stored_events_sent: set = set()
+        self._reconnecting = False
+        self._task = None
+
+    def __repr__(self):
+        return json.dumps(self.to_json_object(), indent=2)
+
+    @property
+    def is_connected(self) -> bool:
+        return self.ws is not None
+
+    @property
+    def is_connecting(self) -> bool:
+        return self.connect_started is not None and not self.ready.is_set()
+
+    @property
+    def is_reconnecting(self) -> bool:
+        return self._reconnecting
+
+    async def _connect_once(self, ssl_options: dict = None) -> bool:
+        opened = False
+        try:
+            async with websockets.connect(self.url, ssl=_ssl_context(self.url, ssl_options),
+                                          max_size=None) as ws:
+                opened = True
+                if self._reconnecting:
+                    with self.lock:
+                        requests = _resubscribe_requests(self.subscriptions, self.newest_created_at,
+                                                         self.stored_events_sent)
+                    for request in requests:
+                        await ws.send(request)
+                self.ws = ws
+                self._reconnecting = False
+                if self.connect_started is not None:
+                    self.connect_latency = time.perf_counter() - self.connect_started
+                self.ready.set()
+                async for message in ws:
+                    self._on_message(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._on_error(e)
+        finally:
+            self.ws = None
+            self.ready.set()
+        return opened
+
+    async def _run(self, ssl_options: dict = None):
+        attempt, has_opened = 0, False
+        try:
+            while True:
+                opened = await self._connect_once(ssl_options)
+                has_opened = has_opened or opened
+                # only connections that opened and then dropped are retried
+                if self.backoff is None or not has_opened:
+                    break
+                attempt = 0 if opened else attempt + 1
+                self._reconnecting = True
+                await asyncio.sleep(self.backoff.delay(attempt))
+                self.reconnects += 1
+        finally:
+            self._reconnecting = False
+
+    def connect(self, ssl_options: dict = None) -> asyncio.Task:
+        """schedule the websocket task on the event loop. Must be called
+        from the event loop thread.
+        """
+        self._task = self.loop.create_task(self._run(ssl_options))
+        return self._task
+
+    def open_connections(self, ssl_options: dict = None):
+        """schedule the websocket task on the event loop from any thread
+        """
+        self.ready.clear()
+        self.connect_started = time.perf_counter()
+        self.connect_latency = None
+        self.loop.call_soon_threadsafe(self.connect, ssl_options)
+
+    def close(self):
+        if self._task is not None and not self._task.done():
+            self.loop.call_soon_threadsafe(self._task.cancel)
+        self._task = None
+        self.ws = None
+
+    def publish(self, message: str):
+        ws = self.ws
+        if ws is not None:
+            sent = asyncio.run_coroutine_threadsafe(ws.send(message), self.loop)
+            sent.add_done_callback(self._on_sent)
+
+    def _on_sent(self, sent):
+        if not sent.cancelled() and sent.exception() is not None:
+            self._on_error(sent.exception())
+
+    def add_subscription(self, id, filters: Filters):
+        self.stored_events_sent.discard(id)
+        with self.lock:
+            self.subscriptions[id] = Subscription(id, filters)
+
+    def close_subscription(self, id: str) -> None:
+        with self.lock:
+            self.subscriptions.pop(id)
+
+    def update_subscription(self, id: str, filters: Filters) -> None:
+        with self.lock:
+            subscription = self.subscriptions[id]
+            subscription.filters = filters
+
+    def to_json_object(self) -> dict:
+        return {
+            "url": self.url,
+            "policy": self.policy.to_json_object(),
+            "subscriptions": [subscription.to_json_object() for subscription in self.subscriptions.values()]
+        }
+
+    def _on_message(self, message: str):
+        start = time.perf_counter()
+        if _is_wanted_frame(message, self.subscriptions):
+            _track_subscriptions(message, self.newest_created_at, self.stored_events_sent)
+            self.message_pool.add_message(message, self.url, self.subscriptions)
+        self.message_pool.metrics.observe_frame(self.url, len(message), time.perf_counter() - start)
+
+    def _on_error(self, error):
+        self.message_pool.metrics.observe_error(self.url)
+
+# %% ../nbs/00_nostr_core.ipynb 166
+class AsyncRelayManager(RelayManager):
+    def __init__(self, first_response_only: bool = True, *args, **kwargs):
+        """a `RelayManager` that runs every relay websocket on a single
+        asyncio event loop running on one background thread
+        """
+        super().__init__(first_response_only, *args, **kwargs)
+        self.relays: dict[str, AsyncRelay] = {}
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = None
+
+    def _start_loop(self):
+        if self._loop_thread is None or not self._loop_thread.is_alive():
+            self._loop_thread = threading.Thread(
+                target=self.loop.run_forever,
+                name='nostr-asyncio-loop',
+                daemon=True
+            )
+            self._loop_thread.start()
+
+    def _run_coroutine(self, coroutine, timeout: float = None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def open_connections(self, *args, **kwargs):
+        self._start_loop()
+        super().open_connections(*args, **kwargs)
+
+    async def _close(self):
+        tasks = [relay._task for relay in self.relays.values()
+                 if relay._task is not None]
+        for relay in self.relays.values():
+            relay.close()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close_connections(self):
+        if self._loop_thread is not None and self._loop_thread.is_alive():
+            self._run_coroutine(self._close())
+        assert not any(self.connection_statuses.values())
+        self._is_connected = False
+
+    def add_relay(self, url: str, read: bool=True, write: bool=True, subscriptions=None):
+        subscriptions = subscriptions if subscriptions is not None else {}
+        policy = RelayPolicy(read, write)
+        relay = AsyncRelay(url, policy, self.message_pool, subscriptions, loop=self.loop,
+                           backoff=self.backoff)
+        self.relays[url] = relay
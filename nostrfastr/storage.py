@@ -0,0 +1,1569 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/05_storage.ipynb.
+
+# %% auto 0
+__all__ = ['SCHEMA_VERSION', 'EVENT_COLUMNS', 'EventStore', 'compile_filter', 'coverage_key', 'RetentionRule',
+           'PartitionedEventStore']
+
+# %% ../nbs/05_storage.ipynb 4
+import ast
+import json
+import time
+import sqlite3
+from pathlib import Path
+from threading import RLock, local
+from typing import Union
+
+from .nostr import _verify_event
+
+# %% ../nbs/05_storage.ipynb 5
+SCHEMA_VERSION = 6
+
+EVENT_COLUMNS = ['id', 'pubkey', 'created_at', 'kind', 'tags', 'content', 'sig',
+                 'subscription_id', 'url']
+
+_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS events (
+        id TEXT PRIMARY KEY,
+        pubkey TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        kind INTEGER NOT NULL,
+        tags TEXT NOT NULL,
+        content TEXT NOT NULL,
+        sig TEXT NOT NULL,
+        subscription_id TEXT,
+        url TEXT
+    );''',
+    '''CREATE TABLE IF NOT EXISTS event_tags (
+        event_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (event_id, name, value)
+    ) WITHOUT ROWID;''',
+    '''CREATE TABLE IF NOT EXISTS relays (
+        id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE
+    );''',
+    '''CREATE TABLE IF NOT EXISTS event_seen (
+        event_id TEXT NOT NULL,
+        relay_id INTEGER NOT NULL,
+        first_seen_at INTEGER,
+        PRIMARY KEY (event_id, relay_id)
+    ) WITHOUT ROWID;''',
+    '''CREATE TABLE IF NOT EXISTS filter_coverage (
+        filter TEXT PRIMARY KEY,
+        since INTEGER NOT NULL,
+        until INTEGER NOT NULL
+    );''',
+    '''CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+        job TEXT NOT NULL,
+        url TEXT NOT NULL,
+        since INTEGER NOT NULL,
+        until INTEGER NOT NULL,
+        cursor INTEGER NOT NULL,
+        PRIMARY KEY (job, url)
+    ) WITHOUT ROWID;''',
+    '''CREATE TABLE IF NOT EXISTS replaceable_events (
+        pubkey TEXT NOT NULL,
+        kind INTEGER NOT NULL,
+        d TEXT NOT NULL,
+        id TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        PRIMARY KEY (pubkey, kind, d)
+    ) WITHOUT ROWID;''',
+    '''CREATE TABLE IF NOT EXISTS deletions (
+        target TEXT NOT NULL,
+        pubkey TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        PRIMARY KEY (target, pubkey)
+    ) WITHOUT ROWID;''',
+    '''CREATE TABLE IF NOT EXISTS archived_events (
+        id TEXT PRIMARY KEY,
+        pubkey TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        kind INTEGER NOT NULL,
+        tags TEXT NOT NULL,
+        content TEXT NOT NULL,
+        sig TEXT NOT NULL,
+        subscription_id TEXT,
+        url TEXT,
+        reason TEXT NOT NULL
+    );''',
+    'CREATE INDEX IF NOT EXISTS events_pubkey_created_at_IDX ON events(pubkey, created_at);',
+    'CREATE INDEX IF NOT EXISTS events_kind_created_at_IDX ON events(kind, created_at);',
+    'CREATE INDEX IF NOT EXISTS events_created_at_IDX ON events(created_at);',
+    'CREATE INDEX IF NOT EXISTS event_tags_name_value_IDX ON event_tags(name, value);',
+    '''CREATE TRIGGER IF NOT EXISTS events_delete_tags AFTER DELETE ON events
+    BEGIN
+        DELETE FROM event_tags WHERE event_id = old.id;
+    END;''',
+    '''CREATE TRIGGER IF NOT EXISTS events_delete_seen AFTER DELETE ON events
+    BEGIN
+        DELETE FROM event_seen WHERE event_id = old.id;
+    END;'''
+]
+
+
+def _legacy_row(row: tuple) -> tuple:
+    """a row of the version 1 table with the quotes it was written with undone. Text
+    was put in a double quoted SQL literal with every `'` doubled, which SQLite keeps"""
+    return tuple(value.replace("''", "'") if isinstance(value, str) else value for value in row)
+
+
+def _legacy_tags(tags: str) -> list:
+    """tags from the version 1 table, which stored the python `str` of the list"""
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            return parse(tags)
+        except (ValueError, SyntaxError):
+            pass
+    return []
+
+
+def _tag_rows(event_id: str, tags: list) -> list:
+    return [(event_id, str(tag[0]), str(tag[1])) for tag in tags if len(tag) >= 2]
+
+
+def _replaceable_key(kind: int, tags: list) -> Union[str, None]:
+    """the `d` value that identifies a replaceable event along with its author and
+    kind, '' for kinds without one, or None if the event isn't replaceable"""
+    if kind in (0, 3) or 10_000 <= kind < 20_000:
+        return ''
+    if 30_000 <= kind < 40_000:
+        return next((str(tag[1]) if len(tag) >= 2 else '' for tag in tags if tag and tag[0] == 'd'), '')
+    return None
+
+
+def _replaces(created_at: int, event_id: str, current_created_at: int, current_id: str) -> bool:
+    """newer versions win, and the lowest id of versions from the same second"""
+    return (created_at, current_id) > (current_created_at, event_id)
+
+
+def _deletion_targets(tags: list) -> tuple:
+    """the event ids and `kind:pubkey:d` addresses a deletion's tags point to.
+    `Client.event_deletion` puts every id in one `e` tag."""
+    ids = [str(value) for tag in tags if tag and tag[0] == 'e' for value in tag[1:]
+           if len(str(value)) == 64]
+    addresses = [str(tag[1]) for tag in tags if len(tag) >= 2 and tag[0] == 'a']
+    return ids, addresses
+
+
+def _chunks(values: list, size: int = 500):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class EventStore:
+    def __init__(self, path: Union[str, Path], batch_size: int = 1_000,
+                 commit_interval: float = .5, search: bool = False,
+                 replace: bool = True, archive: bool = False, verify: bool = True):
+        """a SQLite store of events written through one connection with
+        buffered, parameterized group commits.
+
+        Events are kept once each in `events`, keyed by id, with the tags stored
+        as json. Every tag with a value is also a row of `event_tags` so events can
+        be looked up by `#e`/`#p` style tags with an index. Every relay an event
+        was seen on is a row of `event_seen`, with relay urls kept once each in
+        `relays`. Replaceable events and deletions are applied as events are written,
+        see `compact`.
+
+        Args:
+            path (str | Path): database file. The parent directory is created
+                if it doesn't exist.
+            batch_size (int, optional): commit once this many events are buffered.
+                Defaults to 1,000.
+            commit_interval (float, optional): commit buffered events once this many
+                seconds have passed since the last commit. Defaults to .5.
+            search (bool, optional): keep a full text index of event content, see
+                `enable_search`. Defaults to False.
+            replace (bool, optional): keep only the newest version of replaceable
+                events (NIP-16/33) and drop events deleted by their author (NIP-09).
+                Defaults to True.
+            archive (bool, optional): move replaced and deleted events to
+                `archived_events` instead of dropping them. Defaults to False.
+            verify (bool, optional): check the signature of deletions and replaceable
+                events before they are applied, and skip the ones that fail, so a forged
+                event can't drop or replace what its claimed author wrote. Defaults to True.
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.replace = replace
+        self.archive = archive
+        self.verify = verify
+        self.inserted = 0
+        self.rejected = 0
+        self.replaced = 0
+        self.deleted = 0
+        self._has_deletions = False
+        self.lock = RLock()
+        self._pending = []
+        self._pending_seen = []
+        self._last_commit = time.perf_counter()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL;')
+        self.connection.execute('PRAGMA synchronous=NORMAL;')
+        self.migrate()
+        self._has_deletions = self.connection.execute('SELECT 1 FROM deletions LIMIT 1;').fetchone() is not None
+        if search:
+            self.enable_search()
+
+    @property
+    def schema_version(self) -> int:
+        return self.connection.execute('PRAGMA user_version;').fetchone()[0]
+
+    def _has_table(self, name: str) -> bool:
+        return self.connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;",
+                                       (name,)).fetchone() is not None
+
+    def migrate(self):
+        """create the tables, or bring an older database up to `SCHEMA_VERSION`.
+
+        Every statement in the schema is idempotent, so upgrading creates whatever
+        tables and indexes are missing. Version 1 is the `events` table the client
+        used to create, with no primary key, one row per relay and tags stored as
+        the python `str` of the list. Its rows are copied into the new schema once
+        each by id, with every relay in `event_seen`. Before version 6 only the
+        relay an event first came from was kept, in `events.url`.
+        """
+        with self.lock:
+            version = self.schema_version
+            if version == SCHEMA_VERSION:
+                return
+            if version > SCHEMA_VERSION:
+                raise RuntimeError(f'{self.path} has schema version {version}, which is newer '
+                                   f'than this version of nostrfastr supports ({SCHEMA_VERSION})')
+            con = self.connection
+            con.execute('BEGIN;')
+            try:
+                legacy = version == 0 and self._has_table('events')
+                if legacy:
+                    con.execute('ALTER TABLE events RENAME TO events_v1;')
+                    con.execute('DROP INDEX IF EXISTS id_IDX;')
+                    con.execute('DROP INDEX IF EXISTS url_IDX;')
+                for statement in _SCHEMA:
+                    con.execute(statement)
+                if legacy:
+                    self._copy_legacy_events()
+                    con.execute('DROP TABLE events_v1;')
+                elif version > 0:
+                    con.execute('INSERT OR IGNORE INTO relays (url) SELECT DISTINCT url FROM events '
+                                'WHERE url IS NOT NULL;')
+                    con.execute('INSERT OR IGNORE INTO event_seen (event_id, relay_id) SELECT events.id, relays.id '
+                                'FROM events JOIN relays ON relays.url = events.url;')
+                con.execute(f'PRAGMA user_version = {SCHEMA_VERSION};')
+                con.execute('COMMIT;')
+            except BaseException:
+                con.execute('ROLLBACK;')
+                raise
+
+    def _copy_legacy_events(self, chunk_size: int = 10_000):
+        cursor = self.connection.execute(f'SELECT {", ".join(EVENT_COLUMNS)} FROM events_v1 ORDER BY rowid;')
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            events, tags = [], []
+            rows = [_legacy_row(row) for row in rows]
+            for row in rows:
+                event_tags = _legacy_tags(row[4])
+                events.append(row[:4] + (json.dumps(event_tags),) + row[5:])
+                tags.extend(_tag_rows(row[0], event_tags))
+            # copied as they are, replaceable events and deletions are left to `compact`
+            self._write(events, tags, rules=False)
+            self._write_seen([(row[0], row[8], None) for row in rows if row[8]])
+
+    def _is_forged(self, row: tuple) -> bool:
+        """True if an event row doesn't have a valid id and signature"""
+        event_id, pubkey, created_at, kind, tags, content, sig, *_ = row
+        return self.verify and not _verify_event((event_id, pubkey, created_at, kind, json.loads(tags),
+                                                  content, sig))
+
+    def _write(self, events: list, tags: list, rules: bool = True) -> int:
+        replacing = []
+        rules = rules and self.replace
+        if rules:
+            forged = {row[0] for row in events
+                      if (row[3] == 5 or _replaceable_key(row[3], []) is not None) and self._is_forged(row)}
+            if forged:
+                self.rejected += len(forged)
+                events = [row for row in events if row[0] not in forged]
+                tags = [row for row in tags if row[0] not in forged]
+            obsolete, replacing = self._obsolete(events)
+            if obsolete:
+                events = [row for row in events if row[0] not in obsolete]
+                tags = [row for row in tags if row[0] not in obsolete]
+        inserted = self.connection.executemany(
+            f'INSERT OR IGNORE INTO events ({", ".join(EVENT_COLUMNS)}) '
+            f'VALUES ({", ".join("?" * len(EVENT_COLUMNS))});', events).rowcount
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO event_tags (event_id, name, value) VALUES (?, ?, ?);', tags)
+        if rules:
+            self._apply_rules(events, replacing)
+        return inserted
+
+    def _remove(self, event_ids: set, reason: str) -> int:
+        """drop events, or move them to `archived_events`"""
+        removed = 0
+        for chunk in _chunks(sorted(event_ids)):
+            marks = ', '.join('?' * len(chunk))
+            if self.archive:
+                self.connection.execute(
+                    f'INSERT OR IGNORE INTO archived_events ({", ".join(EVENT_COLUMNS)}, reason) '
+                    f'SELECT {", ".join(EVENT_COLUMNS)}, ? FROM events WHERE id IN ({marks});', [reason, *chunk])
+            removed += self.connection.execute(f'DELETE FROM events WHERE id IN ({marks});', chunk).rowcount
+        return removed
+
+    def _record_deletion(self, pubkey: str, created_at: int, tags: list) -> set:
+        """remember the targets of a deletion and return the ids of the stored events it deletes"""
+        ids, addresses = _deletion_targets(tags)
+        targets = ids + [address for address in addresses if address.split(':')[1:2] == [pubkey]]
+        if not targets:
+            return set()
+        self.connection.executemany(
+            'INSERT INTO deletions (target, pubkey, created_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (target, pubkey) DO UPDATE SET created_at = max(created_at, excluded.created_at);',
+            [(target, pubkey, created_at) for target in targets])
+        self._has_deletions = True
+        deleted = set()
+        for chunk in _chunks(ids):
+            deleted.update(row[0] for row in self.connection.execute(
+                f'SELECT id FROM events WHERE id IN ({", ".join("?" * len(chunk))}) AND pubkey = ? AND kind != 5;',
+                [*chunk, pubkey]))
+        for address in addresses:
+            kind, address_pubkey, d = (address.split(':', 2) + ['', ''])[:3]
+            if address_pubkey == pubkey and kind.isdigit():
+                deleted.update(row[0] for row in self.connection.execute(
+                    'SELECT id FROM replaceable_events WHERE pubkey = ? AND kind = ? AND d = ? AND created_at <= ?;',
+                    (pubkey, int(kind), d, created_at)))
+        return deleted
+
+    def _obsolete(self, events: list) -> tuple:
+        """find the new events that are already deleted or replaced, so they aren't
+        written, and the stored versions of replaceable events the rest replace
+
+        Args:
+            events (list): event rows about to be written by `_write`
+
+        Returns:
+            tuple: the ids of the obsolete events, and the (pubkey, kind, d), id,
+                created_at and replaced id of each new version
+        """
+        obsolete = {}
+        if self._has_deletions:
+            deleted = set()
+            for chunk in _chunks([row[0] for row in events]):
+                deleted.update(self.connection.execute(
+                    f'SELECT target, pubkey FROM deletions WHERE target IN ({", ".join("?" * len(chunk))});', chunk))
+            obsolete.update((row[0], 'deleted') for row in events if (row[0], row[1]) in deleted and row[3] != 5)
+        newest = {}
+        for event_id, pubkey, created_at, kind, tags, *_ in events:
+            d = _replaceable_key(kind, json.loads(tags) if 30_000 <= kind < 40_000 else [])
+            if d is None or event_id in obsolete:
+                continue
+            best = newest.get((pubkey, kind, d))
+            if best is None or _replaces(created_at, event_id, best[1], best[0]):
+                if best is not None:
+                    obsolete[best[0]] = 'replaced'
+                newest[(pubkey, kind, d)] = (event_id, created_at)
+            elif best[0] != event_id:
+                obsolete[event_id] = 'replaced'
+        replacing = []
+        for key, (event_id, created_at) in newest.items():
+            pubkey, kind, d = key
+            if self._has_deletions and self.connection.execute(
+                    'SELECT 1 FROM deletions WHERE target = ? AND pubkey = ? AND created_at >= ?;',
+                    (f'{kind}:{pubkey}:{d}', pubkey, created_at)).fetchone():
+                obsolete[event_id] = 'deleted'
+                continue
+            current = self.connection.execute('SELECT id, created_at FROM replaceable_events '
+                                              'WHERE pubkey = ? AND kind = ? AND d = ?;', key).fetchone()
+            if current is None or _replaces(created_at, event_id, current[1], current[0]):
+                replacing.append((key, event_id, created_at, current and current[0]))
+            elif current[0] != event_id:
+                obsolete[event_id] = 'replaced'
+        if self.archive and obsolete:
+            self.connection.executemany(
+                f'INSERT OR IGNORE INTO archived_events ({", ".join(EVENT_COLUMNS)}, reason) '
+                f'VALUES ({", ".join("?" * (len(EVENT_COLUMNS) + 1))});',
+                [tuple(row) + (obsolete[row[0]],) for row in events if row[0] in obsolete])
+        reasons = list(obsolete.values())
+        self.replaced += reasons.count('replaced')
+        self.deleted += reasons.count('deleted')
+        return obsolete, replacing
+
+    def _apply_rules(self, events: list, replacing: list):
+        """record the new versions of replaceable events and apply new deletions,
+        dropping the stored events they make obsolete
+
+        Args:
+            events (list): event rows written by `_write`
+            replacing (list): new versions of replaceable events, see `_obsolete`
+        """
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO replaceable_events (pubkey, kind, d, id, created_at) VALUES (?, ?, ?, ?, ?);',
+            [key + (event_id, created_at) for key, event_id, created_at, _ in replacing])
+        replaced = {previous for *_, previous in replacing if previous is not None}
+        deleted = set()
+        for event_id, pubkey, created_at, kind, tags, *_ in events:
+            if kind == 5:
+                deleted |= self._record_deletion(pubkey, created_at, json.loads(tags))
+        self.deleted += self._remove(deleted, 'deleted')
+        self.replaced += self._remove(replaced - deleted, 'replaced')
+
+    def _write_seen(self, seen: list):
+        """record (event id, relay url, first seen at) sightings, keeping the first one
+        of each event on each relay"""
+        urls = {url for _, url, _ in seen}
+        self.connection.executemany('INSERT OR IGNORE INTO relays (url) VALUES (?);', [(url,) for url in urls])
+        relay_ids = {}
+        for chunk in _chunks(sorted(urls)):
+            relay_ids.update(self.connection.execute(
+                f'SELECT url, id FROM relays WHERE url IN ({", ".join("?" * len(chunk))});', chunk))
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO event_seen (event_id, relay_id, first_seen_at) VALUES (?, ?, ?);',
+            [(event_id, relay_ids[url], seen_at) for event_id, url, seen_at in seen])
+
+    def add(self, event_json: dict):
+        """buffer an event and commit the buffer if it is full or the
+        commit interval has passed
+
+        Args:
+            event_json (dict): the event as nostr json with its `subscription_id`
+                and `url` added
+        """
+        with self.lock:
+            self._pending.append(event_json)
+            if (len(self._pending) >= self.batch_size or
+                    time.perf_counter() - self._last_commit >= self.commit_interval):
+                self.flush()
+
+    def add_many(self, events: list):
+        """buffer many events, see `add`"""
+        with self.lock:
+            self._pending.extend(events)
+            if (len(self._pending) >= self.batch_size or
+                    time.perf_counter() - self._last_commit >= self.commit_interval):
+                self.flush()
+
+    def add_seen(self, event_id: str, url: str):
+        """buffer a sighting of an event on a relay, for copies of an event after
+        the first, see `MessagePool.on_seen`"""
+        with self.lock:
+            self._pending_seen.append((event_id, url, int(time.time())))
+            if (len(self._pending_seen) >= self.batch_size or
+                    time.perf_counter() - self._last_commit >= self.commit_interval):
+                self.flush()
+
+    @property
+    def pending(self) -> int:
+        """number of events buffered but not yet committed"""
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """write and commit every buffered event and sighting in one transaction.
+        Events already in the store are skipped.
+
+        Returns:
+            int: number of new events written
+        """
+        with self.lock:
+            pending, self._pending = self._pending, []
+            seen, self._pending_seen = self._pending_seen, []
+            inserted = 0
+            if pending or seen:
+                events = [(e['id'], e['pubkey'], int(e['created_at']), int(e['kind']),
+                           json.dumps(e['tags']), e['content'], e['sig'],
+                           e.get('subscription_id'), e.get('url')) for e in pending]
+                tags = [row for e in pending for row in _tag_rows(e['id'], e['tags'])]
+                now = int(time.time())
+                seen = [(e['id'], e['url'], now) for e in pending if e.get('url')] + seen
+                with self.connection:
+                    inserted = self._write(events, tags)
+                    self._write_seen(seen)
+                self.inserted += inserted
+            self._last_commit = time.perf_counter()
+        return inserted
+
+    def close(self):
+        """commit buffered events and close the connection"""
+        self.flush()
+        self.connection.close()
+
+# %% ../nbs/05_storage.ipynb 13
+from fastcore.utils import patch
+
+_RETURN_COLUMNS = ['id', 'pubkey', 'created_at', 'kind', 'tags', 'content', 'sig']
+
+
+def _prefix_condition(column: str, values: list) -> tuple:
+    exact = [value for value in values if len(value) == 64]
+    conditions, params = [], []
+    if exact:
+        conditions.append(f'{column} IN ({", ".join("?" * len(exact))})')
+        params += exact
+    for prefix in (value for value in values if len(value) < 64):
+        # hex digits all sort below 'g', so this range holds every id with the prefix
+        conditions.append(f'({column} >= ? AND {column} < ?)')
+        params += [prefix, prefix + 'g']
+    return f'({" OR ".join(conditions) or "0"})', params
+
+
+def _filter_conditions(filter_json: dict) -> tuple:
+    conditions, params = [], []
+    if 'ids' in filter_json:
+        condition, values = _prefix_condition('id', filter_json['ids'])
+        conditions.append(condition)
+        params += values
+    if 'authors' in filter_json:
+        condition, values = _prefix_condition('pubkey', filter_json['authors'])
+        conditions.append(condition)
+        params += values
+    if 'kinds' in filter_json:
+        kinds = [int(kind) for kind in filter_json['kinds']]
+        conditions.append(f'kind IN ({", ".join("?" * len(kinds))})' if kinds else '0')
+        params += kinds
+    if filter_json.get('since') is not None:
+        conditions.append('created_at >= ?')
+        params.append(int(filter_json['since']))
+    if filter_json.get('until') is not None:
+        conditions.append('created_at <= ?')
+        params.append(int(filter_json['until']))
+    for key, values in filter_json.items():
+        if key.startswith('#'):
+            conditions.append('id IN (SELECT event_id FROM event_tags WHERE name = ? '
+                              f'AND value IN ({", ".join("?" * len(values))}))' if values else '0')
+            params += [key[1:], *map(str, values)] if values else []
+    return conditions, params
+
+
+def compile_filter(filter_json: dict, columns: list = None) -> tuple:
+    """compile a nostr filter into SQL against the `events` table
+
+    Args:
+        filter_json (dict): the filter as sent to relays, see `Filter.to_json_object`
+        columns (list, optional): columns or expressions to select. Defaults to None,
+            in which case the columns of the nostr json are selected.
+
+    Returns:
+        tuple: the SQL and its parameters
+    """
+    conditions, params = _filter_conditions(filter_json)
+    sql = f'SELECT {", ".join(columns or _RETURN_COLUMNS)} FROM events'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += ' ORDER BY created_at DESC'
+    if filter_json.get('limit') is not None:
+        sql += ' LIMIT ?'
+        params.append(int(filter_json['limit']))
+    return sql, params
+
+
+@patch
+def query(self: EventStore, filters: list) -> list:
+    """the stored events that match any of the filters, newest first
+
+    Args:
+        filters (list): filters in the json form sent to relays
+
+    Returns:
+        list: each event as nostr json
+    """
+    if isinstance(filters, dict):
+        filters = [filters]
+    events = {}
+    with self.lock:
+        self.flush()
+        for filter_json in filters:
+            for row in self.connection.execute(*compile_filter(filter_json)):
+                event_json = dict(zip(_RETURN_COLUMNS, row))
+                event_json['tags'] = json.loads(event_json['tags'])
+                events[event_json['id']] = event_json
+    return sorted(events.values(), key=lambda event_json: event_json['created_at'], reverse=True)
+
+# %% ../nbs/05_storage.ipynb 17
+def coverage_key(filter_json: dict) -> str:
+    """identifies a filter by everything except its time range"""
+    return json.dumps({key: sorted(value) if isinstance(value, list) else value
+                       for key, value in filter_json.items() if key not in ('since', 'until')},
+                      sort_keys=True)
+
+
+@patch
+def coverage(self: EventStore, filter_json: dict) -> Union[tuple, None]:
+    """the (since, until) range every event for the filter is stored for, if any"""
+    return self.connection.execute('SELECT since, until FROM filter_coverage WHERE filter = ?;',
+                                   (coverage_key(filter_json),)).fetchone()
+
+
+@patch
+def add_coverage(self: EventStore, filter_json: dict, since: int, until: int):
+    """record that every event for the filter from `since` to `until` is stored. A
+    range that overlaps the current one extends it, otherwise the newer range is kept.
+    """
+    with self.lock:
+        covered = self.coverage(filter_json)
+        if covered is not None:
+            covered_since, covered_until = covered
+            if since <= covered_until and until >= covered_since:
+                since, until = min(since, covered_since), max(until, covered_until)
+            elif until < covered_since:
+                return
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO filter_coverage (filter, since, until) '
+                                    'VALUES (?, ?, ?);', (coverage_key(filter_json), since, until))
+
+
+@patch
+def uncovered(self: EventStore, filter_json: dict, now: int = None, max_age: float = 0) -> list:
+    """split a filter into the windows of time that still have to be requested
+    from relays
+
+    Args:
+        filter_json (dict): the filter as sent to relays
+        now (int, optional): current unix time. Defaults to None, which uses the clock.
+        max_age (float, optional): treat the coverage as current if it ends no more than
+            this many seconds ago. Defaults to 0.
+
+    Returns:
+        list: filters for each window that isn't covered
+    """
+    now = int(time.time()) if now is None else now
+    since = filter_json.get('since') or 0
+    until = min(filter_json.get('until') or now, now)
+    covered = self.coverage(filter_json)
+    if covered is None:
+        return [filter_json]
+    covered_since, covered_until = covered
+    if covered_until >= now - max_age:
+        covered_until = max(covered_until, until)
+    windows = []
+    if since < covered_since:
+        windows.append(dict(filter_json, since=since, until=min(until, covered_since)))
+    if until > covered_until:
+        windows.append(dict(filter_json, since=max(since, covered_until)))
+    return windows
+
+# %% ../nbs/05_storage.ipynb 20
+@patch
+def backfill_checkpoints(self: EventStore, job: str) -> dict:
+    """the (since, until, cursor) of each relay for a backfill job, by url"""
+    with self.lock:
+        rows = self.connection.execute('SELECT url, since, until, cursor FROM backfill_checkpoints '
+                                       'WHERE job = ?;', (job,)).fetchall()
+    return {url: (since, until, cursor) for url, since, until, cursor in rows}
+
+
+@patch
+def save_backfill_checkpoint(self: EventStore, job: str, url: str, since: int, until: int, cursor: int):
+    """record that every event of a backfill job newer than `cursor` was received
+    from a relay. Buffered events are committed first, so a checkpoint never gets
+    ahead of the events it stands for.
+    """
+    with self.lock:
+        self.flush()
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO backfill_checkpoints (job, url, since, until, cursor) '
+                                    'VALUES (?, ?, ?, ?, ?);', (job, url, since, until, cursor))
+
+# %% ../nbs/05_storage.ipynb 23
+@patch
+def seen_on(self: EventStore, event_id: str) -> dict:
+    """when an event was first seen on each relay, by url. The time is None for
+    sightings migrated from before it was recorded."""
+    with self.lock:
+        self.flush()
+        rows = self.connection.execute('SELECT relays.url, event_seen.first_seen_at FROM event_seen '
+                                       'JOIN relays ON relays.id = event_seen.relay_id '
+                                       'WHERE event_seen.event_id = ?;', (event_id,)).fetchall()
+    return dict(rows)
+
+
+@patch
+def relay_counts(self: EventStore, filters: Union[list, dict] = None) -> dict:
+    """the number of stored events seen on each relay, and how many of them
+    were seen on no other relay
+
+    Args:
+        filters (list | dict, optional): only count events that match one of these
+            filters. Their `limit` is ignored. Defaults to None.
+
+    Returns:
+        dict: {'events': count, 'only_here': count} by relay url
+    """
+    if isinstance(filters, dict):
+        filters = [filters]
+    sql, params = 'SELECT event_id, relay_id FROM event_seen', []
+    if filters:
+        matches = []
+        for filter_json in filters:
+            conditions, values = _filter_conditions(filter_json)
+            matches.append(f'({" AND ".join(conditions) or "1"})')
+            params += values
+        sql += f' WHERE event_id IN (SELECT id FROM events WHERE {" OR ".join(matches)})'
+    sql = ('SELECT relays.url, count(*), sum(copies = 1) FROM '
+           f'(SELECT relay_id, count(*) OVER (PARTITION BY event_id) AS copies FROM ({sql})) '
+           'JOIN relays ON relays.id = relay_id GROUP BY relays.url ORDER BY relays.url;')
+    with self.lock:
+        self.flush()
+        rows = self.connection.execute(sql, params).fetchall()
+    return {url: {'events': events, 'only_here': only_here} for url, events, only_here in rows}
+
+# %% ../nbs/05_storage.ipynb 29
+def _union_filters(filters: list, columns: list) -> tuple:
+    queries = [compile_filter(filter_json, columns) for filter_json in filters]
+    if len(queries) == 1:
+        return queries[0]
+    sql = ' UNION '.join(f'SELECT * FROM ({query})' for query, _ in queries)
+    return f'{sql} ORDER BY created_at DESC', [param for _, params in queries for param in params]
+
+
+@patch
+def _read_chunks(self: EventStore, filters: Union[list, dict, None], chunksize: int, columns: list):
+    if filters is None:
+        filters = [{}]
+    elif isinstance(filters, dict):
+        filters = [filters]
+    self.flush()
+    # WAL lets a second connection read a snapshot while the store keeps writing
+    connection = sqlite3.connect(f'{self.path.resolve().as_uri()}?mode=ro', uri=True)
+    try:
+        cursor = connection.execute(*_union_filters(filters, columns))
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                break
+            yield rows
+    finally:
+        connection.close()
+
+
+@patch
+def iter_events(self: EventStore, filters: Union[list, dict] = None, chunksize: int = 10_000):
+    """the stored events that match any of the filters, newest first, a chunk at a time
+
+    Args:
+        filters (list | dict, optional): filters in the json form sent to relays.
+            Defaults to None, which matches every event.
+        chunksize (int, optional): most events in each chunk. Defaults to 10,000.
+
+    Yields:
+        list: the next chunk of events as nostr json with their `subscription_id` and `url`
+    """
+    for rows in self._read_chunks(filters, chunksize, EVENT_COLUMNS):
+        events = [dict(zip(EVENT_COLUMNS, row)) for row in rows]
+        for event_json in events:
+            event_json['tags'] = json.loads(event_json['tags'])
+        yield events
+
+
+@patch
+def export_dataset(self: EventStore, directory: Union[str, Path], filters: Union[list, dict] = None,
+                   format: str = 'parquet', chunksize: int = 100_000) -> int:
+    """write the stored events to a dataset partitioned by `date` and `kind`
+
+    Args:
+        directory (str | Path): directory to write to. It must be empty or not exist yet.
+        filters (list | dict, optional): only export events that match one of these
+            filters. Defaults to None, which exports every event.
+        format (str, optional): 'parquet', or 'ipc' for Arrow IPC files. Defaults to 'parquet'.
+        chunksize (int, optional): events read and written at a time. Defaults to 100,000.
+
+    Returns:
+        int: number of events exported
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError('exporting events needs pyarrow, install it with `pip install pyarrow`') from e
+    directory = Path(directory)
+    if directory.exists() and any(directory.iterdir()):
+        raise FileExistsError(f'{directory} is not empty')
+    schema = pa.schema([('id', pa.string()), ('pubkey', pa.string()), ('created_at', pa.int64()),
+                        ('kind', pa.int32()), ('tags', pa.list_(pa.list_(pa.string()))),
+                        ('content', pa.string()), ('sig', pa.string()), ('subscription_id', pa.string()),
+                        ('url', pa.string()), ('date', pa.string())])
+    partitioning = ds.partitioning(pa.schema([schema.field('date'), schema.field('kind')]), flavor='hive')
+    extension = 'arrow' if format == 'ipc' else format
+    columns = EVENT_COLUMNS + ["date(created_at, 'unixepoch') AS date"]
+    exported = 0
+    for chunk, rows in enumerate(self._read_chunks(filters, chunksize, columns)):
+        values = [list(column) for column in zip(*rows)]
+        tags = schema.names.index('tags')
+        values[tags] = [[[str(value) for value in tag] for tag in json.loads(event_tags)]
+                        for event_tags in values[tags]]
+        table = pa.Table.from_arrays([pa.array(column, type=field.type)
+                                      for column, field in zip(values, schema)], schema=schema)
+        ds.write_dataset(table, directory, format=format, partitioning=partitioning,
+                         basename_template=f'part-{chunk}-{{i}}.{extension}',
+                         existing_data_behavior='overwrite_or_ignore')
+        exported += len(rows)
+    return exported
+
+# %% ../nbs/05_storage.ipynb 33
+_SEARCH_SCHEMA = [
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        content, content='events', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+    );''',
+    '''CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events
+    BEGIN
+        INSERT INTO events_fts (rowid, content) VALUES (new.rowid, new.content);
+    END;''',
+    '''CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events
+    BEGIN
+        INSERT INTO events_fts (events_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+    END;'''
+]
+
+
+@patch(as_prop=True)
+def has_search(self: EventStore) -> bool:
+    """True if the store keeps a full text index, see `enable_search`"""
+    return self._has_table('events_fts')
+
+
+@patch
+def enable_search(self: EventStore):
+    """create the full text index of event content and index every stored event"""
+    with self.lock:
+        if self.has_search:
+            return
+        self.flush()
+        with self.connection:
+            for statement in _SEARCH_SCHEMA:
+                self.connection.execute(statement)
+            self.connection.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild');")
+
+
+def _match_query(text: str) -> str:
+    """every word of the text as a quoted FTS5 term, so punctuation isn't read as query syntax"""
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in text.split())
+
+
+@patch
+def search(self: EventStore, text: str, filters: Union[list, dict] = None, limit: int = 100,
+           raw: bool = False, rank: bool = True) -> list:
+    """the stored events whose content has every word of the text, best match first
+
+    Args:
+        text (str): words to search for
+        filters (list | dict, optional): only return events that match one of these
+            filters. Their `limit` is ignored. Defaults to None.
+        limit (int, optional): most events to return. Defaults to 100.
+        raw (bool, optional): pass the text to FTS5 as it is, so the
+            [query syntax](https://www.sqlite.org/fts5.html#full_text_query_syntax)
+            like `OR`, `NEAR` and `prefix*` can be used. Defaults to False.
+        rank (bool, optional): order by bm25 rank. bm25 scores every match, which takes
+            seconds for a word in most notes, so pass False to get the most recently
+            stored matches instead. Defaults to True.
+
+    Returns:
+        list: each event as nostr json
+    """
+    if not self.has_search:
+        raise RuntimeError('the store has no full text index, call `enable_search` first')
+    if isinstance(filters, dict):
+        filters = [filters]
+    sql = (f'SELECT {", ".join(f"events.{column}" for column in _RETURN_COLUMNS)} FROM events_fts '
+           'JOIN events ON events.rowid = events_fts.rowid WHERE events_fts MATCH ?')
+    params = [text if raw else _match_query(text)]
+    if filters:
+        matches = []
+        for filter_json in filters:
+            conditions, values = _filter_conditions(filter_json)
+            matches.append(f'({" AND ".join(conditions) or "1"})')
+            params += values
+        sql += f' AND ({" OR ".join(matches)})'
+    sql += (' ORDER BY events_fts.rank, events.created_at DESC' if rank else
+            ' ORDER BY events_fts.rowid DESC')
+    sql += ' LIMIT ?;'
+    params.append(limit)
+    with self.lock:
+        self.flush()
+        rows = self.connection.execute(sql, params).fetchall()
+    events = [dict(zip(_RETURN_COLUMNS, row)) for row in rows]
+    for event_json in events:
+        event_json['tags'] = json.loads(event_json['tags'])
+    return events
+
+# %% ../nbs/05_storage.ipynb 37
+@patch(as_prop=True)
+def size(self: EventStore) -> int:
+    """bytes used by the database pages"""
+    page_count, = self.connection.execute('PRAGMA page_count;').fetchone()
+    page_size, = self.connection.execute('PRAGMA page_size;').fetchone()
+    return page_count * page_size
+
+
+@patch
+def compact(self: EventStore, vacuum: bool = True) -> dict:
+    """apply replaceable events and deletions to every stored event and give the
+    freed space back to the file system. Needed once for a database written before
+    the rules were applied on insert. Deletions and replaceable events whose
+    signature doesn't check out are left as they are without being applied.
+
+    Args:
+        vacuum (bool, optional): rebuild the database file so it shrinks. This
+            rewrites the whole file and needs as much free disk space as the file
+            takes. Defaults to True.
+
+    Returns:
+        dict: number of events replaced and deleted, and the size in bytes before and after
+    """
+    with self.lock:
+        self.flush()
+        size, replaced, deleted = self.size, self.replaced, self.deleted
+        with self.connection:
+            self.connection.execute('DELETE FROM replaceable_events;')
+            current, obsolete = {}, set()
+            rows = self.connection.execute(
+                'SELECT id, pubkey, created_at, kind, tags, content, sig FROM events WHERE kind IN (0, 3) '
+                'OR kind BETWEEN 10000 AND 19999 OR kind BETWEEN 30000 AND 39999;')
+            for row in rows:
+                if self._is_forged(row):
+                    continue
+                event_id, pubkey, created_at, kind, tags, *_ = row
+                key = (pubkey, kind, _replaceable_key(kind, json.loads(tags)))
+                if key not in current or _replaces(created_at, event_id, *current[key][::-1]):
+                    if key in current:
+                        obsolete.add(current[key][0])
+                    current[key] = (event_id, created_at)
+                else:
+                    obsolete.add(event_id)
+            self.connection.executemany(
+                'INSERT INTO replaceable_events (pubkey, kind, d, id, created_at) VALUES (?, ?, ?, ?, ?);',
+                [key + value for key, value in current.items()])
+            self.replaced += self._remove(obsolete, 'replaced')
+            deletions = self.connection.execute(
+                'SELECT id, pubkey, created_at, kind, tags, content, sig FROM events '
+                'WHERE kind = 5 ORDER BY created_at;').fetchall()
+            for row in deletions:
+                if self._is_forged(row):
+                    continue
+                _, pubkey, created_at, _, tags, *_ = row
+                self.deleted += self._remove(self._record_deletion(pubkey, created_at, json.loads(tags)), 'deleted')
+            # sightings of events that were dropped before they were written
+            self.connection.execute('DELETE FROM event_seen WHERE event_id NOT IN (SELECT id FROM events);')
+        if vacuum:
+            if self.has_search:
+                with self.connection:
+                    self.connection.execute("INSERT INTO events_fts (events_fts) VALUES ('optimize');")
+            self.connection.execute('VACUUM;')
+            self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE);')
+        return {'replaced': self.replaced - replaced, 'deleted': self.deleted - deleted,
+                'size_before': size, 'size_after': self.size}
+
+# %% ../nbs/05_storage.ipynb 47
+import re
+import heapq
+import itertools
+from datetime import datetime, timedelta, timezone
+
+_PERIOD_FORMATS = {'day': '%Y-%m-%d', 'month': '%Y-%m', 'year': '%Y'}
+# the last second of 9998, so the end of any period can still be represented
+_LATEST = 253_370_764_799
+
+
+def _period_key(created_at: int, period: str) -> str:
+    """the name of the period an event was created in, like '2023-01' for a month"""
+    created_at = min(max(int(created_at), 0), _LATEST)
+    return datetime.fromtimestamp(created_at, timezone.utc).strftime(_PERIOD_FORMATS[period])
+
+
+def _period_bounds(key: str) -> tuple:
+    """the unix time a period starts at and the time it ends before"""
+    period = {4: 'year', 7: 'month', 10: 'day'}[len(key)]
+    start = datetime.strptime(key, _PERIOD_FORMATS[period]).replace(tzinfo=timezone.utc)
+    if period == 'day':
+        end = start + timedelta(days=1)
+    elif period == 'month':
+        end = (start + timedelta(days=32)).replace(day=1)
+    else:
+        end = start.replace(year=start.year + 1)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def _is_regular(kind: int) -> bool:
+    """True for the events that are kept in partitions, everything except
+    replaceable events and deletions"""
+    return kind != 5 and _replaceable_key(kind, []) is None
+
+
+def _time_range(filters: Union[list, dict, None]) -> tuple:
+    """the (since, until) that every filter lies within, None where one is unbounded"""
+    if isinstance(filters, dict):
+        filters = [filters]
+    if not filters:
+        return None, None
+    sinces = [filter_json.get('since') for filter_json in filters]
+    untils = [filter_json.get('until') for filter_json in filters]
+    return (None if None in sinces else min(sinces)), (None if None in untils else max(untils))
+
+
+class RetentionRule:
+    def __init__(self, name: str, max_age: float = None, kinds: list = None, authors: list = None):
+        """events of some kinds or authors kept in partitions of their own, so they
+        can be dropped a whole partition at a time
+
+        Args:
+            name (str): name of the directory the rule's partitions are kept in
+            max_age (float, optional): seconds to keep a partition for after its period
+                ends. Defaults to None, which keeps it forever.
+            kinds (list, optional): kinds the rule applies to. Defaults to None, which is
+                every kind.
+            authors (list, optional): public keys the rule applies to. Defaults to None,
+                which is every author.
+        """
+        if not re.fullmatch(r'[\w.-]+', name):
+            raise ValueError(f'{name!r} is not a valid partition directory name')
+        self.name = name
+        self.max_age = max_age
+        self.kinds = None if kinds is None else {int(kind) for kind in kinds}
+        self.authors = None if authors is None else set(authors)
+
+    def __repr__(self) -> str:
+        return f'RetentionRule({self.name!r}, max_age={self.max_age})'
+
+    def matches(self, pubkey: str, kind: int) -> bool:
+        return ((self.kinds is None or kind in self.kinds) and
+                (self.authors is None or pubkey in self.authors))
+
+    def expired(self, end: int, now: int) -> bool:
+        """True if a partition whose period ends at `end` is past the rule's age"""
+        return self.max_age is not None and end <= now - self.max_age
+
+
+class PartitionedEventStore:
+    def __init__(self, path: Union[str, Path], period: str = 'month', rules: list = None,
+                 batch_size: int = 1_000, commit_interval: float = .5, search: bool = False,
+                 replace: bool = True, archive: bool = False, verify: bool = True):
+        """an `EventStore` that keeps regular events in a database per period of
+        time, which can be dropped whole by `apply_retention`.
+
+        Args:
+            path (str | Path): main database file. Partitions are kept in a directory
+                next to it.
+            period (str, optional): 'day', 'month' or 'year' of events in each partition.
+                Defaults to 'month'.
+            rules (list, optional): `RetentionRule`s, the first one an event matches
+                decides where it goes. Defaults to None, which keeps every event.
+            batch_size (int, optional): see `EventStore`. Defaults to 1,000.
+            commit_interval (float, optional): see `EventStore`. Defaults to .5.
+            search (bool, optional): see `EventStore`. Defaults to False.
+            replace (bool, optional): see `EventStore`. Defaults to True.
+            archive (bool, optional): see `EventStore`. Replaced events are archived in
+                the main database and deleted events in their partition. Defaults to False.
+            verify (bool, optional): see `EventStore`. Defaults to True.
+        """
+        if period not in _PERIOD_FORMATS:
+            raise ValueError(f'period must be one of {", ".join(_PERIOD_FORMATS)}, not {period!r}')
+        self.path = Path(path)
+        self.directory = self.path.parent / f'{self.path.stem}-partitions'
+        self.period = period
+        self.rules = list(rules or [])
+        if not any(rule.kinds is None and rule.authors is None for rule in self.rules):
+            self.rules.append(RetentionRule('events'))
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f'retention rules need different names, got {names}')
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.search = search
+        self.archive = archive
+        self.main = EventStore(self.path, batch_size=batch_size, commit_interval=commit_interval,
+                               search=search, replace=replace, archive=archive, verify=verify)
+        self.inserted = 0
+        self.expired = 0
+        self._deleted = 0
+        self.lock = RLock()
+        self._pending = []
+        self._pending_seen = []
+        self._last_commit = time.perf_counter()
+        # connections of each thread's own for `has_event`, dropped with the partitions
+        self._readers = local()
+        self._generation = 0
+        # partitions are opened the first time they are used
+        self.partitions = {(file.parent.name, file.stem): None
+                           for file in sorted(self.directory.glob('*/*.sqlite'))}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """the connection to the main database"""
+        return self.main.connection
+
+    @property
+    def schema_version(self) -> int:
+        return self.main.schema_version
+
+    @property
+    def replaced(self) -> int:
+        return self.main.replaced
+
+    @property
+    def deleted(self) -> int:
+        return self.main.deleted + self._deleted
+
+    @property
+    def pending(self) -> int:
+        """number of events buffered but not yet committed"""
+        return len(self._pending)
+
+    def _partition(self, name: str, key: str) -> EventStore:
+        store = self.partitions.get((name, key))
+        if store is None:
+            store = EventStore(self.directory / name / f'{key}.sqlite', batch_size=self.batch_size,
+                               commit_interval=self.commit_interval, search=self.search,
+                               replace=False, archive=self.archive)
+            self.partitions[(name, key)] = store
+        return store
+
+    def _stores(self, since: int = None, until: int = None) -> list:
+        """(start, end, store) of the main database and of every partition that
+        overlaps a range of time, newest first. The main database has no bounds."""
+        bounds = []
+        for name, key in self.partitions:
+            start, end = _period_bounds(key)
+            if (since is None or end > since) and (until is None or start <= until):
+                bounds.append((end, start, name, key))
+        return [(None, None, self.main)] + [(start, end, self._partition(name, key))
+                                            for end, start, name, key in sorted(bounds, reverse=True)]
+
+    def _route(self, pubkey: str, kind: int, created_at: int, now: int) -> Union[tuple, None]:
+        """the (rule name, period) partition of a regular event, or None if it is
+        already past its rule's age"""
+        rule = next(rule for rule in self.rules if rule.matches(pubkey, kind))
+        key = _period_key(created_at, self.period)
+        if rule.expired(_period_bounds(key)[1], now):
+            return None
+        return rule.name, key
+
+    def _locate(self, event_ids: set) -> dict:
+        """the store each of the events is kept in, by id"""
+        event_ids, located = set(event_ids), {}
+        for _, _, store in self._stores():
+            if not event_ids:
+                break
+            for chunk in _chunks(sorted(event_ids)):
+                for event_id, in store.connection.execute(
+                        f'SELECT id FROM events WHERE id IN ({", ".join("?" * len(chunk))});', chunk):
+                    located[event_id] = store
+            event_ids -= set(located)
+        return located
+
+    def _remove_deleted(self, store: EventStore, targets: set) -> int:
+        """drop the events of a partition that are (id, pubkey) targets of deletions"""
+        ids = sorted({event_id for event_id, _ in targets})
+        deleted = set()
+        for chunk in _chunks(ids):
+            deleted.update(event_id for event_id, pubkey in store.connection.execute(
+                f'SELECT id, pubkey FROM events WHERE id IN ({", ".join("?" * len(chunk))});', chunk)
+                if (event_id, pubkey) in targets)
+        if not deleted:
+            return 0
+        with store.connection:
+            removed = store._remove(deleted, 'deleted')
+        self._deleted += removed
+        return removed
+
+    def _reader(self, path: Path) -> sqlite3.Connection:
+        """the calling thread's own connection to one of the databases"""
+        readers = self._readers
+        if getattr(readers, 'generation', None) != self._generation:
+            for con in getattr(readers, 'connections', {}).values():
+                con.close()
+            readers.connections, readers.generation = {}, self._generation
+        con = readers.connections.get(path)
+        if con is None:
+            # mode=rw so a partition dropped in the meantime isn't created again empty
+            con = sqlite3.connect(f'{path.resolve().as_uri()}?mode=rw', uri=True, check_same_thread=False)
+            readers.connections[path] = con
+        return con
+
+    def has_event(self, event_id: str, created_at: int = None) -> bool:
+        """True if the event is stored in the main database or a partition. Given the
+        event's `created_at` only the partitions of its period are looked in.
+
+        Reads with connections of the calling thread's own rather than under `lock`,
+        so a flush or `apply_retention` doesn't hold up the check."""
+        key = None if created_at is None else _period_key(created_at, self.period)
+        paths = [self.path] + [self.directory / name / f'{period}.sqlite'
+                               for name, period in list(self.partitions) if key in (None, period)]
+        for path in paths:
+            try:
+                if self._reader(path).execute('SELECT 1 FROM events WHERE id = ?;', (event_id,)).fetchone():
+                    return True
+            except sqlite3.OperationalError:
+                # a partition dropped by `apply_retention` since the list was taken
+                continue
+        return False
+
+    def add(self, event_json: dict):
+        """buffer an event, see `EventStore.add`"""
+        with self.lock:
+            self._pending.append(event_json)
+            if (len(self._pending) >= self.batch_size or
+                    time.perf_counter() - self._last_commit >= self.commit_interval):
+                self.flush()
+
+    def add_many(self, events: list):
+        """buffer many events, see `EventStore.add`"""
+        with self.lock:
+            self._pending.extend(events)
+            if (len(self._pending) >= self.batch_size or
+                    time.perf_counter() - self._last_commit >= self.commit_interval):
+                self.flush()
+
+    def add_seen(self, event_id: str, url: str):
+        """buffer a sighting of an event on a relay, see `EventStore.add_seen`"""
+        with self.lock:
+            self._pending_seen.append((event_id, url, int(time.time())))
+            if (len(self._pending_seen) >= self.batch_size or
+                    time.perf_counter() - self._last_commit >= self.commit_interval):
+                self.flush()
+
+    def flush(self) -> int:
+        """write every buffered event to the main database or its partition and
+        commit, one transaction per database. Sightings are written to the database
+        their event is in.
+
+        Returns:
+            int: number of new events written
+        """
+        with self.lock:
+            pending, self._pending = self._pending, []
+            seen, self._pending_seen = self._pending_seen, []
+            inserted = 0
+            if pending or seen:
+                now = int(time.time())
+                stores, written, deletions = {}, {}, {}
+                for event_json in pending:
+                    kind = int(event_json['kind'])
+                    if not _is_regular(kind):
+                        store = self.main
+                        if kind == 5:
+                            ids, _ = _deletion_targets(event_json['tags'])
+                            deletions.update(((event_id, event_json['pubkey']), None) for event_id in ids)
+                    else:
+                        partition = self._route(event_json['pubkey'], kind, event_json['created_at'], now)
+                        if partition is None:
+                            self.expired += 1
+                            continue
+                        store = self._partition(*partition)
+                    store._pending.append(event_json)
+                    stores[event_json['id']] = store
+                    written.setdefault(store, []).append(event_json['id'])
+                missing = {event_id for event_id, _, _ in seen if event_id not in stores}
+                if missing:
+                    stores.update(self._locate(missing))
+                for event_id, url, seen_at in seen:
+                    if event_id in stores:
+                        stores[event_id]._pending_seen.append((event_id, url, seen_at))
+                # the main database first, so deletions are recorded before the partitions are written
+                inserted += self.main.flush()
+                for store in set(stores.values()) - {self.main}:
+                    inserted += store.flush()
+                if self.main.replace:
+                    self._apply_deletions(set(deletions), written)
+                self.inserted += inserted
+            self._last_commit = time.perf_counter()
+        return inserted
+
+    def _apply_deletions(self, targets: set, written: dict):
+        """drop the events in partitions that new deletions point to, and the new
+        events that were deleted before they arrived"""
+        if targets:
+            # only the deletions the main database recorded, it skips forged ones
+            recorded = set()
+            for chunk in _chunks(sorted({target for target, _ in targets})):
+                recorded.update(self.main.connection.execute(
+                    f'SELECT target, pubkey FROM deletions WHERE target IN ({", ".join("?" * len(chunk))});', chunk))
+            targets = targets & recorded
+        stores = [store for _, _, store in self._stores()[1:]] if targets else list(written)
+        for store in stores:
+            if store is self.main:
+                continue
+            store_targets = set(targets)
+            if store in written and self.main._has_deletions:
+                for chunk in _chunks(written[store]):
+                    store_targets.update(self.main.connection.execute(
+                        f'SELECT target, pubkey FROM deletions WHERE target IN ({", ".join("?" * len(chunk))});',
+                        chunk))
+            if store_targets:
+                self._remove_deleted(store, store_targets)
+
+    def close(self):
+        """commit buffered events and close every database"""
+        with self.lock:
+            self.flush()
+            for _, _, store in self._stores():
+                store.close()
+
+# %% ../nbs/05_storage.ipynb 48
+@patch
+def recent_ids(self: EventStore, limit: int = 10_000) -> list:
+    """the ids of the newest stored events, newest first"""
+    with self.lock:
+        self.flush()
+        return [event_id for event_id, in self.connection.execute(
+            'SELECT id FROM events ORDER BY created_at DESC LIMIT ?;', (limit,))]
+
+
+@patch
+def recent_ids(self: PartitionedEventStore, limit: int = 10_000) -> list:
+    """the ids of the newest stored events, newest first"""
+    with self.lock:
+        self.flush()
+        rows = []
+        for _, end, store in self._stores():
+            if len(rows) >= limit and end is not None and end <= rows[limit - 1][0]:
+                break
+            rows = sorted(rows + store.connection.execute(
+                'SELECT created_at, id FROM events ORDER BY created_at DESC LIMIT ?;', (limit,)).fetchall(),
+                reverse=True)
+    return [event_id for _, event_id in rows[:limit]]
+
+
+@patch
+def query(self: PartitionedEventStore, filters: list) -> list:
+    """the stored events that match any of the filters, newest first, see `EventStore.query`"""
+    if isinstance(filters, dict):
+        filters = [filters]
+    events = {}
+    with self.lock:
+        self.flush()
+        for filter_json in filters:
+            limit = filter_json.get('limit')
+            matched = []
+            for _, end, store in self._stores(filter_json.get('since'), filter_json.get('until')):
+                # partitions are in order of their end, so none of the rest has a newer event
+                if limit is not None and len(matched) >= limit and end is not None and \
+                        end <= matched[limit - 1]['created_at']:
+                    break
+                matched = sorted(matched + store.query([filter_json]),
+                                 key=lambda event_json: event_json['created_at'], reverse=True)
+            events.update((event_json['id'], event_json) for event_json in matched[:limit])
+    return sorted(events.values(), key=lambda event_json: event_json['created_at'], reverse=True)
+
+
+@patch
+def _read_chunks(self: PartitionedEventStore, filters: Union[list, dict, None], chunksize: int, columns: list):
+    with self.lock:
+        self.flush()
+        stores = [store for _, _, store in self._stores(*_time_range(filters))]
+    # `columns` start with `EVENT_COLUMNS`, so `created_at` is the third
+    rows = heapq.merge(*(itertools.chain.from_iterable(store._read_chunks(filters, chunksize, columns))
+                         for store in stores), key=lambda row: row[2], reverse=True)
+    while True:
+        chunk = list(itertools.islice(rows, chunksize))
+        if not chunk:
+            break
+        yield chunk
+
+
+PartitionedEventStore.iter_events = EventStore.iter_events
+PartitionedEventStore.export_dataset = EventStore.export_dataset
+
+
+@patch
+def seen_on(self: PartitionedEventStore, event_id: str) -> dict:
+    """when an event was first seen on each relay, see `EventStore.seen_on`"""
+    with self.lock:
+        self.flush()
+        store = self._locate({event_id}).get(event_id)
+        return {} if store is None else store.seen_on(event_id)
+
+
+@patch
+def relay_counts(self: PartitionedEventStore, filters: Union[list, dict] = None) -> dict:
+    """the number of stored events seen on each relay, see `EventStore.relay_counts`.
+    An event is in one database only, so the counts of each add up."""
+    counts = {}
+    with self.lock:
+        self.flush()
+        for _, _, store in self._stores(*_time_range(filters)):
+            for url, count in store.relay_counts(filters).items():
+                total = counts.setdefault(url, {'events': 0, 'only_here': 0})
+                total['events'] += count['events']
+                total['only_here'] += count['only_here']
+    return dict(sorted(counts.items()))
+
+
+@patch(as_prop=True)
+def has_search(self: PartitionedEventStore) -> bool:
+    """True if the store keeps a full text index, see `EventStore.enable_search`"""
+    return self.main.has_search
+
+
+@patch
+def enable_search(self: PartitionedEventStore):
+    """create the full text index of event content in every database"""
+    with self.lock:
+        self.flush()
+        self.search = True
+        for _, _, store in self._stores():
+            store.enable_search()
+
+
+@patch
+def search(self: PartitionedEventStore, text: str, filters: Union[list, dict] = None, limit: int = 100,
+           raw: bool = False, rank: bool = True) -> list:
+    """the stored events whose content has every word of the text, see
+    `EventStore.search`. Events are ranked within each partition, the newest
+    partitions first."""
+    if not self.has_search:
+        raise RuntimeError('the store has no full text index, call `enable_search` first')
+    events = []
+    with self.lock:
+        self.flush()
+        for _, _, store in self._stores(*_time_range(filters)):
+            if len(events) >= limit:
+                break
+            events += store.search(text, filters=filters, limit=limit - len(events), raw=raw, rank=rank)
+    return events
+
+
+@patch
+def coverage(self: PartitionedEventStore, filter_json: dict) -> Union[tuple, None]:
+    """see `EventStore.coverage`"""
+    return self.main.coverage(filter_json)
+
+
+@patch
+def add_coverage(self: PartitionedEventStore, filter_json: dict, since: int, until: int):
+    """see `EventStore.add_coverage`"""
+    self.main.add_coverage(filter_json, since, until)
+
+
+@patch
+def uncovered(self: PartitionedEventStore, filter_json: dict, now: int = None, max_age: float = 0) -> list:
+    """see `EventStore.uncovered`"""
+    return self.main.uncovered(filter_json, now=now, max_age=max_age)
+
+
+@patch
+def backfill_checkpoints(self: PartitionedEventStore, job: str) -> dict:
+    """see `EventStore.backfill_checkpoints`"""
+    return self.main.backfill_checkpoints(job)
+
+
+@patch
+def save_backfill_checkpoint(self: PartitionedEventStore, job: str, url: str, since: int, until: int, cursor: int):
+    """see `EventStore.save_backfill_checkpoint`. Every buffered event is
+    committed first."""
+    with self.lock:
+        self.flush()
+        self.main.save_backfill_checkpoint(job, url, since, until, cursor)
+
+
+@patch(as_prop=True)
+def size(self: PartitionedEventStore) -> int:
+    """bytes used by the pages of every database"""
+    return sum(store.size for _, _, store in self._stores())
+
+
+@patch
+def compact(self: PartitionedEventStore, vacuum: bool = True) -> dict:
+    """`EventStore.compact` every database, and apply every deletion in the
+    main database to the partitions
+
+    Returns:
+        dict: number of events replaced and deleted, and the size in bytes before and after
+    """
+    with self.lock:
+        self.flush()
+        report = self.main.compact(vacuum=vacuum)
+        targets = set(self.main.connection.execute('SELECT target, pubkey FROM deletions WHERE length(target) = 64;'))
+        for _, _, store in self._stores()[1:]:
+            size = store.size
+            deleted = self._remove_deleted(store, targets)
+            compacted = store.compact(vacuum=vacuum)
+            report['replaced'] += compacted['replaced']
+            report['deleted'] += deleted + compacted['deleted']
+            report['size_before'] += size
+            report['size_after'] += compacted['size_after']
+    return report
+
+# %% ../nbs/05_storage.ipynb 54
+@patch
+def apply_retention(self: PartitionedEventStore, now: int = None) -> dict:
+    """delete the partitions whose rule's `max_age` has passed since their period
+    ended, a file at a time
+
+    Args:
+        now (int, optional): current unix time. Defaults to None, which uses the clock.
+
+    Returns:
+        dict: number of partitions and bytes dropped
+    """
+    now = int(time.time()) if now is None else now
+    rules = {rule.name: rule for rule in self.rules}
+    dropped, freed = 0, 0
+    with self.lock:
+        self.flush()
+        for name, key in list(self.partitions):
+            rule = rules.get(name)
+            if rule is None or not rule.expired(_period_bounds(key)[1], now):
+                continue
+            store = self.partitions.pop((name, key))
+            if store is not None:
+                store.close()
+            path = self.directory / name / f'{key}.sqlite'
+            for file in (path, path.with_name(f'{path.name}-wal'), path.with_name(f'{path.name}-shm')):
+                if file.exists():
+                    freed += file.stat().st_size
+                    file.unlink()
+            dropped += 1
+            self._generation += 1
+    return {'partitions': dropped, 'bytes': freed}
+
+# %% ../nbs/05_storage.ipynb 57
+_REGULAR = 'kind != 5 AND kind NOT IN (0, 3) AND kind NOT BETWEEN 10000 AND 19999 AND kind NOT BETWEEN 30000 AND 39999'
+
+
+@patch
+def repartition(self: PartitionedEventStore, chunk_size: int = 10_000) -> int:
+    """move the regular events stored in the main database into partitions
+
+    Args:
+        chunk_size (int, optional): events moved in each transaction. Defaults to 10,000.
+
+    Returns:
+        int: number of events moved, including those already past their rule's age,
+            which are dropped
+    """
+    moved = 0
+    with self.lock:
+        self.flush()
+        con = self.main.connection
+        now = int(time.time())
+        while True:
+            rows = con.execute(f'SELECT {", ".join(EVENT_COLUMNS)} FROM events WHERE {_REGULAR} LIMIT ?;',
+                               (chunk_size,)).fetchall()
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            seen = []
+            for chunk in _chunks(ids):
+                seen += con.execute('SELECT event_seen.event_id, relays.url, event_seen.first_seen_at '
+                                    'FROM event_seen JOIN relays ON relays.id = event_seen.relay_id '
+                                    f'WHERE event_seen.event_id IN ({", ".join("?" * len(chunk))});', chunk)
+            partitions = {}
+            for row in rows:
+                partition = self._route(row[1], row[3], row[2], now)
+                if partition is None:
+                    self.expired += 1
+                else:
+                    partitions.setdefault(partition, []).append(row)
+            for partition, events in partitions.items():
+                store = self._partition(*partition)
+                kept = {row[0] for row in events}
+                with store.connection:
+                    store.inserted += store._write(
+                        events, [tag for row in events for tag in _tag_rows(row[0], json.loads(row[4]))])
+                    store._write_seen([sighting for sighting in seen if sighting[0] in kept])
+            with con:
+                for chunk in _chunks(ids):
+                    con.execute(f'DELETE FROM events WHERE id IN ({", ".join("?" * len(chunk))});', chunk)
+            moved += len(rows)
+    return moved